@@ -1,24 +1,38 @@
+import time
+import uuid
 import logging
 import pytz
-from flask import Flask
+from flask import Flask, g, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager, jwt_required
 from flask_cors import CORS
 from config import Config
+from app.utils.password_hasher import PasswordHasher
+from app.utils.logging_setup import setup_logging, parse_levels, payload_dumper, request_id_var
 
 app = Flask(__name__)
 app.config.from_object(Config)
 db = SQLAlchemy(app)
 
-# 配置日志输出
-logging.basicConfig(level=logging.DEBUG)
+# **配置日志输出：经队列异步写出，按模块设置级别，每条日志带请求 ID**
+log_queue = setup_logging(app.config['LOG_LEVEL'], parse_levels(app.config['LOG_LEVELS']))
+payload_dumper.configure(enabled=app.config['LOG_PAYLOAD_DUMPS'],
+                         sample_rate=app.config['LOG_PAYLOAD_SAMPLE_RATE'],
+                         max_chars=app.config['LOG_PAYLOAD_MAX_CHARS'])
 logger = logging.getLogger(__name__)
-logger.addHandler(logging.StreamHandler())  # 将日志输出到标准输出
 
 bcrypt = Bcrypt(app)
+# **密码加密 / 校验经独立的有界线程池执行，登录高峰不会占满请求线程**
+password_hasher = PasswordHasher(
+    bcrypt,
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    log_rounds=app.config['BCRYPT_LOG_ROUNDS'],
+)
 jwt = JWTManager(app)
-CORS(app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:3000"}}, expose_headers=["Content-Disposition"])
+CORS(app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:3000"}}, expose_headers=["Content-Disposition", "ETag"])
 
 china_tz = pytz.timezone(app.config["TIMEZONE"])
 
@@ -34,11 +48,30 @@ with app.app_context():
     db.create_all()
     logger.info("✅ 数据库表已创建")
 
-# 捕获 SQLAlchemy 的日志
-logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
-
+request_logger = logging.getLogger("app.request")
 
 
 @app.before_request
-def log_database_setup():
-    logger.info('Starting database setup...')
+def start_request_context():
+    """ 请求 ID（沿用前端/网关传入的 X-Request-ID）和开始时间 """
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    g.request_id_token = request_id_var.set(g.request_id)
+
+
+@app.after_request
+def log_request(response):
+    """ 每个请求一行日志：方法、路径、状态码、耗时 """
+    started = g.get("request_started")
+    if started is not None:
+        duration = (time.perf_counter() - started) * 1000
+        request_logger.info(f"{request.method} {request.path} {response.status_code} {duration:.1f}ms")
+        response.headers["X-Request-ID"] = g.request_id
+    return response
+
+
+@app.teardown_request
+def end_request_context(exc):
+    token = g.pop("request_id_token", None)
+    if token is not None:
+        request_id_var.reset(token)
@@ -1,4 +1,4 @@
-from app import bcrypt, db, jwt
+from app import db, jwt, logger
 from app.models.result import ResponseTemplate
 from app.models.user import User
 from flask import request, make_response, current_app
@@ -6,6 +6,8 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from datetime import timedelta, datetime
 import jwt as pyjwt
 from app.exceptions.exceptions import CustomAPIException
+from app.controllers.permission_controller import token_claims
+from app.utils.password_hasher import HasherBusyError
 
 
 # 注册用户
@@ -16,11 +18,9 @@ def register():
     if User.query.filter_by(username=data['username']).first():
         raise CustomAPIException("Username already exists", 400)
 
-    # 密码加密
-    hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
-
-    # 创建新用户
-    new_user = User(username=data['username'], user_fullname=data['user_fullname'], password=hashed_password)
+    # 创建新用户（密码经 password_hasher 加密）
+    new_user = User(username=data['username'], user_fullname=data['user_fullname'])
+    _set_password(new_user, data['password'])
 
     # 添加到数据库
     try:
@@ -33,20 +33,47 @@ def register():
 
 import json
 
+
+def _check_password(user, password):
+    """ 经 password_hasher 校验密码；排队已满或超时时返回 503，只影响登录类请求 """
+    try:
+        return user.check_password(password)
+    except HasherBusyError as e:
+        raise CustomAPIException(str(e), 503)
+
+
+def _set_password(user, password):
+    try:
+        user.set_password(password)
+    except HasherBusyError as e:
+        raise CustomAPIException(str(e), 503)
+
+
 def login():
     data = request.get_json()
 
     # 查找用户
     user = User.query.filter_by(username=data['username']).first()
-    if not user or not bcrypt.check_password_hash(user.password, data['password']):
+    if not user or not _check_password(user, data['password']):
         raise CustomAPIException("Invalid username or password", 401)
 
+    # **旧哈希的 cost 与当前配置不同时顺便重新加密（失败不影响登录）**
+    try:
+        if user.rehash_password_if_needed(data['password']):
+            db.session.commit()
+            logger.info(f"✅ 用户密码已按新的 cost 重新加密: {user.username}")
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"⚠️ 重新加密密码失败: {user.username}: {e}")
+
     user_id_str = str(user.user_id)
     roles = [role.name for role in user.roles] if user.roles else ["user"]
 
     # ✅ 解决 `Subject must be a string`：用 JSON 字符串存 `identity`
+    # **角色和权限版本号写入 Access Token，role_required 校验时不再查询数据库**
     access_token = create_access_token(identity=user_id_str,
-                                       expires_delta=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'])
+                                       expires_delta=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+                                       additional_claims=token_claims(user))
 
     refresh_token = pyjwt.encode(
         {'user_id': user_id_str, 'roles': roles, 'exp': datetime.utcnow() + timedelta(days=30)},
@@ -93,11 +120,17 @@ def refresh():
     if not user_id_str:
         raise CustomAPIException("Invalid refresh token payload", 401)
 
+    # 重新读取用户角色（Refresh Token 中的角色可能已过期）
+    user = User.query.get(int(user_id_str))
+    if not user:
+        raise CustomAPIException("Invalid refresh token payload", 401)
+
     # 生成新的 access_token
 
     # ✅ 解决 `Subject must be a string`：用 JSON 字符串存 `identity`
     new_access_token = create_access_token(identity=user_id_str,
-                                       expires_delta=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'])
+                                       expires_delta=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'],
+                                       additional_claims=token_claims(user))
 
     return ResponseTemplate.success(message="Access token refreshed", data={"access_token": new_access_token})
 
@@ -120,12 +153,12 @@ def update_password(data):
     if not user:
         raise CustomAPIException("Material not found in the project", 404)
 
-    if not user or not bcrypt.check_password_hash(user.password, user_data['currentPassword']):
+    if not user or not _check_password(user, user_data['currentPassword']):
         raise CustomAPIException("Invalid username or password", 401)
 
         # 更新密码逻辑
+    _set_password(user, user_data['newPassword'])  # 对新密码加密
     try:
-        user.set_password(user_data['newPassword']) # 对新密码加密
         db.session.add(user)
         db.session.commit()  # 提交事务
         return ResponseTemplate.success(message="Password updated successfully")
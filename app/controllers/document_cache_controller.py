@@ -0,0 +1,72 @@
+from flask import request, send_file, make_response
+from urllib.parse import quote
+from app import app, logger
+from app.controllers.project_snapshot_controller import load_project_snapshot
+from app.utils.document_cache import DocumentCache, hash_payload
+from app.utils.template_cache import template_cache
+
+document_cache = DocumentCache(app.config['DOCUMENT_CACHE_FOLDER'], app.config['DOCUMENT_CACHE_MAX_ENTRIES'])
+
+
+def get_document_digest(project_id, kind, template_path, snapshot=None):
+    """
+    计算某类文档的缓存键：项目快照内容摘要 + 模板版本 + 文档类型 的摘要。
+    :param snapshot: 已读取的 ProjectSnapshot；为 None 时按 project_id 读取
+    :return: 摘要字符串；项目不存在时返回 None
+    """
+    if snapshot is None:
+        snapshot = load_project_snapshot(project_id)
+    if snapshot is None:
+        return None
+    return hash_payload({
+        "kind": kind,
+        "template": template_cache.version(template_path),
+        "snapshot": snapshot.content_hash,
+    })
+
+
+def is_not_modified(digest):
+    """客户端携带的 If-None-Match 与当前摘要一致"""
+    return digest is not None and request.if_none_match.contains(digest)
+
+
+def not_modified_response(digest):
+    response = make_response("", 304)
+    response.set_etag(digest)
+    return response
+
+
+def send_cached_file(file_path, file_name, mimetype, digest):
+    """
+    发送文件并附带 ETag，客户端下次请求时带上 If-None-Match 即可得到 304
+    """
+    encoded_file_name = quote(file_name)
+    response = send_file(file_path, as_attachment=True, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{encoded_file_name}"
+    if digest:
+        response.set_etag(digest)
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def get_or_generate(kind, digest, suffix, generate):
+    """
+    先按摘要查缓存，未命中时调用 generate 生成文件并写入缓存。
+
+    :param digest: get_document_digest 的结果；为 None 时不使用缓存
+    :param generate: 回调，返回生成好的文件路径
+    :return: 文件路径
+    """
+    if digest:
+        cached_path = document_cache.lookup(kind, digest, suffix)
+        if cached_path:
+            logger.info(f"✅ 文档缓存命中: {kind} {digest[:12]}")
+            return cached_path
+
+    output_path = generate()
+    if digest and output_path:
+        try:
+            return document_cache.store(kind, digest, suffix, output_path)
+        except OSError as e:
+            logger.error(f"❌ 写入文档缓存失败: {e}")
+    return output_path
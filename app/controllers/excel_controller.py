@@ -2,14 +2,17 @@ import os
 from flask import jsonify, send_file
 from flask_jwt_extended import jwt_required
 from urllib.parse import quote
-from app import app
+from app import app, logger
 from app.exceptions.exceptions import CustomAPIException
-from app.models.models  import Project  # 假设 Project 模型在 models 模块中
-from app.controllers.project_material_controller import get_project_materials_info
-import openpyxl
-from openpyxl.styles import Border, Side, Alignment
+from app.controllers.project_snapshot_controller import load_project_snapshot
+from app.controllers.metrics_controller import document_timed, observe_output, stage
+from app.controllers.document_cache_controller import (get_document_digest, get_or_generate, is_not_modified,
+                                                        not_modified_response, send_cached_file)
+from app.utils.bom_writer import write_bom
 # 模板路径
 TEMPLATE_PATH = os.path.join(app.config['TEMPLATE_FOLDER'], "materialtabletemplate.xlsx")
+# 指标中的文档类型
+DOCUMENT = "bom"
 from datetime import datetime
 
 
@@ -19,16 +22,23 @@ from datetime import datetime
 @jwt_required()
 def generate_excel(project_id):
     try:
-        # 从数据库获取项目数据
-        project = Project.query.get(project_id)
-        if not project:
+        # 从数据库获取项目快照（项目信息 + 材料列表）
+        with stage(DOCUMENT, "database"):
+            snapshot = load_project_snapshot(project_id)
+        if snapshot is None:
             return jsonify({"error": "项目不存在"}), 404
+        project = snapshot.project
 
         # 获取项目关联的材料列表
-        material_list = get_project_materials_info(project_id)
+        material_list = snapshot.material_list()
         if not material_list:
             return jsonify({"error": "材料列表为空"}), 400
 
+        # **数据快照摘要：数据和模板都没有变化时，直接返回上次生成的文件**
+        digest = get_document_digest(project_id, "bom", TEMPLATE_PATH, snapshot)
+        if is_not_modified(digest):
+            return not_modified_response(digest)
+
         # 提取项目信息
         product_info = {
             "产品名称": project.project_name,
@@ -38,104 +48,77 @@ def generate_excel(project_id):
             "产品等级": project.project_level,
             "产品编号": project.product_number,
         }
-        today = datetime.today()
-
-        # 生成格式化的日期字符串
-        formatted_date = today.strftime("%y%m%d")
-
-        print(formatted_date)
         # 动态生成输出文件名称
-        product_model = project.project_model or "未命名产品"
-        output_file_name = f"{product_model}BOM明细表 {formatted_date}.xlsx"
+        output_file_name = get_output_file_name(project)
         output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_file_name)
 
-        # 调用填充函数
-        fill_excel_template(TEMPLATE_PATH, output_path, product_info, material_list)
+        def generate():
+            # 调用填充函数
+            fill_excel_template(TEMPLATE_PATH, output_path, product_info, material_list)
+            return output_path
 
-        # URL 编码文件名（避免中文乱码）
-        encoded_file_name = quote(output_file_name)
+        output_path = get_or_generate("bom", digest, ".xlsx", generate)
 
-        # 返回文件
-        response = send_file(
+        # 返回文件（URL 编码文件名，避免中文乱码；附带 ETag）
+        return send_cached_file(
             output_path,
-            as_attachment=True,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            output_file_name,
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            digest
         )
-        # 设置 Content-Disposition 响应头
-        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{encoded_file_name}"
-        return response
     except Exception as e:
         raise CustomAPIException("Material not found in the project", 404)
 
 
 
 
+def get_output_file_name(project):
+    """生成的文件名：型号 + BOM明细表 + 日期"""
+    formatted_date = datetime.today().strftime("%y%m%d")
+    product_model = project.project_model or "未命名产品"
+    return f"{product_model}BOM明细表 {formatted_date}.xlsx"
+
+
+@document_timed(DOCUMENT)
 def fill_excel_template(template_path, output_path, product_info, data):
     """
     填充 Excel 模板数据，并将结果保存到指定路径。
+    模板解析一次后缓存，物料行按预先算好的样式与合并区域流式写出（见 app/utils/bom_writer.py），
+    输出与原来逐行插入、合并、加边框的写法一致。
     """
-    # **加载 Excel 模板**
-    wb = openpyxl.load_workbook(template_path)
-    sheet = wb.active
-
-    # **填充固定项目信息**
-    def set_cell_value(cell, value):
-        if not isinstance(sheet[cell], openpyxl.cell.cell.MergedCell):
-            sheet[cell].value = value
-
-    set_cell_value("C2", product_info.get("产品名称", ""))
-    set_cell_value("C3", product_info.get("产品型号", ""))
-    set_cell_value("C4", product_info.get("成品规格", ""))
-    set_cell_value("H1", product_info.get("文件编号", ""))
-    set_cell_value("H3", product_info.get("产品等级", ""))
-    set_cell_value("H4", product_info.get("产品编号", ""))
-
-    # **动态插入数据行**
-    start_row = 6  # 物料数据从第6行开始
-    required_rows = len(data) - 1  # 计算要插入的行数
-
-    if required_rows > 0:
-        sheet.insert_rows(start_row, amount=required_rows)  # **一次性插入 required_rows 行**
-
-    # **手动合并 F:G、H:J**
-    for idx in range(len(data)):
-        current_row = start_row + idx
-        sheet.merge_cells(f"F{current_row}:G{current_row}")  # **合并 F:G**
-        sheet.merge_cells(f"H{current_row}:J{current_row}")  # **合并 H:J**
-
-    # **填充数据**
-    for idx, row_data in enumerate(data):
-        current_row = start_row + idx
-        sheet[f"A{current_row}"].value = idx + 1  # **自动生成序号**
-        sheet[f"B{current_row}"].value = row_data.get("material_code", "")
-        sheet[f"C{current_row}"].value = row_data.get("material_name", "")
-        sheet[f"D{current_row}"].value = row_data.get("model_specification", "")
-        sheet[f"E{current_row}"].value = row_data.get("unit", "")
-
-    # **手动定义边框**
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                         top=Side(style='thin'), bottom=Side(style='thin'))
-
-    for row in sheet.iter_rows(min_row=start_row, max_row=start_row + required_rows, min_col=1, max_col=sheet.max_column):
-        for cell in row:
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal="center", vertical="center")  # **居中对齐**
-
-    # **保存 Excel 文件**
-    wb.save(output_path)
-    print(f"文件已保存到: {output_path}")
-
-
-
-def generate_excel_local(project_id):
+    # **固定项目信息所在的单元格**
+    header_values = {
+        "C2": product_info.get("产品名称", ""),
+        "C3": product_info.get("产品型号", ""),
+        "C4": product_info.get("成品规格", ""),
+        "H1": product_info.get("文件编号", ""),
+        "H3": product_info.get("产品等级", ""),
+        "H4": product_info.get("产品编号", ""),
+    }
+    # **物料数据：A 列序号自动生成，B~E 列依次为 代码、名称、规格、单位**
+    with stage(DOCUMENT, "rows"):
+        rows = [(row_data.get("material_code", ""), row_data.get("material_name", ""),
+                 row_data.get("model_specification", ""), row_data.get("unit", "")) for row_data in data]
+
+    with stage(DOCUMENT, "write_bom"):
+        write_bom(template_path, output_path, header_values, rows)
+    observe_output(DOCUMENT, output_path)
+    logger.info(f"✅ BOM 已保存到: {output_path}")
+
+
+
+def generate_excel_local(project_id, snapshot=None):
     try:
-        # 从数据库获取项目数据
-        project = Project.query.get(project_id)
-        if not project:
+        # 从数据库获取项目快照（已读取时直接使用）
+        if snapshot is None:
+            with stage(DOCUMENT, "database"):
+                snapshot = load_project_snapshot(project_id)
+        if snapshot is None:
             return jsonify({"error": "项目不存在"}), 404
+        project = snapshot.project
 
         # 获取项目关联的材料列表
-        material_list = get_project_materials_info(project_id)
+        material_list = snapshot.material_list()
         if not material_list:
             return jsonify({"error": "材料列表为空"}), 400
 
@@ -148,16 +131,8 @@ def generate_excel_local(project_id):
             "产品等级": project.project_level,
             "产品编号": project.product_number,
         }
-        # 获取当前日期
-        today = datetime.today()
-
-        # 生成格式化的日期字符串
-        formatted_date = today.strftime("%y%m%d")
-
-        print(formatted_date)
         # 动态生成输出文件名称
-        product_model = project.project_model or "未命名产品"
-        output_file_name = f"{product_model}BOM明细表 {formatted_date}.xlsx"
+        output_file_name = get_output_file_name(project)
         output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_file_name)
 
         # 调用填充函数
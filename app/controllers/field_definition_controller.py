@@ -1,34 +1,93 @@
-from app import db, logger
+from app import app, db, logger
 from app.models.result import ResponseTemplate
-from app.models.models import FieldDefinition
+from app.models.models import FieldDefinition, CacheVersion
 from flask_jwt_extended import jwt_required
 from app.exceptions.exceptions import CustomAPIException
+from app.utils.versioned_cache import VersionedCache
+
+FIELD_DEFINITION_CACHE = "field_definitions"
+
+FIELD_DEFINITION_COLUMNS = ["id", "parent_id", "field_name", "code", "field_type", "remarks"]
+
+
+def _load_field_definitions():
+    """
+    一次查询加载全部字段定义，建立 id / code / 父子结构索引
+    """
+    columns = [getattr(FieldDefinition, name) for name in FIELD_DEFINITION_COLUMNS]
+    rows = db.session.query(*columns).order_by(FieldDefinition.id).all()
+    by_id = {}
+    by_code = {}
+    children = {}
+    for row in rows:
+        item = dict(zip(FIELD_DEFINITION_COLUMNS, row))
+        by_id[item["id"]] = item
+        if item["code"]:
+            by_code[item["code"]] = item
+        children.setdefault(item["parent_id"], []).append(item["id"])
+    return {"by_id": by_id, "by_code": by_code, "children": children}
+
+
+# **字段定义缓存：增删改时失效，其他进程通过 t_cache_versions 中的版本号发现修改**
+field_definition_cache = VersionedCache(
+    FIELD_DEFINITION_CACHE,
+    _load_field_definitions,
+    version_getter=lambda: CacheVersion.get_version(FIELD_DEFINITION_CACHE),
+    check_interval=app.config['FIELD_DEFINITION_CACHE_CHECK_INTERVAL'],
+)
+
+
+def _field_definition_dict(index, item, include_children=False):
+    """ 与 FieldDefinition.to_dict 的结构一致（返回副本，调用方可以修改） """
+    data = dict(item)
+    if include_children:
+        data['children'] = [dict(index["by_id"][child_id]) for child_id in index["children"].get(item["id"], [])]
+    return data
+
+
+def get_cached_field_definition(field_definition_id=None, code=None, include_children=False):
+    """ 从缓存中按 id 或 code 获取字段定义，不存在时返回 None """
+    index = field_definition_cache.get()
+    item = index["by_id"].get(field_definition_id) if code is None else index["by_code"].get(code)
+    return _field_definition_dict(index, item, include_children) if item else None
+
+
+def get_field_definition_rows():
+    """ 字段定义的 (id, parent_id, field_name, code) 行，按 id 排序（用于文档数据快照） """
+    return [[item["id"], item["parent_id"], item["field_name"], item["code"]]
+            for item in field_definition_cache.get()["by_id"].values()]
+
+
+def _field_definitions_changed():
+    """ 写入字段定义时调用（在提交之前）：递增共享版本号 """
+    CacheVersion.bump(FIELD_DEFINITION_CACHE)
 
 
 @jwt_required()
 def get_field_definition_list():
     """ 获取所有字段定义（包括层级关系） """
-    field_definitions = FieldDefinition.query.filter(FieldDefinition.parent_id.is_(None)).all()
-    field_definition_list = [field_definition.to_dict(include_children=True) for field_definition in field_definitions]
+    index = field_definition_cache.get()
+    field_definition_list = [_field_definition_dict(index, index["by_id"][field_definition_id], include_children=True)
+                             for field_definition_id in index["children"].get(None, [])]
     return ResponseTemplate.success(data=field_definition_list)
 
 
 @jwt_required()
 def get_field_definition(field_definition_id):
     """ 根据 ID 获取字段定义 """
-    field_definition = FieldDefinition.query.get(field_definition_id)
+    field_definition = get_cached_field_definition(field_definition_id, include_children=True)
     if not field_definition:
         raise CustomAPIException("FieldDefinition not found", 404)
-    return ResponseTemplate.success(data=field_definition.to_dict(include_children=True))
+    return ResponseTemplate.success(data=field_definition)
 
 
 @jwt_required()
 def get_field_definition_by_code(code):
     """ 根据 code 获取字段定义 """
-    field_definition = FieldDefinition.query.filter_by(code=code).first()
+    field_definition = get_cached_field_definition(code=code, include_children=True)
     if not field_definition:
         raise CustomAPIException("FieldDefinition with this code not found", 404)
-    return ResponseTemplate.success(data=field_definition.to_dict(include_children=True))
+    return ResponseTemplate.success(data=field_definition)
 
 
 @jwt_required()
@@ -48,7 +107,9 @@ def create_field_definition(data):
             remarks=data.get('remarks')
         )
         db.session.add(new_field_definition)
+        _field_definitions_changed()
         db.session.commit()
+        field_definition_cache.invalidate()
         return ResponseTemplate.success(message="FieldDefinition created successfully")
     except Exception as e:
         db.session.rollback()
@@ -74,7 +135,9 @@ def update_field_definition(field_definition_id, data):
         field_definition.code = data.get('code')
         field_definition.field_type = data['field_type']
         field_definition.remarks = data.get('remarks')
+        _field_definitions_changed()
         db.session.commit()
+        field_definition_cache.invalidate()
 
         return ResponseTemplate.success(message="FieldDefinition updated successfully")
     except Exception as e:
@@ -91,13 +154,21 @@ def delete_field_definition(field_definition_id):
 
     try:
         db.session.delete(field_definition)
+        _field_definitions_changed()
         db.session.commit()
+        field_definition_cache.invalidate()
         return ResponseTemplate.success(message="FieldDefinition deleted successfully")
     except Exception as e:
         db.session.rollback()
         raise CustomAPIException(f"Database error: {str(e)}", 500)
 
 
+def _fields_by_codes(codes):
+    """ 以 code 为键、字段定义字典为值（来自缓存，不查询数据库） """
+    by_code = field_definition_cache.get()["by_code"]
+    return {code: dict(by_code[code]) for code in codes if code in by_code}
+
+
 def get_fields_by_code():
     codes = [
         'circuit_diagram',
@@ -105,11 +176,7 @@ def get_fields_by_code():
         'weight',
         'environmental_characteristics'
     ]
-    # 执行查询，获取符合条件的所有记录
-    results = FieldDefinition.query.filter(FieldDefinition.code.in_(codes)).all()
-    # 使用字典推导，创建以 code 为键，FieldDefinition 对象的字典表示为值的字典
-    fields_by_code = {item.code: item.to_dict() for item in results}
-    return fields_by_code
+    return _fields_by_codes(codes)
 
 
 def get_fields_h2_by_code():
@@ -119,16 +186,12 @@ def get_fields_h2_by_code():
         'shock_resistance',
         'vibration_resistance'
     ]
-    # 执行查询，获取符合条件的所有记录
-    results = FieldDefinition.query.filter(FieldDefinition.code.in_(codes)).all()
-    # 使用字典推导，创建以 code 为键，FieldDefinition 对象的字典表示为值的字典
-    fields_by_code = {item.code: item.to_dict() for item in results}
-    return fields_by_code
+    return _fields_by_codes(codes)
 
 
 def get_field_name_by_code(code):
-    """ 根据 code 获取字段定义 """
-    field_definition = FieldDefinition.query.filter_by(code=code).first()
+    """ 根据 code 获取字段定义名称（来自缓存） """
+    field_definition = field_definition_cache.get()["by_code"].get(code)
     if not field_definition:
         raise CustomAPIException("FieldDefinition with this code not found", 404)
-    return field_definition.field_name
\ No newline at end of file
+    return field_definition["field_name"]
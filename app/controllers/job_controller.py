@@ -0,0 +1,244 @@
+import json
+import os
+import time
+import shutil
+import tempfile
+import threading
+from flask import Response, send_file
+from flask_jwt_extended import get_jwt_identity
+from urllib.parse import quote
+from app import app, jwt_required, logger, password_hasher
+from app.exceptions.exceptions import CustomAPIException
+from app.models.models import Project
+from app.models.result import ResponseTemplate
+from app.utils.job_queue import create_job_backend, JobQueueFullError
+from app.controllers import word_controller, word_product_spec_controller, excel_controller
+from app.controllers.document_cache_controller import get_document_digest, get_or_generate
+from app.controllers.project_snapshot_controller import load_project_snapshot
+from app.controllers.metrics_controller import stage
+from app.controllers.office_document_controller import convert_to_pdf_with_command, office_pool
+
+# **进程内任务后端：配置 JOB_BACKEND 可切换为进程外 worker**
+job_backend = create_job_backend(
+    app.config['JOB_BACKEND'],
+    max_workers=app.config['JOB_WORKERS'],
+    max_pending=app.config['JOB_MAX_PENDING'],
+    result_ttl=app.config['JOB_RESULT_TTL'],
+    context_factory=app.app_context,
+)
+# **物料导入的任务后端：与文档生成分开，大文件导入不会占满生成任务的工作线程和排队名额**
+import_job_backend = create_job_backend(
+    app.config['JOB_BACKEND'],
+    max_workers=app.config['MATERIAL_IMPORT_WORKERS'],
+    max_pending=app.config['MATERIAL_IMPORT_MAX_PENDING'],
+    result_ttl=app.config['JOB_RESULT_TTL'],
+    context_factory=app.app_context,
+    thread_name_prefix="import-worker",
+)
+
+# **进度推送连接数上限：每个连接在推送期间占用一个 waitress 线程**
+event_streams = threading.BoundedSemaphore(app.config['JOB_EVENTS_MAX_STREAMS'])
+
+MIMETYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pdf": "application/pdf",
+}
+
+
+def _get_snapshot(project_id, document):
+    with stage(document, "database"):
+        snapshot = load_project_snapshot(project_id)
+    if snapshot is None:
+        raise CustomAPIException("项目不存在", 404)
+    return snapshot
+
+
+def _generate_tech_manual(job):
+    project_id = job.params["project_id"]
+    job.update(10, "读取项目数据")
+    snapshot = _get_snapshot(project_id, "tech_manual")
+    digest = get_document_digest(project_id, "tech_manual", word_controller.TECHNICAL_TEMPLATE_PATH, snapshot)
+    job.update(20, "生成技术说明书")
+    output_path = get_or_generate("tech_manual", digest, ".docx",
+                                  lambda: word_controller.generate_document(project_id, snapshot)[0])
+    return output_path, word_controller.get_output_file_name(snapshot.project), digest
+
+
+def _generate_product_spec(job):
+    project_id = job.params["project_id"]
+    job.update(10, "读取项目数据")
+    snapshot = _get_snapshot(project_id, "product_spec")
+    digest = get_document_digest(project_id, "product_spec",
+                                 word_product_spec_controller.PRODUCT_SPECIFICATION_TEMPLATE_PATH, snapshot)
+    job.update(20, "生成产品规范")
+    output_path = get_or_generate("product_spec", digest, ".docx",
+                                  lambda: word_product_spec_controller.generate_document(project_id, snapshot)[0])
+    return output_path, word_product_spec_controller.get_output_file_name(snapshot.project), digest
+
+
+def _generate_excel(job):
+    project_id = job.params["project_id"]
+    job.update(10, "读取项目数据")
+    snapshot = _get_snapshot(project_id, "bom")
+    digest = get_document_digest(project_id, "bom", excel_controller.TEMPLATE_PATH, snapshot)
+    job.update(20, "生成 BOM 明细表")
+
+    def generate():
+        output_path = excel_controller.generate_excel_local(project_id, snapshot)
+        if not isinstance(output_path, str):
+            # generate_excel_local 在数据缺失时返回 (响应, 状态码)
+            raise CustomAPIException("材料列表为空", 400)
+        return output_path
+
+    output_path = get_or_generate("bom", digest, ".xlsx", generate)
+    return output_path, excel_controller.get_output_file_name(snapshot.project), digest
+
+
+def _document(generate):
+    """只生成原始文件"""
+    def runner(job):
+        output_path, output_file_name, _ = generate(job)
+        return output_path, output_file_name
+    return runner
+
+
+def _with_pdf(cache_kind, generate):
+    """
+    先生成原始文件，再转换为 PDF。
+    原始文件在缓存目录中，由多个任务共享，因此在每个任务自己的临时目录中转换，
+    转换结果按同一摘要另存为 <cache_kind>_pdf 类缓存，数据未变化时直接复用。
+    """
+    def runner(job):
+        output_path, output_file_name, digest = generate(job)
+        job.update(60, "转换 PDF")
+        work_dir = tempfile.mkdtemp(prefix=f"job-{job.id}-")
+        output_pdf_path = None
+        try:
+            output_pdf_path = get_or_generate(f"{cache_kind}_pdf", digest, ".pdf",
+                                              lambda: convert_to_pdf_with_command(output_path, work_dir))
+        finally:
+            # 写入缓存失败时 get_or_generate 返回临时目录中的文件，此时保留该目录
+            if not (output_pdf_path and output_pdf_path.startswith(work_dir)):
+                shutil.rmtree(work_dir, ignore_errors=True)
+        return output_pdf_path, os.path.splitext(output_file_name)[0] + ".pdf"
+    return runner
+
+
+# **任务类型 -> 执行函数**
+JOB_RUNNERS = {
+    "tech_manual": _document(_generate_tech_manual),
+    "product_spec": _document(_generate_product_spec),
+    "excel": _document(_generate_excel),
+    "tech_manual_pdf": _with_pdf("tech_manual", _generate_tech_manual),
+    "product_spec_pdf": _with_pdf("product_spec", _generate_product_spec),
+    "excel_pdf": _with_pdf("bom", _generate_excel),
+}
+
+
+def _get_own_job(job_id):
+    """只允许提交者查看自己的任务；不存在、已过期或不属于当前用户时返回 None"""
+    job = job_backend.get(job_id) or import_job_backend.get(job_id)
+    if job is None or job.owner != get_jwt_identity():
+        return None
+    return job
+
+
+def _job_not_found():
+    return ResponseTemplate.error(message="任务不存在或已过期", status_code=404)
+
+
+@jwt_required()
+def submit_job(kind, project_id):
+    """提交生成任务，立即返回任务 ID"""
+    runner = JOB_RUNNERS.get(kind)
+    if runner is None:
+        return ResponseTemplate.error(message=f"不支持的任务类型: {kind}", status_code=400)
+    if not Project.query.get(project_id):
+        return ResponseTemplate.error(message="项目不存在", status_code=404)
+
+    try:
+        job = job_backend.submit(kind, {"project_id": project_id}, runner, owner=get_jwt_identity())
+    except JobQueueFullError as e:
+        logger.warning(f"⚠️ 任务队列已满，拒绝提交: {kind} {project_id}")
+        return ResponseTemplate.error(message=str(e), status_code=429)
+
+    logger.info(f"✅ 已提交任务: {kind} {project_id} -> {job.id}")
+    return ResponseTemplate.success(data=job.to_dict(), message="任务已提交")
+
+
+@jwt_required()
+def get_job(job_id):
+    """查询任务状态"""
+    job = _get_own_job(job_id)
+    if job is None:
+        return _job_not_found()
+    return ResponseTemplate.success(data=job.to_dict(), message="success")
+
+
+@jwt_required()
+def stream_job_events(job_id):
+    """
+    以 Server-Sent Events 推送任务进度，任务结束或超时后关闭连接。
+    注意：推送期间会占用一个服务线程，因此：
+    - 同时推送的连接数不超过 JOB_EVENTS_MAX_STREAMS，超出时返回 429，客户端改为轮询 GET /api/jobs/<job_id>；
+    - 每个连接最长 JOB_EVENTS_TIMEOUT 秒，任务未结束时由客户端（EventSource）按 retry 间隔自动重连。
+    """
+    job = _get_own_job(job_id)
+    if job is None:
+        return _job_not_found()
+    if not event_streams.acquire(blocking=False):
+        return ResponseTemplate.error(message="进度推送连接数已达上限，请改为轮询任务状态", status_code=429)
+    timeout = app.config['JOB_EVENTS_TIMEOUT']
+    retry = app.config['JOB_EVENTS_RETRY_MS']
+
+    def events():
+        version = None
+        deadline = time.time() + timeout
+        yield f"retry: {retry}\n\n"
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"event: progress\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if job.finished or time.time() >= deadline:
+                break
+            job.wait_for_change(version, timeout=min(15, max(deadline - time.time(), 0)))
+        if job.finished:
+            # 任务已结束：通知客户端关闭 EventSource，不再重连
+            yield "event: end\ndata: {}\n\n"
+
+    response = Response(events(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # 连接关闭（包括客户端提前断开）时释放名额
+    response.call_on_close(event_streams.release)
+    return response
+
+
+@jwt_required()
+def download_job_result(job_id):
+    """下载任务生成的文件"""
+    job = _get_own_job(job_id)
+    if job is None:
+        return _job_not_found()
+    if job.status != job.SUCCEEDED:
+        return ResponseTemplate.error(message=f"任务尚未完成: {job.status}", status_code=409)
+    if not job.result_path or not os.path.exists(job.result_path):
+        return ResponseTemplate.error(message="生成的文件已不存在，请重新提交任务", status_code=410)
+
+    suffix = os.path.splitext(job.result_path)[1].lower()
+    response = send_file(job.result_path, as_attachment=True,
+                         mimetype=MIMETYPES.get(suffix, "application/octet-stream"))
+    response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(job.result_name)}"
+    return response
+
+
+@jwt_required()
+def get_job_stats():
+    """任务队列、物料导入队列、文档转换池与密码计算池状态"""
+    data = job_backend.stats()
+    data["material_import"] = import_job_backend.stats()
+    data["office_pool"] = office_pool.stats()
+    data["password_hasher"] = password_hasher.stats()
+    return ResponseTemplate.success(data=data, message="success")
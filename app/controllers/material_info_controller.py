@@ -3,6 +3,8 @@ from app import db, jwt_required, logger, app
 from app.exceptions.exceptions import CustomAPIException
 from app.models.result import ResponseTemplate
 from app.models.models import MaterialInfo
+from app.controllers.search_index_controller import material_search
+from app.controllers.pagination_controller import get_page_args, paginate_query, paginate_ids, count_cache
 import os
 import pandas as pd
 from werkzeug.utils import secure_filename
@@ -10,29 +12,25 @@ from werkzeug.utils import secure_filename
 
 @jwt_required()
 def get_material_info_list():
-    # 获取分页参数
-    page = int(request.args.get('page', 1))
-    page_size = int(request.args.get('pageSize', 10))
+    # 获取分页参数（page / pageSize，或游标分页 cursor / pageSize）
+    try:
+        page_args = get_page_args()
+    except CustomAPIException as e:
+        return ResponseTemplate.error(message=e.message, status_code=e.status_code)
 
     # 获取搜索参数
     material_code = request.args.get('material_code', '').strip()
     material_name = request.args.get('material_name', '').strip()
     model_specification = request.args.get('model_specification', '').strip()
 
-    # 构建查询
-    query = MaterialInfo.query
-
-    # 动态添加过滤条件
-    if material_code:
-        query = query.filter(MaterialInfo.material_code.ilike(f"%{material_code}%"))
-    if material_name:
-        query = query.filter(MaterialInfo.material_name.ilike(f"%{material_name}%"))
-    if model_specification:
-        query = query.filter(MaterialInfo.model_specification.ilike(f"%{model_specification}%"))
-
-    # 分页
-    materials_paginated = query.paginate(page=page, per_page=page_size, error_out=False)
-    materials = materials_paginated.items
+    # **有搜索条件时走 n-gram 索引，只查询当前页的记录；否则直接分页，总数来自缓存**
+    terms = {field: value for field, value in (("material_code", material_code), ("material_name", material_name),
+                                               ("model_specification", model_specification)) if value}
+    if terms:
+        material_ids = material_search.search(terms)
+        materials, page_info = paginate_ids(MaterialInfo, MaterialInfo.id, material_ids, page_args)
+    else:
+        materials, page_info = paginate_query(MaterialInfo.query, MaterialInfo.id, page_args, ("material",))
 
     # 转换为字典列表
     material_list = [material.to_dict() for material in materials]
@@ -41,10 +39,7 @@ def get_material_info_list():
     return ResponseTemplate.success(
         data={
             "materials": material_list,
-            "totalElements": materials_paginated.total,
-            "page": page,
-            "pageSize": page_size,
-            "pages": materials_paginated.pages
+            **page_info
         },
         message='success'
     )
@@ -67,7 +62,10 @@ def create_material_info(data):
         unit=data.get('unit')  # 单位可选
     )
     db.session.add(new_material)
+    material_search.changed()
     db.session.commit()
+    material_search.indexed(new_material)
+    count_cache.invalidate("material")
     return ResponseTemplate.success(message='MaterialInfo created successfully')
 
 
@@ -81,7 +79,9 @@ def update_material_info(material_id, data):
     material.material_name = data['material_name']
     material.model_specification = data.get('model_specification')  # 更新规格
     material.unit = data.get('unit')  # 更新单位
+    material_search.changed()
     db.session.commit()
+    material_search.indexed(material)
 
     return ResponseTemplate.success(message='MaterialInfo updated successfully')
 
@@ -92,26 +92,33 @@ def delete_material_info(material_id):
     if not material:
         return ResponseTemplate.error(message='MaterialInfo not found')
     db.session.delete(material)
+    material_search.changed()
     db.session.commit()
+    material_search.removed(material_id)
+    count_cache.invalidate("material")
     return ResponseTemplate.success(message='MaterialInfo deleted successfully')
 
 
 
 import os
-import subprocess
+import re
+import uuid
+import threading
 import pandas as pd
 from flask import request
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 from sqlalchemy.exc import SQLAlchemyError
 from zipfile import BadZipFile
 from app import db, logger
 from app.models.result import ResponseTemplate
 from app.models.models import MaterialInfo
+from app.utils.material_importer import MaterialImporter, ImportCheckpoint, iter_material_chunks
+from app.utils.job_queue import JobQueueFullError
+from app.controllers.job_controller import import_job_backend
 
 UPLOAD_FOLDER =app.config['OUTPUT_FOLDER']
 ALLOWED_EXTENSIONS = {"xls", "xlsx", "csv"}
-LIBREOFFICE_PATH = app.config['LIBREOFFICE_PATH']  # LibreOffice 可执行路径
 
 
 def allowed_file(filename):
@@ -122,34 +129,16 @@ def allowed_file(filename):
 
 
 def convert_xls_to_xlsx(xls_path):
-    """ 使用 LibreOffice 将 .xls 转换为 .xlsx """
-    output_dir = os.path.dirname(xls_path)  # 目标文件所在目录
-    xlsx_path = xls_path.replace(".xls", ".xlsx")  # 目标转换后的文件路径
+    """ 使用 LibreOffice 将 .xls 转换为 .xlsx（经转换池执行，带超时） """
+    # 延迟导入：office_document_controller 依赖各文档生成控制器
+    from app.controllers.office_document_controller import convert_document
 
     try:
-        # **执行 LibreOffice 命令**
-        result = subprocess.run(
-            [LIBREOFFICE_PATH, "--headless", "--convert-to", "xlsx", xls_path, "--outdir", output_dir],
-            capture_output=True,
-            text=True,
-            cwd=os.path.dirname(LIBREOFFICE_PATH)  # **确保 LibreOffice 运行目录正确**
-        )
-
-        # **打印 LibreOffice 执行日志**
-        print(f"✅ LibreOffice stdout: {result.stdout}")
-        print(f"❌ LibreOffice stderr: {result.stderr}")
-
-        # **检查是否成功生成 .xlsx 文件**
-        converted_file_path = os.path.join(output_dir, os.path.basename(xlsx_path))
-        if os.path.exists(converted_file_path):
-            print(f"✅ 转换成功: {converted_file_path}")
-            return converted_file_path
-        else:
-            print(f"❌ LibreOffice 没有生成 .xlsx 文件: {converted_file_path}")
-            return None
-
+        converted_file_path = convert_document(xls_path, "xlsx")
+        logger.info(f"✅ 转换成功: {converted_file_path}")
+        return converted_file_path
     except Exception as e:
-        print(f"❌ LibreOffice 转换失败: {str(e)}")
+        logger.error(f"❌ LibreOffice 转换失败: {str(e)}")
         return None
 
 @jwt_required()
@@ -191,49 +180,25 @@ def import_materials():
         else:
             try:
                 df = pd.read_excel(file_path, engine="openpyxl", header=1)  # 读取文件，指定表头
-                df.columns = df.columns.str.strip()  # 去掉列名的多余空格
-
-                # **清理空值**
-                df = df.where(pd.notnull(df), None)  # 将 NaN 转换为 None
             except BadZipFile:
                 return ResponseTemplate.error(message="Excel 文件损坏或格式错误，请重新上传")
 
-        # **预处理列名**
-        df.columns = df.columns.str.strip()
-
         # **检查是否包含必要列**
-        column_mapping = {
-            "物料代码": "material_code",
-            "物料名称": "material_name",
-            "型号规格": "model_specification",
-            "计量单位": "unit"
-        }
-        if not set(column_mapping.keys()).issubset(df.columns):
+        if MaterialImporter.missing_columns(df):
             raise CustomAPIException("文件缺少必要列，必须包含", 500)
 
-        # **重命名列**
-        df = df.rename(columns=column_mapping)
-
-        for _, row in df.iterrows():
-            existing = MaterialInfo.query.filter_by(material_code=row["material_code"]).first()
-            if existing:
-                # 更新已存在记录
-                existing.material_name = row["material_name"]
-                existing.model_specification = row.get("model_specification", None)
-                existing.unit = row.get("unit", None)
-            else:
-                # 插入新记录
-                new_material = MaterialInfo(
-                    material_code=row["material_code"],
-                    material_name=row["material_name"],
-                    model_specification=row.get("model_specification", None),
-                    unit=row.get("unit", None),
-                )
-                db.session.add(new_material)
-
+        # **批量导入：向量化清理 + 按物料代码去重，分块 IN 查询已有记录，批量插入/更新，一个事务提交**
+        importer = MaterialImporter(db.session, MaterialInfo.__table__,
+                                    chunk_size=app.config['MATERIAL_IMPORT_CHUNK_SIZE'])
+        importer.import_frame(df)
+        material_search.changed()
         db.session.commit()
+        material_search.invalidate()
+        count_cache.invalidate("material")
 
-        return ResponseTemplate.success(message="数据导入完成")
+        result = importer.result()
+        logger.info(f"✅ 物料导入完成: {importer.counts}")
+        return ResponseTemplate.success(data=result, message="数据导入完成")
 
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -246,3 +211,187 @@ def import_materials():
 
     finally:
         os.remove(file_path)  # **清理临时文件**
+
+
+# ------------------------------------------------------------------
+# **后台导入任务：流式读取 + 分批提交 + 进度上报 + 失败后从最后提交的批次续传**
+# ------------------------------------------------------------------
+
+IMPORT_FOLDER = app.config['MATERIAL_IMPORT_FOLDER']
+IMPORT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# 正在执行的导入：import_id -> job_id，避免同一个文件被并发续传
+_active_imports = {}
+_active_imports_lock = threading.Lock()
+
+
+def _checkpoint_for(import_id):
+    return ImportCheckpoint(os.path.join(IMPORT_FOLDER, f"{import_id}.json"))
+
+
+def _import_details(import_id, checkpoint):
+    """ 进度明细（来自检查点）：已读行数、已写入行数（新增 + 更新）、出错行数及累计结果 """
+    counts = checkpoint.data.get("counts") or {}
+    return {
+        "import_id": import_id,
+        "file_name": checkpoint.data.get("file_name"),
+        "status": checkpoint.data.get("status"),
+        "rows_read": checkpoint.data.get("rows_committed", 0),
+        "rows_written": counts.get("inserted", 0) + counts.get("updated", 0),
+        "rows_error": counts.get("rejected", 0),
+        "counts": counts,
+        "rejected_rows": checkpoint.data.get("rejected_rows", []),
+        "error": checkpoint.data.get("error"),
+    }
+
+
+def _run_material_import(job):
+    """ 任务执行函数：每批 MATERIAL_IMPORT_CHUNK_SIZE 行读取、导入、提交，再写检查点 """
+    import_id = job.params["import_id"]
+    checkpoint = _checkpoint_for(import_id)
+    state = checkpoint.load()
+    try:
+        file_path = state["file_path"]
+        if file_path.endswith(".xls"):
+            job.update(1, "转换 .xls 文件")
+            converted_file_path = convert_xls_to_xlsx(file_path)
+            if converted_file_path is None:
+                raise CustomAPIException(".xls 文件转换失败，请检查 LibreOffice 是否安装", 500)
+            os.remove(file_path)
+            file_path = converted_file_path
+            checkpoint.save(file_path=file_path)
+
+        importer = MaterialImporter(db.session, MaterialInfo.__table__,
+                                    chunk_size=app.config['MATERIAL_IMPORT_CHUNK_SIZE'])
+        importer.restore(state.get("counts"), state.get("rejected_rows"))
+        checkpoint.save(status="running", error=None, counts=importer.counts, rejected_rows=importer.rejected_rows)
+        rows_committed = state.get("rows_committed", 0)
+        job.update(1, f"从第 {rows_committed} 行开始导入" if rows_committed else "开始导入",
+                   details=_import_details(import_id, checkpoint))
+
+        try:
+            for chunk in iter_material_chunks(file_path, app.config['MATERIAL_IMPORT_CHUNK_SIZE'], rows_committed):
+                missing_columns = MaterialImporter.missing_columns(chunk.frame)
+                if missing_columns:
+                    raise CustomAPIException(f"文件缺少必要列: {', '.join(missing_columns)}", 400)
+                importer.import_frame(chunk.frame, row_offset=chunk.start)
+                material_search.changed()
+                db.session.commit()
+                material_search.invalidate()
+                count_cache.invalidate("material")
+                checkpoint.save(rows_committed=chunk.end, counts=importer.counts, rejected_rows=importer.rejected_rows)
+                job.update(min(int(chunk.fraction * 100), 99), f"已导入 {chunk.end} 行",
+                           details=_import_details(import_id, checkpoint))
+        except BadZipFile:
+            raise CustomAPIException("Excel 文件损坏或格式错误，请重新上传", 400)
+
+    except Exception as e:
+        db.session.rollback()
+        error = getattr(e, "message", None) or str(e)
+        checkpoint.save(status="failed", error=error)
+        job.update(details=_import_details(import_id, checkpoint))
+        logger.error(f"❌ 物料导入失败，可从第 {checkpoint.data.get('rows_committed', 0)} 行续传: {import_id} {error}")
+        raise
+
+    # **全部完成：删除上传文件和检查点**
+    checkpoint.save(status="succeeded")
+    job.update(details=_import_details(import_id, checkpoint))
+    os.remove(file_path)
+    checkpoint.remove()
+    logger.info(f"✅ 物料导入完成: {import_id} {importer.counts}")
+    return None, None
+
+
+def _submit_import_job(import_id, owner):
+    """ 提交导入任务；同一导入正在执行时返回 None """
+    with _active_imports_lock:
+        if import_id in _active_imports:
+            return None
+
+        def runner(job):
+            try:
+                return _run_material_import(job)
+            finally:
+                with _active_imports_lock:
+                    _active_imports.pop(import_id, None)
+
+        job = import_job_backend.submit("material_import", {"import_id": import_id}, runner, owner=owner)
+        _active_imports[import_id] = job.id
+        return job
+
+
+@jwt_required()
+def submit_material_import_job():
+    """ 上传 Excel / CSV 文件，后台流式导入，立即返回任务（进度通过 /api/jobs/<job_id> 查询） """
+    if "file" not in request.files:
+        return ResponseTemplate.error(message="没有文件上传")
+    file = request.files["file"]
+    if file.filename == "":
+        return ResponseTemplate.error(message="文件名不能为空")
+    if not allowed_file(file.filename):
+        return ResponseTemplate.error(message="不支持的文件格式，仅支持 Excel 或 CSV")
+
+    import_id = uuid.uuid4().hex
+    extension = file.filename.rsplit(".", 1)[1].lower()
+    file_path = os.path.join(IMPORT_FOLDER, f"{import_id}.{extension}")
+    os.makedirs(IMPORT_FOLDER, exist_ok=True)
+    file.save(file_path)
+
+    owner = get_jwt_identity()
+    checkpoint = _checkpoint_for(import_id)
+    checkpoint.save(file_path=file_path, file_name=secure_filename(file.filename) or file.filename, owner=owner,
+                    status="queued", rows_committed=0)
+    try:
+        job = _submit_import_job(import_id, owner)
+    except JobQueueFullError as e:
+        checkpoint.remove()
+        os.remove(file_path)
+        return ResponseTemplate.error(message=str(e), status_code=429)
+
+    logger.info(f"✅ 已提交物料导入任务: {import_id} -> {job.id}")
+    return ResponseTemplate.success(data={"import_id": import_id, "job": job.to_dict()}, message="导入任务已提交")
+
+
+def _get_own_checkpoint(import_id):
+    """ 只允许上传者访问自己的导入；不存在或不属于当前用户时返回 None """
+    if not IMPORT_ID_PATTERN.match(import_id):
+        return None
+    checkpoint = _checkpoint_for(import_id)
+    if not checkpoint.exists:
+        return None
+    checkpoint.load()
+    if checkpoint.data.get("owner") != get_jwt_identity():
+        return None
+    return checkpoint
+
+
+@jwt_required()
+def get_material_import(import_id):
+    """ 查询导入进度（读检查点，服务重启、任务过期后仍可查询；已成功完成的导入不再保留） """
+    checkpoint = _get_own_checkpoint(import_id)
+    if checkpoint is None:
+        return ResponseTemplate.error(message="导入不存在或已完成", status_code=404)
+    data = _import_details(import_id, checkpoint)
+    with _active_imports_lock:
+        data["job_id"] = _active_imports.get(import_id)
+    return ResponseTemplate.success(data=data, message="success")
+
+
+@jwt_required()
+def resume_material_import(import_id):
+    """ 失败（或服务重启中断）的导入从最后提交的批次继续 """
+    checkpoint = _get_own_checkpoint(import_id)
+    if checkpoint is None:
+        return ResponseTemplate.error(message="导入不存在或已完成", status_code=404)
+    if not os.path.exists(checkpoint.data["file_path"]):
+        return ResponseTemplate.error(message="上传的文件已不存在，请重新上传", status_code=410)
+
+    try:
+        job = _submit_import_job(import_id, checkpoint.data["owner"])
+    except JobQueueFullError as e:
+        return ResponseTemplate.error(message=str(e), status_code=429)
+    if job is None:
+        return ResponseTemplate.error(message="该导入正在执行", status_code=409)
+
+    logger.info(f"✅ 续传物料导入: {import_id} 从第 {checkpoint.data.get('rows_committed', 0)} 行 -> {job.id}")
+    return ResponseTemplate.success(data={"import_id": import_id, "job": job.to_dict()}, message="导入任务已提交")
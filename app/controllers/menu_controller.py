@@ -1,8 +1,8 @@
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models.result import ResponseTemplate
 from app.models.menu import Menu
-from app.models.user import User
+from app.controllers.permission_controller import current_roles, menus_for_roles, menus_changed, menus_committed
 
 # 获取所有菜单项
 @jwt_required()
@@ -41,7 +41,9 @@ def create_menu(data):
         )
 
         db.session.add(new_menu)
+        menus_changed()
         db.session.commit()
+        menus_committed()
 
         return ResponseTemplate.success(message='Menu created successfully')
     except Exception as e:
@@ -65,7 +67,9 @@ def update_menu(menu_id, data):
         menu.icon = data.get('icon', menu.icon)
         menu.parent_id = data.get('parent_id', menu.parent_id)
 
+        menus_changed()
         db.session.commit()
+        menus_committed()
         return ResponseTemplate.success(message='Menu updated successfully')
     except Exception as e:
         db.session.rollback()
@@ -80,7 +84,9 @@ def delete_menu(menu_id):
             return ResponseTemplate.error(message='Menu not found')
 
         db.session.delete(menu)
+        menus_changed()
         db.session.commit()
+        menus_committed()
         return ResponseTemplate.success(message='Menu deleted successfully')
     except Exception as e:
         db.session.rollback()
@@ -90,27 +96,14 @@ def delete_menu(menu_id):
 @jwt_required()
 def get_user_menu():
     try:
-        user_identity = get_jwt_identity()
-        user = User.query.get(user_identity)  # 这里 user_identity 可能是 JSON，需要取 "user_id"
-
-        if not user:
+        # **角色来自 Access Token，菜单来自按角色组合缓存的 menu_cache**
+        roles = current_roles()
+        if roles is None:
             return ResponseTemplate.error(message="User not found")
 
-        if user.has_role("admin"):
-            # 管理员获取所有菜单
-            menus = Menu.query.order_by(Menu.id.asc()).all()  # 假设有 `order` 字段
-        else:
-            # 普通用户基于角色获取菜单
-            menus = set()
-            for role in user.roles:
-                for menu in role.menus:
-                    menus.add(menu)
-
-            # 按 `order` 字段排序（如果没有 `order`，可以改成 `id`）
-            menus = sorted(menus, key=lambda x: x.id if hasattr(x, 'id') else x.id)
-
+        # 管理员获取所有菜单，普通用户获取各角色菜单的并集，均按 id 排序
         return ResponseTemplate.success(
-            data=[menu.to_dict() for menu in menus],
+            data=menus_for_roles(roles),
             message="User menus retrieved successfully"
         )
 
@@ -0,0 +1,159 @@
+import os
+import hmac
+import time
+import ipaddress
+from functools import wraps
+from flask import Response, g, request
+from app import app, password_hasher
+from app.models.result import ResponseTemplate
+from app.utils.metrics import MetricsRegistry, SIZE_BUCKETS
+
+registry = MetricsRegistry()
+
+# **HTTP 请求**
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（秒）", ["method", "endpoint", "status"])
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "正在处理的 HTTP 请求数")
+
+# **文档生成：document 为 tech_manual / product_spec / bom / pdf**
+document_stage_duration = registry.histogram(
+    "document_stage_duration_seconds", "文档生成各阶段耗时（秒）", ["document", "stage"])
+document_duration = registry.histogram(
+    "document_generation_duration_seconds", "文档生成总耗时（秒）", ["document"])
+documents_in_flight = registry.gauge("document_generations_in_flight", "正在生成的文档数", ["document"])
+document_failures = registry.counter("document_generation_failures_total", "文档生成失败次数", ["document"])
+document_output_bytes = registry.histogram(
+    "document_output_bytes", "生成文件大小（字节）", ["document"], buckets=SIZE_BUCKETS)
+
+
+def stage(document, name):
+    """ 计时区段：with stage("product_spec", "docxtpl_render"): ... """
+    return document_stage_duration.time(document=document, stage=name)
+
+
+class StageTimer:
+    """
+    按顺序执行的生成流水线计时：每次 lap(stage) 记录距上一次 lap 的耗时，
+    不需要把每个阶段包进 with 块。
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        document_stage_duration.observe(now - self._last, document=self.document, stage=name)
+        self._last = now
+
+    def skip(self):
+        """ 重新开始计时，不记录（例如中间的步骤内部已经分阶段计时） """
+        self._last = time.perf_counter()
+
+
+def _is_error_result(result):
+    """ 返回值是非 2xx 的响应：Response 对象，或 (响应, 状态码) 元组 """
+    if isinstance(result, tuple) and len(result) >= 2 and isinstance(result[1], int):
+        status = result[1]
+    else:
+        status = getattr(result, "status_code", None)
+    return isinstance(status, int) and not 200 <= status < 300
+
+
+def document_timed(document):
+    """ 装饰文档生成函数：记录总耗时、并发数和失败次数（抛出异常或返回非 2xx 响应都计为失败） """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with documents_in_flight.track_inprogress(document=document), document_duration.time(document=document):
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception:
+                    document_failures.inc(document=document)
+                    raise
+                if _is_error_result(result):
+                    document_failures.inc(document=document)
+                return result
+        return wrapper
+    return decorator
+
+
+def observe_output(document, path):
+    """ 记录生成文件的大小 """
+    if path and os.path.exists(path):
+        document_output_bytes.observe(os.path.getsize(path), document=document)
+
+
+def _pool_metrics():
+    """ 任务队列、转换池、密码计算池的即时状态 """
+    # 延迟导入：job_controller / office_document_controller 依赖各文档生成控制器
+    from app.controllers.job_controller import job_backend, import_job_backend
+    from app.controllers.office_document_controller import office_pool
+
+    jobs = job_backend.stats()
+    imports = import_job_backend.stats()
+    pool = office_pool.stats()
+    hasher = password_hasher.stats()
+    return [
+        ("job_queue_pending", "排队 + 执行中的生成任务数", {}, jobs.get("pending", 0)),
+        ("job_queue_running", "执行中的生成任务数", {}, jobs.get("running", 0)),
+        ("material_import_queue_pending", "排队 + 执行中的物料导入任务数", {}, imports.get("pending", 0)),
+        ("material_import_queue_running", "执行中的物料导入任务数", {}, imports.get("running", 0)),
+        ("office_pool_idle_workers", "空闲的 LibreOffice 工作者数", {}, pool["idle"]),
+        ("office_pool_waiting", "等待或正在转换的文件数", {}, pool["waiting"]),
+        ("password_hasher_pending", "等待或正在计算的密码请求数", {}, hasher["pending"]),
+        ("password_hasher_rejected", "因排队已满被拒绝的密码请求数（累计）", {}, hasher["rejected"]),
+        ("password_hasher_wait_p95_seconds", "最近密码请求排队时间的 P95（秒）", {}, hasher["wait"]["p95_ms"] / 1000),
+    ]
+
+
+registry.add_collector(_pool_metrics)
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    http_requests_in_flight.inc()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get("metrics_started")
+    if started is not None:
+        # 按路由模板统计（例如 /api/project/project/<int:project_id>），避免标签数量随 ID 增长
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        http_request_duration.observe(time.perf_counter() - started, method=request.method,
+                                      endpoint=endpoint, status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def end_request_metrics(exc):
+    if g.pop("metrics_started", None) is not None:
+        http_requests_in_flight.dec()
+
+
+# **允许访问 /metrics 的地址或网段**
+METRICS_ALLOWED_NETWORKS = [ipaddress.ip_network(item.strip(), strict=False)
+                            for item in app.config['METRICS_ALLOWED_NETWORKS'].split(",") if item.strip()]
+
+
+def _metrics_allowed():
+    """ 请求携带正确的 METRICS_TOKEN，或来源地址在 METRICS_ALLOWED_NETWORKS 中 """
+    token = app.config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
+
+
+def get_metrics():
+    """ Prometheus 文本格式的指标（仅限允许的地址或携带令牌的请求） """
+    if not app.config['METRICS_ENABLED']:
+        return ResponseTemplate.error(message="Not Found", status_code=404)
+    if not _metrics_allowed():
+        return ResponseTemplate.error(message="无权访问监控指标", status_code=403)
+    return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
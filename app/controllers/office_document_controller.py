@@ -0,0 +1,88 @@
+import os
+import atexit
+
+from app import app
+from app.exceptions.exceptions import CustomAPIException
+from app.controllers.word_controller import generate_document as tech_manual_document
+from app.controllers.word_product_spec_controller import generate_document as product_spec_document
+from app.controllers.excel_controller import generate_excel_local
+from app.utils.office_pool import OfficePool, ConversionError, ConverterNotConfiguredError
+from app.controllers.metrics_controller import document_timed, observe_output, stage
+
+OUTPUT_FOLDER = app.config['OUTPUT_FOLDER']
+
+# **LibreOffice 转换池：常驻进程 + 独立用户配置，进程退出时一并结束**
+office_pool = OfficePool.create(
+    mode=app.config['OFFICE_POOL_MODE'],
+    soffice_path=app.config['LIBREOFFICE_PATH'],
+    lib_path=app.config['LIBREOFFICE_LIB_PATH'],
+    size=app.config['OFFICE_POOL_SIZE'],
+    queue_size=app.config['OFFICE_POOL_QUEUE_SIZE'],
+    timeout=app.config['OFFICE_CONVERT_TIMEOUT'],
+    base_port=app.config['OFFICE_POOL_BASE_PORT'],
+    profile_folder=app.config['OFFICE_PROFILE_FOLDER'],
+)
+if app.config['OFFICE_POOL_WARMUP']:
+    office_pool.warm_up()
+atexit.register(office_pool.shutdown)
+
+
+def convert_document(file_path, target_format, output_dir=None):
+    """
+    通过转换池转换文件（例如 docx -> pdf、xls -> xlsx）
+    :return: 生成文件的路径
+    """
+    try:
+        return office_pool.convert(file_path, target_format, output_dir)
+    except ConverterNotConfiguredError as e:
+        raise CustomAPIException(str(e), 503)
+
+
+@document_timed("pdf")
+def convert_to_pdf_with_command(file_path, output_dir=None):
+    """
+    使用 LibreOffice 将文件转换为 PDF（经转换池执行，带超时）
+    :param output_dir: PDF 的输出目录，默认与源文件相同
+    """
+    try:
+        # 阶段名为源文件类型（docx / xlsx），区分 Word 和 Excel 的转换耗时
+        with stage("pdf", "convert_" + os.path.splitext(file_path)[1].lstrip(".").lower()):
+            output_pdf_path = convert_document(file_path, "pdf", output_dir)
+        observe_output("pdf", output_pdf_path)
+        app.logger.info(f"✅ PDF 文件已生成: {output_pdf_path}")
+        return output_pdf_path
+    except ConversionError as e:
+        app.logger.error(f"❌ 文件转换为 PDF 失败: {e}")
+        raise RuntimeError(f"文件转换为 PDF 失败: {e}")
+
+
+def generate_tech_manual_pdf(project_id):
+    """生成技术手册并转换为 PDF，返回 PDF 路径"""
+    output_word_path, output_file_name = tech_manual_document(project_id)
+
+    # **转换为 PDF**
+    output_pdf_path = convert_to_pdf_with_command(output_word_path)
+    if not output_pdf_path:
+        raise CustomAPIException("文件转换失败", 500)
+    return output_pdf_path
+
+
+def generate_product_spec_pdf(project_id):
+    """生成产品规格书并转换为 PDF，返回 PDF 路径"""
+    output_word_path, output_file_name = product_spec_document(project_id)
+
+    # **转换为 PDF**
+    output_pdf_path = convert_to_pdf_with_command(output_word_path)
+    if not output_pdf_path:
+        raise CustomAPIException("文件转换失败", 500)
+    return output_pdf_path
+
+
+def generate_excel_pdf(project_id):
+    """生成 BOM 明细表并转换为 PDF，返回 PDF 路径"""
+    output_excel_path = generate_excel_local(project_id)
+    # **转换为 PDF**
+    output_pdf_path = convert_to_pdf_with_command(output_excel_path)
+    if not output_pdf_path:
+        raise CustomAPIException("文件转换失败", 500)
+    return output_pdf_path
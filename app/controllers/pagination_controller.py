@@ -0,0 +1,68 @@
+import math
+from collections import namedtuple
+from flask import request
+from app import app
+from app.exceptions.exceptions import CustomAPIException
+from app.utils.pagination import CountCache, decode_cursor, keyset_query, keyset_ids
+
+# **列表总数缓存：未过滤和常用过滤条件的 COUNT(*) 在 LIST_COUNT_CACHE_TTL 秒内复用**
+count_cache = CountCache(ttl=app.config['LIST_COUNT_CACHE_TTL'])
+
+# cursor_mode: 请求中带有 cursor 参数（第一页传空串）时使用游标分页，否则沿用 page / pageSize
+PageArgs = namedtuple("PageArgs", ["page", "page_size", "cursor_mode", "after_id"])
+
+
+def get_page_args(default_page_size=10):
+    """
+    读取分页参数：page / pageSize，或 cursor / pageSize。
+    页码模式保持原有行为；游标模式的 pageSize 限制在 [1, MAX_PAGE_SIZE]。
+    """
+    page = request.args.get('page', 1, type=int)
+    page_size = request.args.get('pageSize', default_page_size, type=int)
+    cursor_mode = 'cursor' in request.args
+    if cursor_mode:
+        page_size = min(max(page_size, 1), app.config['MAX_PAGE_SIZE'])
+    try:
+        after_id = decode_cursor(request.args.get('cursor', '').strip())
+    except ValueError as e:
+        raise CustomAPIException(str(e), 400)
+    return PageArgs(page, page_size, cursor_mode, after_id)
+
+
+def _pages(total, page_size):
+    return math.ceil(total / page_size) if total and page_size > 0 else 0
+
+
+def paginate_query(query, id_column, args, count_key):
+    """
+    分页查询
+    - 页码模式：总数来自 count_cache（键为 count_key），当前页仍用 OFFSET 查询；
+    - 游标模式：按 ID 升序 WHERE id > 游标 LIMIT n，返回下一页游标 nextCursor（没有更多数据时为 None）。
+    :return: (当前页的记录, 分页信息 dict)
+    """
+    total = count_cache.get(count_key, query.order_by(None).count)
+    if args.cursor_mode:
+        items, next_cursor = keyset_query(query, id_column, args.after_id, args.page_size)
+        return items, {"totalElements": total, "pages": _pages(total, args.page_size),
+                       "pageSize": args.page_size, "nextCursor": next_cursor}
+
+    pagination = query.paginate(page=args.page, per_page=args.page_size, error_out=False, count=False)
+    return pagination.items, {"totalElements": total, "pages": _pages(total, pagination.per_page),
+                              "page": pagination.page, "pageSize": pagination.per_page}
+
+
+def paginate_ids(model, id_column, ids, args):
+    """
+    在已排序的 ID 列表（搜索索引的结果）上分页，只查询当前页的记录，总数即列表长度
+    :return: (当前页的记录, 分页信息 dict)
+    """
+    total = len(ids)
+    page_info = {"totalElements": total, "pages": _pages(total, args.page_size), "pageSize": args.page_size}
+    if args.cursor_mode:
+        page_ids, page_info["nextCursor"] = keyset_ids(ids, args.after_id, args.page_size)
+    else:
+        page = max(args.page, 1)
+        page_ids = ids[(page - 1) * args.page_size: page * args.page_size] if args.page_size > 0 else []
+        page_info["page"] = page
+    items = model.query.filter(id_column.in_(page_ids)).order_by(id_column).all() if page_ids else []
+    return items, page_info
@@ -0,0 +1,99 @@
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from app import app, db, logger
+from app.models.models import CacheVersion
+from app.models.menu import Menu
+from app.models.role import Role, t_role_menus
+from app.models.user import User
+from app.utils.versioned_cache import VersionedCache
+
+PERMISSIONS = "permissions"  # 用户 ↔ 角色 关系的版本号
+MENUS = "menus"  # 菜单 / 角色 ↔ 菜单 关系的版本号
+
+MENU_FIELDS = ["id", "created_at", "created_by", "updated_at", "updated_by",
+               "component", "icon", "name", "path", "parent_id"]
+
+# **当前权限版本号：每隔 PERMISSION_CACHE_CHECK_INTERVAL 秒查询一次数据库，其余时间直接返回内存中的值**
+permission_version = VersionedCache(
+    PERMISSIONS,
+    lambda: CacheVersion.get_version(PERMISSIONS),
+    version_getter=lambda: CacheVersion.get_version(PERMISSIONS),
+    check_interval=app.config['PERMISSION_CACHE_CHECK_INTERVAL'],
+)
+
+
+def token_claims(user):
+    """
+    写入 Access Token 的附加声明：角色名称列表 + 当时的权限版本号
+    （先读版本号再读角色：读取期间角色发生变化时，令牌中的版本号一定是旧的，校验时会回退到数据库）
+    """
+    version = permission_version.get()
+    return {"roles": [role.name for role in user.roles], "perm_ver": version}
+
+
+def current_roles():
+    """
+    当前请求用户的角色名称列表（调用前已校验 JWT），用户不存在时返回 None
+    - 令牌中的权限版本号与当前一致：直接使用令牌中的角色，不查询数据库；
+    - 旧令牌（没有角色声明）或角色已变更：回退到数据库查询
+    """
+    claims = get_jwt()
+    roles = claims.get("roles")
+    if roles is not None and claims.get("perm_ver") == permission_version.get():
+        return roles
+    user = User.query.get(get_jwt_identity())
+    return [role.name for role in user.roles] if user else None
+
+
+def permissions_changed():
+    """ 修改用户角色、删除用户或角色时调用（在提交之前）：递增权限版本号 """
+    CacheVersion.bump(PERMISSIONS)
+
+
+def permissions_committed():
+    """ 提交后调用：本进程立即使用新的版本号，旧令牌随即回退到数据库校验 """
+    permission_version.invalidate()
+
+
+def _load_menus():
+    """ 整体加载菜单和 角色 → 菜单 关系（两次查询，不触发 Menu 的关系加载） """
+    columns = [getattr(Menu, field) for field in MENU_FIELDS]
+    menus = [dict(zip(MENU_FIELDS, row)) for row in db.session.query(*columns).order_by(Menu.id.asc())]
+    role_menus = {}
+    for role_name, menu_id in db.session.query(Role.name, t_role_menus.c.menu_id).join(
+            t_role_menus, Role.id == t_role_menus.c.role_id):
+        role_menus.setdefault(role_name, set()).add(menu_id)
+    logger.info(f"✅ 菜单缓存已加载: {len(menus)} 个菜单, {len(role_menus)} 个角色")
+    return {"menus": menus, "role_menus": role_menus, "by_roles": {}}
+
+
+# **按角色组合缓存的菜单列表：菜单或角色菜单修改时失效**
+menu_cache = VersionedCache(
+    MENUS,
+    _load_menus,
+    version_getter=lambda: CacheVersion.get_version(MENUS),
+    check_interval=app.config['PERMISSION_CACHE_CHECK_INTERVAL'],
+)
+
+
+def menus_for_roles(roles):
+    """ 角色组合对应的菜单（按 ID 排序）；admin 获取全部菜单。同一角色组合只计算一次 """
+    data = menu_cache.get()
+    key = frozenset(roles)
+    menus = data["by_roles"].get(key)
+    if menus is None:
+        if "admin" in key:
+            menus = data["menus"]
+        else:
+            menu_ids = set().union(*(data["role_menus"].get(role, ()) for role in key))
+            menus = [menu for menu in data["menus"] if menu["id"] in menu_ids]
+        data["by_roles"][key] = menus
+    return menus
+
+
+def menus_changed():
+    """ 修改菜单或角色菜单时调用（在提交之前）：递增菜单版本号 """
+    CacheVersion.bump(MENUS)
+
+
+def menus_committed():
+    menu_cache.invalidate()
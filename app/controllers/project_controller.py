@@ -5,14 +5,18 @@ from flask_jwt_extended import jwt_required
 from app.exceptions.exceptions import CustomAPIException
 from app.models.result import ResponseTemplate
 from app.models.models import Project, ProjectMaterial
+from app.controllers.search_index_controller import project_search
+from app.controllers.pagination_controller import get_page_args, paginate_query, paginate_ids, count_cache
 
 
 @jwt_required()
 def get_project_list():
     """分页查询和组合搜索项目列表"""
-    # 获取分页参数
-    page = request.args.get('page', 1, type=int)  # 当前页码，默认为第 1 页
-    per_page = request.args.get('pageSize', 10, type=int)  # 每页显示的记录数，默认为 10 条
+    # 获取分页参数：page / pageSize（默认第 1 页、每页 10 条），或游标分页 cursor / pageSize
+    try:
+        page_args = get_page_args()
+    except CustomAPIException as e:
+        return ResponseTemplate.error(message=e.message, status_code=e.status_code)
 
     # 获取搜索参数
     project_model = request.args.get('project_model', '').strip()
@@ -24,30 +28,17 @@ def get_project_list():
     file_number = request.args.get('file_number', '').strip()
     product_number = request.args.get('product_number', '').strip()
 
-    # 构建查询
-    query = Project.query
-
-    # 动态添加过滤条件
-    if project_model:
-        query = query.filter(Project.project_model.ilike(f"%{project_model}%"))
-    if project_level:
-        query = query.filter(Project.project_level == project_level)
-    if project_name:
-        query = query.filter(Project.project_name.ilike(f"%{project_name}%"))
-    if project_type:
-        query = query.filter(Project.project_type.ilike(f"%{project_type}%"))
-    if working_temperature:
-        query = query.filter(Project.working_temperature.ilike(f"%{working_temperature}%"))
-    if storage_temperature:
-        query = query.filter(Project.storage_temperature.ilike(f"%{storage_temperature}%"))
-    if file_number:
-        query = query.filter(Project.file_number.ilike(f"%{file_number}%"))
-    if product_number:
-        query = query.filter(Project.product_number.ilike(f"%{product_number}%"))
-
-    # 查询数据库并分页
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    projects = pagination.items  # 当前页的项目列表
+    # **有搜索条件时走 n-gram 索引（等级为完全匹配），只查询当前页的记录；否则直接分页，总数来自缓存**
+    terms = {field: value for field, value in (
+        ("project_model", project_model), ("project_name", project_name), ("project_type", project_type),
+        ("working_temperature", working_temperature), ("storage_temperature", storage_temperature),
+        ("file_number", file_number), ("product_number", product_number)) if value}
+    exact = {"project_level": project_level} if project_level else {}
+    if terms or exact:
+        project_ids = project_search.search(terms, exact)
+        projects, page_info = paginate_ids(Project, Project.id, project_ids, page_args)
+    else:
+        projects, page_info = paginate_query(Project.query, Project.id, page_args, ("project",))
 
     # 转换为字典格式
     project_list = [project.to_dict() for project in projects]
@@ -56,10 +47,7 @@ def get_project_list():
     return ResponseTemplate.success(
         data={
             'projects': project_list,
-            'totalElements': pagination.total,  # 总记录数
-            'pages': pagination.pages,  # 总页数
-            'page': pagination.page,  # 当前页码
-            'pageSize': pagination.per_page,  # 每页显示的记录数
+            **page_info,  # totalElements / pages / pageSize，以及 page（页码模式）或 nextCursor（游标模式）
         },
         message='success'
     )
@@ -89,7 +77,10 @@ def create_project(data):
         product_number=data['product_number']
     )
     db.session.add(new_project)
+    project_search.changed()
     db.session.commit()
+    project_search.indexed(new_project)
+    count_cache.invalidate("project")
 
     return ResponseTemplate.success(
         message='Project created successfully',
@@ -112,14 +103,16 @@ def update_project(project_id, data):
         project_level = project_level[0]  # 取第一个元素，确保是字符串
     project.project_level = str(project_level)  # 直接赋值字符串
 
-    print('project_level:', project_level)  # Debug 确保是 "T" 而不是 ('T',)
+    logger.debug(f"project_level: {project_level}")  # Debug 确保是 "T" 而不是 ('T',)
 
     project.working_temperature = data.get('working_temperature')
     project.storage_temperature = data.get('storage_temperature')
     project.file_number = data['file_number']
     project.product_number = data['product_number']
 
+    project_search.changed()
     db.session.commit()
+    project_search.indexed(project)
     return ResponseTemplate.success(message='Project updated successfully')
 
 @jwt_required()
@@ -134,6 +127,9 @@ def delete_project(project_id):
 
 
     db.session.delete(project)
+    project_search.changed()
     db.session.commit()
+    project_search.removed(project_id)
+    count_cache.invalidate("project")
     return ResponseTemplate.success(message='Project deleted successfully')
 
@@ -1,3 +1,4 @@
+from sqlalchemy.orm import selectinload
 from app import db, jwt_required, logger
 from app.models.result import ResponseTemplate
 from app.models.models import  ProjectFeature
@@ -6,7 +7,11 @@ from app.models.models import  ProjectFeature
 
 @jwt_required()
 def get_project_features(project_id):
-    features = ProjectFeature.query.filter_by(project_id=project_id).order_by(ProjectFeature.sort_order).all()
+    features = (ProjectFeature.query
+                .options(selectinload(ProjectFeature.feature))  # 技术特点一次查询加载
+                .filter_by(project_id=project_id)
+                .order_by(ProjectFeature.sort_order)
+                .all())
     result = [{"feature_id": f.feature.id, "label": f.feature.label, "sort_order": f.sort_order} for f in features]
     return ResponseTemplate.success(data=result,message="获取成功！")
 
@@ -38,6 +43,7 @@ def get_features(project_id):
     :return: JSON 响应，包含一个 'data' 字段，内部含 'features' 列表，可直接传给模板
     """
     features = (ProjectFeature.query
+                .options(selectinload(ProjectFeature.feature))
                 .filter_by(project_id=project_id)
                 .order_by(ProjectFeature.sort_order)
                 .all())
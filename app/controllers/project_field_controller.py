@@ -4,6 +4,7 @@ from app.models.result import ResponseTemplate
 from app.models.models import ProjectFieldValue
 import json
 from app.controllers.field_definition_controller import get_field_name_by_code
+from app.utils.bulk_upsert import bulk_upsert, existing_keys
 
 
 @jwt_required()
@@ -31,6 +32,22 @@ def get_project_fields_by_project_id(project_id):
     return ResponseTemplate.success(data=project_field_list, message='success')
 
 
+UPDATABLE_FIELDS = [
+    "is_checked", "min_value", "typical_value", "max_value", "unit",
+    "custom_value", "image_path", "description", "parent_id", "code",
+    "product_code", "quantity", "remarks"
+]
+
+
+def _normalize_custom_value(data):
+    """ custom_value 为 list / dict 时转换为 JSON 字符串，空值存为 NULL """
+    if "custom_value" in data:
+        if isinstance(data["custom_value"], (list, dict)):
+            data["custom_value"] = json.dumps(data["custom_value"])  # 转换为 JSON 字符串
+        elif data["custom_value"] in [None, ""]:
+            data["custom_value"] = None  # 避免空值存入数据库
+
+
 @jwt_required()
 def create_or_update_project_field(data):
     """ 🔥 增量更新项目字段，确保 (`project_id`, `field_id`) 唯一 🔥 """
@@ -42,24 +59,14 @@ def create_or_update_project_field(data):
         return ResponseTemplate.error(message="Missing `project_id` or `field_id`", status=400)
 
     # ✅ 处理 custom_value，确保其为 JSON 字符串
-    if "custom_value" in data:
-        if isinstance(data["custom_value"], (list, dict)):
-            data["custom_value"] = json.dumps(data["custom_value"])  # 转换为 JSON 字符串
-        elif data["custom_value"] in [None, ""]:
-            data["custom_value"] = None  # 避免空值存入数据库
+    _normalize_custom_value(data)
 
     # ✅ 检查是否已有记录
     existing_project_field = ProjectFieldValue.query.filter_by(project_id=project_id, field_id=field_id).first()
 
-    updatable_fields = [
-        "is_checked", "min_value", "typical_value", "max_value", "unit",
-        "custom_value", "image_path", "description", "parent_id", "code",
-        "product_code", "quantity", "remarks"
-    ]
-
     if existing_project_field:
         # ✅ **已存在，则增量更新**
-        for field in updatable_fields:
+        for field in UPDATABLE_FIELDS:
             if field in data and data[field] is not None:  # 只更新传入且非 None 的字段
                 setattr(existing_project_field, field, data[field])
 
@@ -71,7 +78,7 @@ def create_or_update_project_field(data):
         new_project_field = ProjectFieldValue(
             project_id=project_id,
             field_id=field_id,
-            **{field: data[field] for field in updatable_fields if field in data and data[field] is not None}
+            **{field: data[field] for field in UPDATABLE_FIELDS if field in data and data[field] is not None}
         )
         db.session.add(new_project_field)
         db.session.commit()
@@ -102,12 +109,74 @@ def delete_project_field_by_id(field_value_id):
     return ResponseTemplate.success(message='ProjectFieldValue deleted successfully')
 
 
+def _parse_batch_row(data):
+    """
+    校验并规范化批量保存中的一行
+    :return: (行字典, 错误信息)
+    """
+    if not isinstance(data, dict):
+        return None, "Invalid field data"
+    try:
+        project_id = int(data.get('project_id') or 0)
+        field_id = int(data.get('field_id') or 0)
+    except (TypeError, ValueError):
+        return None, "Invalid `project_id` or `field_id`"
+    if not project_id or not field_id:
+        return None, "Missing `project_id` or `field_id`"
+
+    data = dict(data)
+    _normalize_custom_value(data)
+    row = {"project_id": project_id, "field_id": field_id}
+    # 未传入或为 None 的字段写入 NULL，更新时保持原值（与逐条保存时“只更新非 None 字段”一致）
+    row.update({field: data.get(field) for field in UPDATABLE_FIELDS})
+    return row, None
+
+
 @jwt_required()
 def batch_create_or_update_project_fields(data_list):
-    """ 🔥 批量 `UPSERT` ProjectField 记录 """
-    for data in data_list:
-        create_or_update_project_field(data)  # 直接复用 `create_or_update_project_field()`
-    return ResponseTemplate.success(message="Batch ProjectField update successful")
+    """
+    🔥 批量 `UPSERT` ProjectField 记录：
+    整体校验、规范化后在一个事务里多行 UPSERT（MySQL 为 INSERT ... ON DUPLICATE KEY UPDATE），
+    返回每一行的处理结果（created / updated / merged / error）：
+    同一 (project_id, field_id) 出现多次时合并为一行写入，结果记在第一次出现的行上，
+    其余的行为 merged，merged_into 指向该行的 index；created / updated 只统计实际写入的行。
+    """
+    results = []
+    rows = {}  # (project_id, field_id) -> 行，同一字段出现多次时后面的非 None 值覆盖前面的
+    first_index = {}  # (project_id, field_id) -> 第一次出现的 index
+    for index, data in enumerate(data_list or []):
+        row, error = _parse_batch_row(data)
+        if error:
+            results.append({"index": index, "status": "error", "message": error})
+            continue
+        key = (row["project_id"], row["field_id"])
+        result = {"index": index, "project_id": key[0], "field_id": key[1]}
+        if key in rows:
+            rows[key].update({field: value for field, value in row.items() if value is not None})
+            result.update(status="merged", merged_into=first_index[key])
+        else:
+            rows[key] = row
+            first_index[key] = index
+        results.append(result)
+
+    table = ProjectFieldValue.__table__
+    try:
+        known_keys = existing_keys(db.session, table, ["project_id", "field_id"], list(rows.values()))
+        bulk_upsert(db.session, table, list(rows.values()), ["project_id", "field_id"], UPDATABLE_FIELDS,
+                    known_keys=known_keys)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"❌ 批量保存项目字段失败: {e}")
+        raise CustomAPIException(f"Database error: {str(e)}", 500)
+
+    for result in results:
+        if "status" not in result:
+            result["status"] = "updated" if (result["project_id"], result["field_id"]) in known_keys else "created"
+    summary = {status: sum(1 for result in results if result["status"] == status)
+               for status in ("created", "updated", "merged", "error")}
+    return ResponseTemplate.success(data={"results": results, **summary},
+                                    message="Batch ProjectField update successful")
 
 @jwt_required()
 def get_project_fields_by_project_id_parent_id(project_id, parent_id):
@@ -1,3 +1,4 @@
+from sqlalchemy.orm import selectinload
 from app import db, jwt_required, logger
 from app.exceptions.exceptions import CustomAPIException
 from app.models.result import ResponseTemplate
@@ -10,7 +11,11 @@ from app.models.models import ProjectImportantNote
 @jwt_required()
 def get_project_important_notes(project_id):
     """ 获取项目关联的技术特点（按排序） """
-    notes = ProjectImportantNote.query.filter_by(project_id=project_id).order_by(ProjectImportantNote.sort_order).all()
+    notes = (ProjectImportantNote.query
+             .options(selectinload(ProjectImportantNote.note))  # 注意事项一次查询加载
+             .filter_by(project_id=project_id)
+             .order_by(ProjectImportantNote.sort_order)
+             .all())
     result = [{"note_id": n.note.id, "label": n.note.label, "sort_order": n.sort_order} for n in notes]
     return ResponseTemplate.success(data=result, message="获取成功！")
 
@@ -43,7 +48,11 @@ def save_project_important_notes(project_id, data):
 
 def get_important_notes(project_id):
     """ 获取项目关联的技术特点（按排序） """
-    notes = ProjectImportantNote.query.filter_by(project_id=project_id).order_by(ProjectImportantNote.sort_order).all()
+    notes = (ProjectImportantNote.query
+             .options(selectinload(ProjectImportantNote.note))
+             .filter_by(project_id=project_id)
+             .order_by(ProjectImportantNote.sort_order)
+             .all())
     # 构造数据列表，每个条目包含模板可直接使用的字段
     note_list = []
     for n in notes:
@@ -0,0 +1,168 @@
+import os
+from collections import namedtuple
+from app import app, db
+from app.exceptions.exceptions import CustomAPIException
+from app.models.models import (Project, ProjectFieldValue, ProjectFeature, TechnicalFeature,
+                               ProjectImportantNote, ImportantNote, ProjectMaterial, MaterialInfo)
+from app.models.inspection import ProjectInspection, InspectionItem
+from app.controllers.field_definition_controller import field_definition_cache, get_field_definition_rows
+from app.utils.document_cache import hash_payload, file_fingerprint
+
+# **项目列（不含创建/更新时间，生成文档用不到，也不应影响内容摘要）**
+PROJECT_COLUMNS = [column.name for column in Project.__table__.columns
+                   if column.name not in ("created_at", "updated_at")]
+FIELD_VALUE_COLUMNS = [column.name for column in ProjectFieldValue.__table__.columns]
+INSPECTION_COLUMNS = ["project_id", "key", "name", "pcb", "beforeSeal", "afterLabel", "samplePlan"]
+MATERIAL_COLUMNS = ["project_material_id", "material_id", "material_code", "material_name",
+                    "model_specification", "unit"]
+
+ProjectRow = namedtuple("ProjectRow", PROJECT_COLUMNS)
+
+# **文档中引用的图片字段 -> 图片所在目录**
+IMAGE_FIELD_FOLDERS = {
+    "dimensions": "IMAGES_FOLDER",
+    "marking_image": "IMAGES_FOLDER",
+    "circuit_diagram": "EMF_FOLDER",
+}
+
+
+class ProjectSnapshot:
+    """
+    生成文档所需的全部项目数据（只读）：项目、字段值、技术特点、注意事项、检验项目、材料、引用图片的指纹。
+    数据以元组保存，各访问方法按原有接口的格式返回新的 dict / list，调用方可以随意修改返回值。
+    字段定义来自进程内缓存，不在这里查询。
+    """
+
+    __slots__ = ("project", "field_values", "features", "important_notes", "inspections", "materials",
+                 "images", "_content_hash")
+
+    def __init__(self, project, field_values, features, important_notes, inspections, materials, images):
+        self.project = project
+        self.field_values = field_values
+        self.features = features
+        self.important_notes = important_notes
+        self.inspections = inspections
+        self.materials = materials
+        self.images = images
+        self._content_hash = None
+
+    @property
+    def project_id(self):
+        return self.project.id
+
+    @property
+    def content_hash(self):
+        """
+        内容摘要：快照数据 + 字段定义 + 引用图片的指纹，数据不变时摘要不变
+        """
+        if self._content_hash is None:
+            self._content_hash = hash_payload({
+                "project": list(self.project),
+                "field_values": self.field_values,
+                "field_definitions": get_field_definition_rows(),
+                "features": self.features,
+                "important_notes": self.important_notes,
+                "inspections": self.inspections,
+                "materials": self.materials,
+                "images": self.images,
+            })
+        return self._content_hash
+
+    def field_list(self):
+        """ 与 project_field_controller.get_list_by_project_id 的结果相同 """
+        return [dict(zip(FIELD_VALUE_COLUMNS, row)) for row in self.field_values]
+
+    def fields_by_parent_id(self, parent_id):
+        """
+        与 project_field_controller.get_fields_by_project_id_parent_id 的结果相同：
+        [[字段名称, product_code, quantity, remarks]]，字段名称来自字段定义缓存
+        """
+        by_code = field_definition_cache.get()["by_code"]
+        names = FIELD_VALUE_COLUMNS
+        parent_index, code_index = names.index("parent_id"), names.index("code")
+        product_code_index, quantity_index, remarks_index = (names.index("product_code"), names.index("quantity"),
+                                                             names.index("remarks"))
+        rows = []
+        for row in self.field_values:
+            if row[parent_index] != parent_id:
+                continue
+            field_definition = by_code.get(row[code_index])
+            if not field_definition:
+                raise CustomAPIException("FieldDefinition with this code not found", 404)
+            rows.append([
+                field_definition["field_name"] or "",
+                row[product_code_index] or "",
+                row[quantity_index] or "",
+                row[remarks_index] or "",
+            ])
+        return rows
+
+    def feature_context(self):
+        """ 与 project_feature_controller.get_features 的结果相同 """
+        return {"features": [{"feature_id": feature_id, "label": label, "sort_order": sort_order}
+                             for feature_id, label, sort_order in self.features]}
+
+    def important_note_context(self):
+        """ 与 project_important_notes_controller.get_important_notes 的结果相同 """
+        return {"important_notes": [{"note_id": note_id, "label": label, "sort_order": sort_order}
+                                    for note_id, label, sort_order in self.important_notes]}
+
+    def inspection_list(self):
+        """ 与 inspection_controller.get_inspections_by_project_id 的结果相同 """
+        return [dict(zip(INSPECTION_COLUMNS, row)) for row in self.inspections]
+
+    def material_list(self):
+        """ 与 project_material_controller.get_project_materials_info 的结果相同 """
+        return [dict(zip(MATERIAL_COLUMNS, row)) for row in self.materials]
+
+
+def _rows(query):
+    return tuple(tuple(row) for row in query)
+
+
+def load_project_snapshot(project_id):
+    """
+    读取项目快照：每类数据一条 Core 列查询（固定 6 条），不构造 ORM 对象，查询次数与字段数量无关。
+
+    :return: ProjectSnapshot；项目不存在时返回 None
+    """
+    project = (db.session.query(*[getattr(Project, name) for name in PROJECT_COLUMNS])
+               .filter(Project.id == project_id).first())
+    if project is None:
+        return None
+
+    field_values = _rows(db.session.query(*[getattr(ProjectFieldValue, name) for name in FIELD_VALUE_COLUMNS])
+                         .filter(ProjectFieldValue.project_id == project_id)
+                         .order_by(ProjectFieldValue.id))
+    features = _rows(db.session.query(TechnicalFeature.id, TechnicalFeature.label, ProjectFeature.sort_order)
+                     .join(TechnicalFeature, ProjectFeature.feature_id == TechnicalFeature.id)
+                     .filter(ProjectFeature.project_id == project_id)
+                     .order_by(ProjectFeature.sort_order, ProjectFeature.id))
+    important_notes = _rows(db.session.query(ImportantNote.id, ImportantNote.label, ProjectImportantNote.sort_order)
+                            .join(ImportantNote, ProjectImportantNote.note_id == ImportantNote.id)
+                            .filter(ProjectImportantNote.project_id == project_id)
+                            .order_by(ProjectImportantNote.sort_order, ProjectImportantNote.id))
+    inspections = _rows(db.session.query(ProjectInspection.project_id, ProjectInspection.item_key, InspectionItem.name,
+                                         ProjectInspection.pcb, ProjectInspection.before_seal,
+                                         ProjectInspection.after_label, ProjectInspection.sample_plan)
+                        .outerjoin(InspectionItem, ProjectInspection.item_key == InspectionItem.key)
+                        .filter(ProjectInspection.project_id == project_id)
+                        .order_by(ProjectInspection.id))
+    materials = _rows(db.session.query(ProjectMaterial.id, MaterialInfo.id, MaterialInfo.material_code,
+                                       MaterialInfo.material_name, MaterialInfo.model_specification,
+                                       MaterialInfo.unit)
+                      .join(MaterialInfo, ProjectMaterial.material_id == MaterialInfo.id)
+                      .filter(ProjectMaterial.project_id == project_id)
+                      .order_by(ProjectMaterial.id))
+
+    # **引用的图片按 文件名 + 修改时间 + 大小 计入快照，图片被覆盖后摘要随之变化**
+    code_index, value_index = FIELD_VALUE_COLUMNS.index("code"), FIELD_VALUE_COLUMNS.index("custom_value")
+    images = {}
+    for row in field_values:
+        folder_key = IMAGE_FIELD_FOLDERS.get(row[code_index])
+        if folder_key and row[value_index]:
+            image_path = os.path.join(app.config[folder_key], os.path.basename(row[value_index]))
+            images[row[code_index]] = file_fingerprint(image_path)
+
+    return ProjectSnapshot(ProjectRow(*project), field_values, features, important_notes, inspections, materials,
+                           tuple(sorted(images.items())))
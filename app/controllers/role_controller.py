@@ -4,6 +4,8 @@ from app.exceptions.exceptions import CustomAPIException
 from app.models.result import ResponseTemplate
 from app.models.role import Role
 from app.models.menu import Menu
+from app.controllers.permission_controller import (permissions_changed, permissions_committed,
+                                                   menus_changed, menus_committed)
 
 # 获取所有角色列表
 @jwt_required()
@@ -51,7 +53,11 @@ def delete_role(role_id):
             raise CustomAPIException("Material not found in the project", 404)
 
         db.session.delete(role)
+        permissions_changed()
+        menus_changed()
         db.session.commit()
+        permissions_committed()
+        menus_committed()
         return ResponseTemplate.success(message='Role deleted successfully')
     except Exception as e:
         db.session.rollback()
@@ -73,7 +79,9 @@ def assign_menu_to_role(data):
             raise CustomAPIException("Material not found in the project", 404)
 
         role.menus = menus  # 直接替换菜单
+        menus_changed()
         db.session.commit()
+        menus_committed()
         return ResponseTemplate.success(message="Menus assigned successfully")
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,63 @@
+from app import app, db, logger
+from app.models.models import Project, MaterialInfo, CacheVersion
+from app.utils.ngram_index import NgramIndex
+from app.utils.versioned_cache import VersionedCache
+
+
+class SearchIndex:
+    """
+    某张表的列表搜索索引（进程内 NgramIndex，首次搜索时加载）：
+    - 本进程写入：提交前调用 changed() 递增共享版本号，提交后调用 indexed() / removed() 就地更新索引；
+    - 批量写入（导入）：提交前 changed()，提交后 invalidate()，下次搜索时重新加载；
+    - 其他进程的写入通过 t_cache_versions 中的版本号发现，发现后重新加载。
+    """
+
+    def __init__(self, name, model, fields):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.cache = VersionedCache(
+            name,
+            self._load,
+            version_getter=lambda: CacheVersion.get_version(name),
+            check_interval=app.config['SEARCH_INDEX_CHECK_INTERVAL'],
+        )
+
+    def _load(self):
+        columns = [getattr(self.model, field) for field in self.fields]
+        index = NgramIndex(self.fields)
+        for row in db.session.query(self.model.id, *columns).order_by(self.model.id).yield_per(5000):
+            index.add(row[0], dict(zip(self.fields, row[1:])))
+        logger.info(f"✅ 搜索索引已加载: {self.name} {len(index)} 条")
+        return index
+
+    def search(self, terms, exact=None):
+        """ 满足全部条件的 ID（升序）；terms 为 {字段: 子串}，exact 为 {字段: 值} """
+        return self.cache.get().search(terms, exact)
+
+    def changed(self):
+        """ 写入时调用（在提交之前）：递增共享版本号 """
+        CacheVersion.bump(self.name)
+
+    def indexed(self, *objects):
+        """ 提交后把新增/修改的记录写入索引 """
+        values = [(obj.id, {field: getattr(obj, field) for field in self.fields}) for obj in objects]
+        self.cache.apply(lambda index: [index.add(doc_id, doc) for doc_id, doc in values],
+                         CacheVersion.get_version(self.name))
+
+    def removed(self, *ids):
+        """ 提交后从索引中删除记录 """
+        self.cache.apply(lambda index: [index.remove(doc_id) for doc_id in ids], CacheVersion.get_version(self.name))
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+
+# **物料列表：代码 / 名称 / 规格 子串搜索**
+material_search = SearchIndex("material_search", MaterialInfo,
+                              ["material_code", "material_name", "model_specification"])
+
+# **项目列表：型号 / 名称 / 类型 / 温度 / 文件编号 / 产品编号 子串搜索，等级完全匹配**
+project_search = SearchIndex("project_search", Project,
+                             ["project_model", "project_name", "project_type", "project_level",
+                              "working_temperature", "storage_temperature", "file_number", "product_number"])
@@ -6,6 +6,8 @@ from app.models.result import ResponseTemplate
 from app.models.role import Role
 from app.models.user import User
 from app.middleware.authorization import role_required
+from app.controllers.permission_controller import permissions_changed, permissions_committed
+from app.controllers.pagination_controller import get_page_args, paginate_query, count_cache
 
 
 
@@ -14,9 +16,11 @@ from app.middleware.authorization import role_required
 @role_required("admin")
 def get_users():
     """分页查询和组合搜索项目列表"""
-    # 获取分页参数
-    page = request.args.get('page', 1, type=int)  # 当前页码，默认为第 1 页
-    per_page = request.args.get('pageSize', 10, type=int)  # 每页显示的记录数，默认为 10 条
+    # 获取分页参数：page / pageSize（默认第 1 页、每页 10 条），或游标分页 cursor / pageSize
+    try:
+        page_args = get_page_args()
+    except CustomAPIException as e:
+        return ResponseTemplate.error(message=e.message, status_code=e.status_code)
 
     # 获取搜索参数
     username = request.args.get('username', '').strip()
@@ -33,9 +37,8 @@ def get_users():
     if username:
         query = query.filter(User.username.ilike(f"%{username}%"))
 
-    # 查询数据库并分页
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    projects = pagination.items  # 当前页的项目列表
+    # 查询数据库并分页（同一过滤条件的总数短期缓存）
+    projects, page_info = paginate_query(query, User.user_id, page_args, ("user", username, user_fullname, status))
 
     # 转换为字典格式
     user_list = [project.to_dict() for project in projects]
@@ -44,10 +47,7 @@ def get_users():
     return ResponseTemplate.success(
         data={
             'users': user_list,
-            'totalElements': pagination.total,  # 总记录数
-            'pages': pagination.pages,  # 总页数
-            'page': pagination.page,  # 当前页码
-            'pageSize': pagination.per_page,  # 每页显示的记录数
+            **page_info,  # totalElements / pages / pageSize，以及 page（页码模式）或 nextCursor（游标模式）
         },
         message='success'
     )
@@ -94,6 +94,7 @@ def create_user(data):
 
         db.session.add(new_user)
         db.session.commit()
+        count_cache.invalidate("user")
         return ResponseTemplate.success(message="User created successfully")
 
     except Exception as e:
@@ -122,8 +123,12 @@ def update_user(user_id, data):
         if 'roles' in data:
             roles = Role.query.filter(Role.name.in_(data['roles'])).all()
             user.roles = roles
+            permissions_changed()
 
         db.session.commit()
+        if 'roles' in data:
+            permissions_committed()
+        count_cache.invalidate("user")
         return ResponseTemplate.success(message="User updated successfully")
 
     except Exception as e:
@@ -141,7 +146,10 @@ def delete_user(user_id):
             raise CustomAPIException("Material not found in the project", 404)
 
         db.session.delete(user)
+        permissions_changed()
         db.session.commit()
+        permissions_committed()
+        count_cache.invalidate("user")
         return ResponseTemplate.success(message="User deleted successfully")
 
     except Exception as e:
@@ -179,6 +187,7 @@ def disable_user(user_id):
 
         user.status = "disabled"
         db.session.commit()
+        count_cache.invalidate("user")
         return ResponseTemplate.success(message="User disabled successfully")
 
     except Exception as e:
@@ -197,6 +206,7 @@ def enable_user(user_id):
 
         user.status = "active"
         db.session.commit()
+        count_cache.invalidate("user")
         return ResponseTemplate.success(message="User enabled successfully")
 
     except Exception as e:
@@ -228,7 +238,9 @@ def update_user_roles(user_id):
 
         # 更新用户角色
         user.roles = roles
+        permissions_changed()
         db.session.commit()
+        permissions_committed()
 
         return ResponseTemplate.success(
             data=user.to_dict(),
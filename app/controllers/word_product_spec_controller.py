@@ -1,31 +1,30 @@
 import json
 from datetime import datetime
-from flask import jsonify, send_file, request
+from flask import jsonify
 from flask_jwt_extended import jwt_required
-from urllib.parse import quote
 from app import app, logger
-from app.controllers.inspection_controller import  get_inspections_by_project_id
+from app.utils.logging_setup import dump_payload
 from app.utils.docx_processor import DocxProcessor
-from app.utils.remove_image import process_section_by_marker
 from app.utils.spec_word_table_processor import SpecWordTableProcessor
-from app.utils.table_operation import add_row_with_auto_serial
-from app.controllers.project_field_controller import get_list_by_project_id, get_fields_by_project_id_parent_id
-from app.controllers.project_feature_controller import get_features
-from app.controllers.project_important_notes_controller import get_important_notes
+from app.utils.table_operation import add_rows_with_auto_serial
+from app.utils.template_compiler import TemplateCompiler
+from app.utils.toc_builder import TocBuilder
+from app.controllers.project_snapshot_controller import load_project_snapshot
+from app.controllers.metrics_controller import StageTimer, document_timed, observe_output, stage
 from app.controllers.field_definition_controller import get_fields_by_code, get_fields_h2_by_code
+from app.controllers.document_cache_controller import (get_document_digest, get_or_generate, is_not_modified,
+                                                        not_modified_response, send_cached_file)
 from app.exceptions.exceptions import CustomAPIException
-from app.models.models import Project
 import os
-import zipfile
-import shutil
-from lxml import etree
 from docx import Document
-
-from app.utils.word_table_processor import WordTableProcessor
 from app.utils.word_toc_tool import WordTocTool
 
 # **模板文件路径**
 PRODUCT_SPECIFICATION_TEMPLATE_PATH = os.path.join(app.config['TEMPLATE_FOLDER'], "product_specification.docx")
+# **注意事项标志段落**
+DELETE_MARKER_TEXT = "### DELETE HERE ###"
+# **指标中的文档类型**
+DOCUMENT = "product_spec"
 
 
 @jwt_required()
@@ -34,28 +33,45 @@ def generate_product_spec(project_id):
     整合文档生成和响应处理逻辑
     """
     try:
-        # 生成文档
-        output_path, output_file_name = generate_document(project_id)
+        # **项目快照：生成所需的数据一次读齐，摘要和生成共用**
+        with stage(DOCUMENT, "database"):
+            snapshot = load_project_snapshot(project_id)
+        if snapshot is None:
+            return jsonify({"error": "项目不存在"}), 404
+
+        # **数据快照摘要：项目数据、图片和模板都没有变化时，直接返回上次生成的文件**
+        digest = get_document_digest(project_id, "product_spec", PRODUCT_SPECIFICATION_TEMPLATE_PATH, snapshot)
+        if is_not_modified(digest):
+            return not_modified_response(digest)
+
+        # 生成文档（缓存未命中时）
+        output_path = get_or_generate("product_spec", digest, ".docx", lambda: generate_document(project_id, snapshot)[0])
 
         # 返回文件响应
-        return send_document_response(output_path, output_file_name)
+        return send_document_response(output_path, get_output_file_name(snapshot.project), digest)
 
     except CustomAPIException as e:
         logger.error(f"生成技术说明书失败: {e}")
         raise e
 
 
-@jwt_required()
-def generate_document(project_id):
+@document_timed(DOCUMENT)
+def generate_document(project_id, snapshot=None):
     """
     生成产品规范 Word 文档
+    :param snapshot: 已读取的 ProjectSnapshot；为 None 时按 project_id 读取
     """
     try:
-        project = Project.query.get(project_id)
-        if not project:
+        # **各阶段耗时记入 document_stage_duration_seconds（/metrics）**
+        timer = StageTimer(DOCUMENT)
+        if snapshot is None:
+            snapshot = load_project_snapshot(project_id)
+            timer.lap("database")
+        if snapshot is None:
             return jsonify({"error": "项目不存在"}), 404
+        project = snapshot.project
 
-        project_field_list = get_list_by_project_id(project_id)
+        project_field_list = snapshot.field_list()
 
         valid_field_ids = [3, 4, 5, 6, 7, 8]
 
@@ -70,30 +86,20 @@ def generate_document(project_id):
             item for item in project_field_list
             if item.get("parent_id") in valid_parent_ids
         ]
-        print("过滤完", filtered_part_1)
+        dump_payload(logger, "过滤完", filtered_part_1)
         # 2. 过滤出 parent_id 不在 [3,4,5,6,7,8] 的列表
         filtered_part_2 = [
             item for item in project_field_list
             if item.get("parent_id") not in valid_parent_ids
         ]
-        today = datetime.today()
-
-        # 生成格式化的日期字符串
-        formatted_date = today.strftime("%y%m%d")
-
-        print(formatted_date)
-
         # **生成文件路径**
-        output_file_name = f"{project.project_model}产品规范 {formatted_date}.docx"
+        output_file_name = get_output_file_name(project)
         output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_file_name)
 
         placeholders_dict = build_placeholders(filtered_part_1)
         cleaned_dict = build_cleaned_dict(filtered_part_2)
         placeholders_dict.update(cleaned_dict)
-        print(placeholders_dict)
-
-        # **填充 Word 模板**
-        fill_placeholder_template(PRODUCT_SPECIFICATION_TEMPLATE_PATH, output_path, project, placeholders_dict)
+        dump_payload(logger, "占位符", placeholders_dict)
 
         data_map = {item['code']: item for item in filtered_part_2 if item.get('code') is not None}
         headings = [
@@ -105,7 +111,7 @@ def generate_document(project_id):
             "隔离特性"
         ]
         table_part_ids = [item["field_id"] for item in table_part_]
-        print(table_part_ids)
+        logger.debug(f"表格字段: {table_part_ids}")
         id_map = {
             3: "电源部分",
             4: "信号部分",
@@ -116,91 +122,105 @@ def generate_document(project_id):
         }
         # 假设这两个标题用户未填写，需要删除相应区段
         missing_headings = demo_missing_headings(headings, id_map, table_part_ids)
-        processor = WordTableProcessor(doc_path=output_path, table_index=1)
-        # 调用方法进行处理并保存
-        processor.process_missing_sections(
-            headings=headings,
-            missing_headings=missing_headings,
-            output_path=output_path
-        )
-        try:
-            doc = Document(output_path)
-        except Exception as e:
-            print("❌ 加载文档失败：", e)
-            return None
 
         data_source_map = get_fields_by_code()
 
         target_titles = filter_missing_field_names(data_source_map, data_map)
-        print(f"📌 需要删除的标题: {target_titles}")
-
-        # **删除未出现的1级标题**
-        for title in target_titles:
-            WordTocTool.delete_section_by_title(doc, title)
+        logger.debug(f"📌 需要删除的标题: {target_titles}")
 
         data_source_h2_map = get_fields_h2_by_code()
         environmental_characteristics = data_map.get("environmental_characteristics", {}).get("custom_value", "N/A")
 
         target_h2_titles = filter_missing_field_h2_names(data_source_h2_map, environmental_characteristics)
-        if target_h2_titles != "":
-            # **删除未出现的2级标题**
-            for title in target_h2_titles:
-                WordTocTool.delete_section_by_title2_or_higher(doc, title)
-            # **保存删除后的文档**
-        doc.save(output_path)  # ✅ 这里确保删除的内容被保存
 
-        rows_to_add = get_fields_by_project_id_parent_id(project_id, 44)
+        features = snapshot.feature_context()
+        important_notes = snapshot.important_note_context()
 
-        new_row = [project.project_name, project.project_model, "1套", "粘贴标签、序列号、合格证"]
-        rows_to_add.insert(0, new_row)
-        # 3. 循环添加行
-        for row_data in rows_to_add:
-            add_row_with_auto_serial(doc, table_index=3, cell_values=row_data)
+        flag = check_note_id_8(important_notes)
+
+        # **填充 Word 模板：占位符替换、缺失的表格行/一级标题/二级标题/标志段落的删除在编译后的模板上一次完成**
+        timer.lap("placeholders")
+        removed_sections = {
+            "removed_h1": target_titles,
+            "removed_h2": target_h2_titles if target_h2_titles != "" else (),
+            "removed_rows": missing_headings,
+            "marker_delete_section": flag,
+        }
+        docx_buffer = fill_placeholder_template(PRODUCT_SPECIFICATION_TEMPLATE_PATH, output_path, project,
+                                                placeholders_dict, table_index=1, headings=headings,
+                                                removed_sections=removed_sections)
 
-        # **保存删除后的文档**
-        doc.save(output_path)  # ✅ 这里确保删除的内容被保存
+        timer.skip()  # 模板编译 / 填充 / 写包在 fill_placeholder_template 中分别计时
 
-        features = get_features(project_id=project_id)
-        # important_notes = get_important_notes(project_id=project_id)
-        important_notes = get_important_notes(project_id=project_id)
+        # **流水线模式：只解析一次文档，后续步骤都在同一个内存 Document 上完成，最后统一保存**
+        try:
+            doc = Document(docx_buffer)
+        except Exception as e:
+            logger.error(f"❌ 加载文档失败：{e}")
+            raise CustomAPIException(f"加载生成的文档失败: {e}", 500)
+        timer.lap("load_docx")
+
+        rows_to_add = snapshot.fields_by_parent_id(44)
+
+        new_row = [project.project_name, project.project_model, "1套", "粘贴标签、序列号、合格证"]
+        rows_to_add.insert(0, new_row)
+        # 3. 批量添加行（原型行深拷贝，一次追加）
+        add_rows_with_auto_serial(doc, table_index=3, rows=rows_to_add)
+        timer.lap("table_rows")
 
-        flag = check_note_id_8(important_notes)
         context = {}
         context.update(features)  # context 现在包含 {"features": [...]}
         context.update(important_notes)
 
-        WordTocTool.fill_doc_with_features(output_path, context)
-        marker_text = "### DELETE HERE ###"
-        process_section_by_marker(output_path, marker_text, flag)
+        # docxtpl 渲染会替换 body，使用返回的新 Document 继续处理
+        doc = WordTocTool.render_doc_with_features(doc, context)
+        timer.lap("docxtpl_render")
 
-        p_inspections = get_inspections_by_project_id(project_id)
-        print(p_inspections)
+        p_inspections = snapshot.inspection_list()
+        dump_payload(logger, "检验项目", p_inspections)
         # 处理文档
-        processor = SpecWordTableProcessor(output_path)
+        processor = SpecWordTableProcessor(doc=doc)
         target_table_index =4
         processor.process_table(p_inspections, target_table_index=target_table_index)
-        processor.save(output_path)
-        # **更新目录**
-        WordTocTool.update_toc_via_word(output_path)
+        timer.lap("inspection_table")
+        # **按最终标题结构重建目录，页码在打开或转换 PDF 时刷新**
+        TocBuilder.rebuild(doc)
+        timer.lap("toc")
+
+        # **整个流水线只在这里写一次磁盘**
+        doc.save(output_path)
+        timer.lap("save")
 
+        if app.config['TOC_UPDATE_VIA_WORD']:
+            # **Windows 上可选：再用 Word 刷新一次页码**
+            WordTocTool.update_toc_via_word(output_path)
+            timer.lap("toc_word")
+
+        observe_output(DOCUMENT, output_path)
         return output_path, output_file_name
+    except CustomAPIException:
+        raise
     except Exception as e:
         raise CustomAPIException(e, 404)
 
 
-def send_document_response(file_path, file_name):
+def get_output_file_name(project):
+    """生成的文件名：型号 + 产品规范 + 日期"""
+    formatted_date = datetime.today().strftime("%y%m%d")
+    return f"{project.project_model}产品规范 {formatted_date}.docx"
+
+
+def send_document_response(file_path, file_name, digest=None):
     """
-    发送生成的文档文件作为响应
+    发送生成的文档文件作为响应（附带 ETag）
     """
     try:
-        encoded_file_name = quote(file_name)
-        response = send_file(
+        return send_cached_file(
             file_path,
-            as_attachment=True,
-            mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            file_name,
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            digest
         )
-        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{encoded_file_name}"
-        return response
     except Exception as e:
         raise CustomAPIException(f"文件响应失败: {str(e)}", 500)
 
@@ -367,19 +387,22 @@ def filter_missing_field_h2_names(baseline_data, input_code_array):
     return missing_field_names
 
 
-def fill_placeholder_template(template_path, output_path, project, field_dict):
+def fill_placeholder_template(template_path, output_path, project, field_dict, table_index=None, headings=(),
+                              removed_sections=None):
     """
     生成 Word 文档，替换正文、表格、页眉、页脚占位符，并处理图片替换。
+    模板只读取一次，在内存中改写正文/页眉/页脚和被替换的图片，其余条目原样拷贝，
+    结果写入内存缓冲区返回，由调用方加载后继续处理，不再落盘。
 
     :param template_path: 原始 Word 模板路径
     :param output_path: 生成 Word 文档的目标路径
     :param project: 包含项目信息的对象
     :param field_list: 字段列表，包含 code 和 value
+    :param table_index: 按标题删除行的表格索引
+    :param headings: 该表格中的标题（有固定顺序）
+    :param removed_sections: 需要删除的区段，参数同 CompiledTemplate.render
+    :return: BytesIO，填充后的 .docx 内容
     """
-
-    # **创建临时目录**
-    temp_dir = output_path.replace(".docx", "_temp")
-    DocxProcessor.unzip_docx(template_path, temp_dir)  # 解压原始 .docx
     # **项目信息映射**
     project_placeholders = {
         "{{project_model}}": project.project_model or "N/A",
@@ -393,16 +416,6 @@ def fill_placeholder_template(template_path, output_path, project, field_dict):
     # **合并所有占位符**
     all_placeholders = {**project_placeholders, **field_dict}
 
-    # **替换正文和表格**
-    DocxProcessor.replace_docx_text(os.path.join(temp_dir, "word/document.xml"), all_placeholders)
-
-    # **替换页眉和页脚**
-    for file in os.listdir(os.path.join(temp_dir, "word")):
-        if file.startswith("header") or file.startswith("footer"):
-            DocxProcessor.replace_docx_text(os.path.join(temp_dir, f"word/{file}"), all_placeholders)
-
-    print("✅ 文本占位符替换完成.")
-
     # **图片处理**
 
     # 获取图片路径
@@ -427,15 +440,20 @@ def fill_placeholder_template(template_path, output_path, project, field_dict):
         replacements_dict["image1.emf"] = EMF_RM
 
 
-    # **执行图片替换**
-    if replacements_dict:
-        DocxProcessor.replace_images_in_docx(os.path.join(temp_dir, "word", "media"), replacements_dict)
-        print(f"✅ 已替换 {len(replacements_dict)} 张图片.")
-
-    # **重新压缩 .docx**
-    DocxProcessor.zip_docx(temp_dir, output_path)
-    shutil.rmtree(temp_dir)  # 删除临时文件夹
-    print(f"✅ 文档生成成功: {output_path}")
+    # **正文使用编译后的模板生成（模板变化时才重新编译），页眉、页脚仍走占位符替换**
+    with stage(DOCUMENT, "template_compile"):
+        compiled = TemplateCompiler.compile(template_path, table_index=table_index, row_headings=headings,
+                                            marker_text=DELETE_MARKER_TEXT)
+    # 占位符替换、表格行裁剪、区段删除在一次渲染中完成
+    with stage(DOCUMENT, "fill_render"):
+        document_xml = compiled.render(all_placeholders, **(removed_sections or {}))
+
+    # **在内存中一次性写入正文、页眉、页脚和图片**
+    with stage(DOCUMENT, "docx_rewrite"):
+        docx_buffer = DocxProcessor.rewrite_docx(template_path, all_placeholders, replacements_dict,
+                                                 document_xml=document_xml)
+    logger.info(f"✅ 占位符填充完成（图片 {len(replacements_dict)} 张）: {output_path}")
+    return docx_buffer
 
 
 
@@ -1,18 +1,17 @@
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import verify_jwt_in_request
 from functools import wraps
 
 from app.exceptions.exceptions import CustomAPIException
-from app.models.user import User
+from app.controllers.permission_controller import current_roles
 
 def role_required(required_role):
-    """ 检查用户是否拥有指定角色 """
+    """ 检查用户是否拥有指定角色（角色来自 Access Token，权限变更后回退到数据库查询） """
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_identity = get_jwt_identity()
-            user = User.query.get(user_identity)
-            if not user or not user.has_role(required_role):
+            roles = current_roles()
+            if not roles or required_role not in roles:
                 raise CustomAPIException("联系管理员", 404)
             return fn(*args, **kwargs)
         return wrapper
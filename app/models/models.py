@@ -55,6 +55,10 @@ class MaterialInfo(db.Model):
 
 class ProjectFieldValue(db.Model):
     __tablename__ = 't_project_field_values'
+    __table_args__ = (
+        # 每个项目的每个字段只有一条记录（批量保存依赖该约束做 UPSERT）
+        db.UniqueConstraint('project_id', 'field_id', name='uq_project_field_values_project_field'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     project_id = db.Column(db.Integer, db.ForeignKey('t_projects.id', ondelete='CASCADE'), nullable=False)
@@ -142,8 +146,8 @@ class FieldDefinition(db.Model):
     field_type = db.Column(db.Enum('select', 'input', 'image', 'checkbox', 'group', 'select+input'), nullable=False)
     remarks = db.Column(db.Text, nullable=True)
 
-    # 关系映射（支持父子结构）
-    parent = db.relationship("FieldDefinition", remote_side=[id], backref="children", lazy="joined")
+    # 关系映射（支持父子结构）；按需加载，需要时在查询中指定 selectinload
+    parent = db.relationship("FieldDefinition", remote_side=[id], backref="children")
 
     def __repr__(self):
         return f"FieldDefinition('{self.field_name}', '{self.code}', '{self.field_type}')"
@@ -172,9 +176,9 @@ class ProjectMaterial(db.Model):
     material_id = db.Column(db.Integer, db.ForeignKey('t_material_info.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.TIMESTAMP, nullable=False, server_default=db.func.current_timestamp())
 
-    # 关系映射
-    project = db.relationship('Project', backref='project_materials', lazy='joined')
-    material = db.relationship('MaterialInfo', backref='material_projects', lazy='joined')
+    # 关系映射；按需加载，需要时在查询中指定 selectinload
+    project = db.relationship('Project', backref='project_materials')
+    material = db.relationship('MaterialInfo', backref='material_projects')
 
     def __repr__(self):
         return f"ProjectMaterial(project_id={self.project_id}, material_id={self.material_id})"
@@ -216,9 +220,9 @@ class ProjectFeature(db.Model):
     feature_id = db.Column(db.Integer, db.ForeignKey("t_technical_features.id", ondelete="CASCADE"), nullable=False, comment="技术特点 ID")
     sort_order = db.Column(db.Integer, nullable=False, comment="排序顺序")
 
-    # 关系映射
-    project = db.relationship("Project", backref=db.backref("project_features", cascade="all, delete-orphan", lazy="joined"))
-    feature = db.relationship("TechnicalFeature", backref=db.backref("feature_projects", cascade="all, delete-orphan", lazy="joined"))
+    # 关系映射；按需加载，需要时在查询中指定 selectinload（例如 selectinload(ProjectFeature.feature)）
+    project = db.relationship("Project", backref=db.backref("project_features", cascade="all, delete-orphan"))
+    feature = db.relationship("TechnicalFeature", backref=db.backref("feature_projects", cascade="all, delete-orphan"))
 
     def __repr__(self):
         return f"ProjectFeature(project_id={self.project_id}, feature_id={self.feature_id}, sort_order={self.sort_order})"
@@ -261,9 +265,9 @@ class ProjectImportantNote(db.Model):
     note_id = db.Column(db.Integer, db.ForeignKey("t_important_notes.id", ondelete="CASCADE"), nullable=False, comment="技术特点 ID")
     sort_order = db.Column(db.Integer, nullable=False, comment="排序顺序")
 
-    # 关系映射
-    project = db.relationship("Project", backref=db.backref("project_important_notes", cascade="all, delete-orphan", lazy="joined"))
-    note = db.relationship("ImportantNote", backref=db.backref("note_projects", cascade="all, delete-orphan", lazy="joined"))
+    # 关系映射；按需加载，需要时在查询中指定 selectinload（例如 selectinload(ProjectImportantNote.note)）
+    project = db.relationship("Project", backref=db.backref("project_important_notes", cascade="all, delete-orphan"))
+    note = db.relationship("ImportantNote", backref=db.backref("note_projects", cascade="all, delete-orphan"))
 
     def __repr__(self):
         return f"ProjectImportantNote(project_id={self.project_id}, note_id={self.note_id}, sort_order={self.sort_order})"
@@ -279,3 +283,45 @@ class ProjectImportantNote(db.Model):
         }
 
 
+
+
+class CacheVersion(db.Model):
+    """ 进程内缓存的共享版本号：写入数据时递增，其他进程据此判断缓存是否过期 """
+    __tablename__ = "t_cache_versions"
+
+    name = db.Column(db.String(50), primary_key=True, comment="缓存名称")
+    version = db.Column(db.Integer, nullable=False, default=0, comment="版本号")
+
+    def __repr__(self):
+        return f"CacheVersion(name={self.name}, version={self.version})"
+
+    @staticmethod
+    def get_version(name):
+        """ 读取版本号，没有记录时为 0 """
+        return db.session.query(CacheVersion.version).filter(CacheVersion.name == name).scalar() or 0
+
+    @staticmethod
+    def bump(name):
+        """
+        递增版本号（随调用方的事务一起提交）。
+        用一条 upsert 语句完成：没有记录时插入 1，否则加 1，首次递增时多个请求并发也不会主键冲突。
+        """
+        table = CacheVersion.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+            statement = insert(table).values(name=name, version=1)
+            statement = statement.on_duplicate_key_update(version=table.c.version + 1)
+        elif dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(table).values(name=name, version=1).on_conflict_do_update(
+                index_elements=[table.c.name], set_={"version": table.c.version + 1})
+        else:
+            updated = CacheVersion.query.filter_by(name=name).update({CacheVersion.version: CacheVersion.version + 1})
+            if not updated:
+                db.session.add(CacheVersion(name=name, version=1))
+            return
+        db.session.execute(statement)
@@ -1,6 +1,6 @@
 import pytz
 
-from app import db, bcrypt
+from app import db, password_hasher
 from app.models.role import Role, t_user_roles
 
 class User(db.Model):
@@ -16,10 +16,17 @@ class User(db.Model):
     roles = db.relationship('Role', secondary=t_user_roles, backref=db.backref('users', lazy='dynamic'))
 
     def set_password(self, password):
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
+
+    def rehash_password_if_needed(self, password):
+        """校验通过后调用：旧哈希的 cost 与当前配置不同时用当前 cost 重新加密（调用方提交）"""
+        if password_hasher.needs_rehash(self.password):
+            self.set_password(password)
+            return True
+        return False
 
     def reset_password(self):
         """重置密码为 `用户名 + 123`"""
@@ -17,6 +17,8 @@ from app.views.user_view import user_bp
 from app.views.role_view import role_bp
 from app.views.inspection_view import inspection_bp
 from app.views.office_document_view import office_file_bp
+from app.views.job_view import job_bp
+from app.views.metrics_view import metrics_bp
 
 
 
@@ -40,5 +42,7 @@ def setup_routes(app):
     app.register_blueprint(role_bp)
     app.register_blueprint(inspection_bp)
     app.register_blueprint(office_file_bp)
+    app.register_blueprint(job_bp)
+    app.register_blueprint(metrics_bp)  # /metrics
     app.register_blueprint(user_bp)  # 注册用户 API
 
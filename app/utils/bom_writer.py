@@ -0,0 +1,213 @@
+import os
+import copy
+import logging
+import threading
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import MergedCell
+from openpyxl.styles import Border, Side, Alignment
+from openpyxl.utils import range_boundaries
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.worksheet.cell_range import CellRange
+
+logger = logging.getLogger(__name__)
+
+# **BOM 模板布局：物料从第 6 行开始，A~E 为 序号/物料代码/名称/规格/单位，每行合并 F:G、H:J**
+DATA_START_ROW = 6
+DATA_MERGES = (("F", "G"), ("H", "J"))
+
+# 从参照工作簿复制到新工作簿的样式表（保持样式索引不变）
+WORKBOOK_STYLE_ATTRS = ("_fonts", "_fills", "_borders", "_number_formats", "_alignments", "_protections",
+                        "_cell_styles", "_named_styles", "_differential_styles", "_table_styles", "_colors",
+                        "_date_formats", "_timedelta_formats")
+# 从参照工作表复制到新工作表的页面设置
+SHEET_ATTRS = ("sheet_properties", "sheet_format", "views", "page_setup", "page_margins", "print_options",
+               "HeaderFooter", "protection", "sheet_state")
+
+
+def layout_rows(sheet, rows, start_row=DATA_START_ROW):
+    """
+    原有的逐行排版：插入行、逐行合并 F:G / H:J、填写 A~E、给数据行加边框并居中。
+    insert_rows 要移动下方所有单元格，merge_cells 每次都要检查已有的全部合并区域，行数多时很慢；
+    这里只用于在 2 行数据上生成参照布局（BomTemplate），保证新写法的输出与原来一致。
+    """
+    required_rows = len(rows) - 1
+    if required_rows > 0:
+        sheet.insert_rows(start_row, amount=required_rows)
+
+    for idx in range(len(rows)):
+        current_row = start_row + idx
+        for first, last in DATA_MERGES:
+            sheet.merge_cells(f"{first}{current_row}:{last}{current_row}")
+
+    for idx, values in enumerate(rows):
+        current_row = start_row + idx
+        sheet.cell(current_row, 1).value = idx + 1
+        for column, value in enumerate(values, 2):
+            sheet.cell(current_row, column).value = value
+
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                         top=Side(style='thin'), bottom=Side(style='thin'))
+    for row in sheet.iter_rows(min_row=start_row, max_row=start_row + required_rows,
+                               min_col=1, max_col=sheet.max_column):
+        for cell in row:
+            cell.border = thin_border
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+
+
+class BomTemplate:
+    """
+    解析后的 BOM 模板（只读，进程内共享）。
+    加载时在 2 行数据上执行一次原有排版（layout_rows），从结果中取出：
+    - 表头行、普通数据行、最后一个数据行（原模板的示例行移到这里）、表尾行的单元格原型（值 + 样式）；
+    - 固定的合并区域、行高、列宽、页面设置，以及整套样式表。
+    写入时用 openpyxl 的只写模式逐行输出，每个单元格直接引用预先算好的样式，
+    数据行的合并区域直接加入集合，耗时与行数成线性关系，内存中不保留整张表。
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.workbook = openpyxl.load_workbook(path)
+        sheet = self.workbook.active
+        self.title = sheet.title
+        self.sheet = sheet
+
+        layout_rows(sheet, [(None,) * 4] * 2)
+        self.max_column = sheet.max_column
+        self.header_rows = [self._row(sheet, row) for row in range(1, DATA_START_ROW)]
+        self.data_row = self._row(sheet, DATA_START_ROW)
+        self.last_data_row = self._row(sheet, DATA_START_ROW + 1)
+        self.footer_rows = [self._row(sheet, row) for row in range(DATA_START_ROW + 2, sheet.max_row + 1)]
+
+        # 原有排版不移动已有的合并区域和行高，这里同样按固定位置保留
+        data_merges = {self._data_merges(row) for row in (DATA_START_ROW, DATA_START_ROW + 1)}
+        data_merges = set().union(*data_merges)
+        self.static_merges = [str(merged) for merged in sheet.merged_cells.ranges if str(merged) not in data_merges]
+
+    @staticmethod
+    def _row(sheet, row):
+        """ 一行的单元格原型：[(列号, 值, 样式, 是否合并单元格)]，只包含工作表中存在的单元格 """
+        cells = []
+        for column in range(1, sheet.max_column + 1):
+            cell = sheet._cells.get((row, column))
+            if cell is not None:
+                cells.append((column, cell._value, cell._style, isinstance(cell, MergedCell)))
+        return cells
+
+    @staticmethod
+    def _data_merges(row):
+        return frozenset(f"{first}{row}:{last}{row}" for first, last in DATA_MERGES)
+
+    def _new_workbook(self):
+        workbook = openpyxl.Workbook(write_only=True)
+        for name in WORKBOOK_STYLE_ATTRS:
+            value = getattr(self.workbook, name)
+            # IndexedList 不能 deepcopy（结果为空），样式对象本身不可变，复制列表即可
+            setattr(workbook, name, IndexedList(value) if isinstance(value, IndexedList) else copy.deepcopy(value))
+        workbook.loaded_theme = self.workbook.loaded_theme
+        workbook.properties = copy.copy(self.workbook.properties)
+        workbook.calculation = copy.copy(self.workbook.calculation)
+
+        sheet = workbook.create_sheet(self.title)
+        for name in SHEET_ATTRS:
+            setattr(sheet, name, copy.deepcopy(getattr(self.sheet, name)))
+        for letter, dimension in self.sheet.column_dimensions.items():
+            sheet.column_dimensions[letter] = copy.copy(dimension)
+            sheet.column_dimensions[letter].parent = sheet
+        for index, dimension in self.sheet.row_dimensions.items():
+            sheet.row_dimensions[index] = copy.copy(dimension)
+            sheet.row_dimensions[index].parent = sheet
+        sheet.print_title_rows = self.sheet.print_title_rows
+        sheet.print_title_cols = self.sheet.print_title_cols
+        return workbook, sheet
+
+    @staticmethod
+    def _cells(sheet, prototype, values=None):
+        """
+        按原型生成一行只写单元格（样式直接引用原型，不再逐个计算）
+        :param values: {列号: 值}，覆盖原型中的值；合并区域内的非首格不写值，原型中没有的列新建无样式单元格
+        """
+        values = values or {}
+        cells = [None] * max([column for column, _, _, _ in prototype] + list(values), default=0)
+        for column, value, style, merged in prototype:
+            cell = WriteOnlyCell(sheet, value if merged else values.pop(column, value))
+            cell._style = style
+            cells[column - 1] = cell
+        for column, value in values.items():
+            if column not in {c for c, _, _, _ in prototype}:
+                cells[column - 1] = WriteOnlyCell(sheet, value)
+        return cells
+
+    def write(self, output, header_values, rows):
+        """
+        写出 BOM 明细表
+        :param output: 输出路径或文件对象
+        :param header_values: {单元格坐标: 值}，例如 {"C2": 产品名称}；合并区域内的非首格忽略
+        :param rows: [(物料代码, 名称, 规格, 单位)]
+        """
+        workbook, sheet = self._new_workbook()
+
+        merges = set(self.static_merges)
+        for idx in range(len(rows)):
+            merges.update(self._data_merges(DATA_START_ROW + idx))
+        sheet.merged_cells.ranges.update(CellRange(merged) for merged in merges)
+
+        header_by_row = {}
+        for coordinate, value in header_values.items():
+            column, row, _, _ = range_boundaries(coordinate)
+            header_by_row.setdefault(row, {})[column] = value
+        for row, prototype in enumerate(self.header_rows, 1):
+            sheet.append(self._cells(sheet, prototype, header_by_row.get(row)))
+
+        last = len(rows) - 1
+        for idx, values in enumerate(rows):
+            prototype = self.last_data_row if idx == last else self.data_row
+            sheet.append(self._cells(sheet, prototype, dict(zip(range(1, 6), (idx + 1,) + tuple(values)))))
+
+        for prototype in self.footer_rows:
+            sheet.append(self._cells(sheet, prototype))
+
+        workbook.save(output)
+
+
+class BomTemplateCache:
+    """ 进程级 BOM 模板缓存，按 路径 + 修改时间 + 文件大小 作为键，模板修改后自动重新加载 """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        cached = self._templates.get(key[0])
+        if cached is not None and cached.key == key:
+            return cached
+        with self._lock:
+            cached = self._templates.get(key[0])
+            if cached is None or cached.key != key:
+                logger.info(f"加载 BOM 模板: {path}")
+                cached = BomTemplate(path, key)
+                self._templates[key[0]] = cached
+            return cached
+
+
+bom_template_cache = BomTemplateCache()
+
+
+def write_bom(template_path, output, header_values, rows):
+    """
+    按模板写出 BOM 明细表（输出与原有的逐行插入写法一致）。
+    没有物料行时原样保留模板的示例行，与原写法相同。
+    """
+    if not rows:
+        workbook = openpyxl.load_workbook(template_path)
+        sheet = workbook.active
+        for coordinate, value in header_values.items():
+            if not isinstance(sheet[coordinate], MergedCell):
+                sheet[coordinate].value = value
+        workbook.save(output)
+        return
+    bom_template_cache.get(template_path).write(output, header_values, rows)
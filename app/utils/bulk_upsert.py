@@ -0,0 +1,97 @@
+import logging
+import threading
+
+from sqlalchemy import and_, bindparam, func, inspect, select, tuple_
+
+logger = logging.getLogger(__name__)
+
+# **(引擎, 表名, 键列) -> 是否存在对应的唯一约束/唯一索引**
+_unique_key_cache = {}
+_unique_key_lock = threading.Lock()
+
+
+def has_unique_key(engine, table, key_columns):
+    """
+    检查数据库中的表是否真的有 key_columns 上的唯一约束（旧库由 create_all 建表时不会补加约束）。
+    结果按进程缓存。
+    """
+    cache_key = (id(engine), table.name, tuple(key_columns))
+    with _unique_key_lock:
+        if cache_key not in _unique_key_cache:
+            inspector = inspect(engine)
+            wanted = set(key_columns)
+            found = any(set(c["column_names"]) == wanted for c in inspector.get_unique_constraints(table.name))
+            found = found or any(index.get("unique") and set(index["column_names"]) == wanted
+                                 for index in inspector.get_indexes(table.name))
+            if not found:
+                logger.warning(f"⚠️ 表 {table.name} 缺少 {tuple(key_columns)} 唯一约束，批量写入改用 查询 + 批量插入/更新")
+            _unique_key_cache[cache_key] = found
+        return _unique_key_cache[cache_key]
+
+
+def existing_keys(session, table, key_columns, rows, chunk_size=500):
+    """ 查询 rows 中哪些键已经存在，返回键元组的集合 """
+    key_cols = [table.c[name] for name in key_columns]
+    keys = list({tuple(row[name] for name in key_columns) for row in rows})
+    found = set()
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        if len(key_cols) == 1:
+            condition = key_cols[0].in_([key[0] for key in chunk])
+        else:
+            condition = tuple_(*key_cols).in_(chunk)
+        found.update(tuple(row) for row in session.execute(select(*key_cols).where(condition)))
+    return found
+
+
+def bulk_upsert(session, table, rows, key_columns, update_columns, chunk_size=500, known_keys=None):
+    """
+    多行 UPSERT（不提交，由调用方控制事务）：
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+    - PostgreSQL / SQLite: INSERT ... ON CONFLICT (...) DO UPDATE
+    - 其他数据库或缺少唯一约束时：先查已有的键，再分别批量 INSERT / UPDATE
+    更新时传入值为 NULL 的列保持原值（COALESCE(新值, 原值)）。
+
+    :param rows: list[dict]，每行都包含 key_columns 与 update_columns 的全部列（值可以为 None）
+    :param known_keys: 已查询过的已有键集合（existing_keys 的结果），通用路径可直接复用
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in ("mysql", "postgresql", "sqlite") and has_unique_key(session.get_bind(), table, key_columns):
+        for start in range(0, len(rows), chunk_size):
+            session.execute(_native_upsert(dialect, table, rows[start:start + chunk_size], key_columns,
+                                           update_columns))
+        return
+
+    if known_keys is None:
+        known_keys = existing_keys(session, table, key_columns, rows, chunk_size)
+    inserts = [row for row in rows if tuple(row[name] for name in key_columns) not in known_keys]
+    updates = [row for row in rows if tuple(row[name] for name in key_columns) in known_keys]
+    if inserts:
+        session.execute(table.insert(), inserts)
+    if updates:
+        statement = (table.update()
+                     .where(and_(*[table.c[name] == bindparam(f"key_{name}") for name in key_columns]))
+                     .values({name: func.coalesce(bindparam(f"value_{name}"), table.c[name])
+                              for name in update_columns}))
+        params = [{**{f"key_{name}": row[name] for name in key_columns},
+                   **{f"value_{name}": row[name] for name in update_columns}} for row in updates]
+        session.execute(statement, params)
+
+
+def _native_upsert(dialect, table, rows, key_columns, update_columns):
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(rows)
+        return statement.on_duplicate_key_update(
+            {name: func.coalesce(statement.inserted[name], table.c[name]) for name in update_columns})
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[name] for name in key_columns],
+        set_={name: func.coalesce(statement.excluded[name], table.c[name]) for name in update_columns})
@@ -0,0 +1,107 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import tempfile
+
+
+def hash_payload(payload):
+    """
+    计算任意可 JSON 序列化数据的摘要（键排序，日期等对象按 str 处理）
+    :return: sha256 十六进制字符串
+    """
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path):
+    """
+    文件指纹：路径 + 修改时间 + 大小；文件不存在时返回 None
+    """
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.basename(path), stat.st_mtime_ns, stat.st_size]
+
+
+class DocumentCache:
+    """
+    生成结果缓存（按内容寻址）：
+    同一份数据快照 + 同一版本模板生成的文件完全相同，因此以快照摘要作为文件名保存，
+    再次请求时直接返回已有文件。
+    目录结构：<cache_folder>/<kind>/<digest><suffix>
+    """
+
+    def __init__(self, cache_folder, max_entries=200):
+        self.cache_folder = cache_folder
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _path(self, kind, digest, suffix):
+        return os.path.join(self.cache_folder, kind, f"{digest}{suffix}")
+
+    def lookup(self, kind, digest, suffix):
+        """命中时返回缓存文件路径，否则返回 None"""
+        path = self._path(kind, digest, suffix)
+        if os.path.exists(path):
+            # 更新访问时间，淘汰时按最近使用排序
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return path
+        return None
+
+    def store(self, kind, digest, suffix, source_path):
+        """
+        把生成好的文件复制进缓存。先写临时文件再原子替换，并发请求不会读到写了一半的文件。
+        :return: 缓存文件路径
+        """
+        path = self._path(kind, digest, suffix)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst, open(source_path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict(folder)
+        return path
+
+    def _evict(self, folder):
+        """每类文件最多保留 max_entries 个，超出时删除最久未使用的"""
+        if not self.max_entries:
+            return
+        with self._lock:
+            entries = []
+            for name in os.listdir(folder):
+                if name.endswith(".tmp"):
+                    continue
+                full_path = os.path.join(folder, name)
+                try:
+                    entries.append((os.stat(full_path).st_mtime, full_path))
+                except OSError:
+                    continue
+            if len(entries) <= self.max_entries:
+                return
+            entries.sort()
+            for _, full_path in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(full_path)
+                except OSError:
+                    pass
+
+    def clear(self, kind=None):
+        folder = self.cache_folder if kind is None else os.path.join(self.cache_folder, kind)
+        with self._lock:
+            shutil.rmtree(folder, ignore_errors=True)
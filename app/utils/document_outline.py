@@ -0,0 +1,115 @@
+import re
+
+from docx.oxml.ns import qn
+
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_T = qn("w:t")
+W_PPR = qn("w:pPr")
+W_PSTYLE = qn("w:pStyle")
+W_VAL = qn("w:val")
+W_NAME = qn("w:name")
+W_STYLE_ID = qn("w:styleId")
+
+HEADING_NAME_PATTERN = re.compile(r"heading (\d)$")
+
+
+class DocumentOutline:
+    """
+    文档大纲索引：一次遍历 body，记录每个标题（级别 + 文字）在 body 子元素中的位置，
+    章节范围 = 标题本身到下一个同级或更高级标题之前的所有段落和表格。
+
+    用法：
+        outline = DocumentOutline(doc)
+        outline.delete_sections([(1, "环境特性"), (2, "重量")])
+
+    删除之后索引自动重建，同一个 outline 可以继续使用。
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.body = doc.element.body
+        self._heading_styles = self._heading_style_map(doc)
+        self._build()
+
+    @staticmethod
+    def _heading_style_map(doc):
+        """{styleId: 标题级别}，只识别名为 "heading N" 的样式（与 para.style.name == "Heading N" 一致）"""
+        result = {}
+        for style in doc.styles.element.iter(qn("w:style")):
+            name = style.find(W_NAME)
+            match = HEADING_NAME_PATTERN.match(name.get(W_VAL).lower()) if name is not None else None
+            if match:
+                result[style.get(W_STYLE_ID)] = int(match.group(1))
+        return result
+
+    def _heading_level(self, element):
+        if element.tag != W_P:
+            return None
+        ppr = element.find(W_PPR)
+        pstyle = ppr.find(W_PSTYLE) if ppr is not None else None
+        if pstyle is None:
+            return None
+        return self._heading_styles.get(pstyle.get(W_VAL))
+
+    def _build(self):
+        # **body 子元素列表 + 标题列表 [(位置, 级别, 文字)]**
+        self.elements = list(self.body)
+        self.headings = []
+        for index, element in enumerate(self.elements):
+            level = self._heading_level(element)
+            if level is not None:
+                title = "".join(t.text or "" for t in element.iter(W_T)).strip()
+                self.headings.append((index, level, title))
+
+    def section_ranges(self, level, title, first_only=False):
+        """
+        查找章节范围
+        :param level: 标题级别（1 表示 Heading 1）
+        :param title: 标题文字（去掉首尾空白后比较）
+        :param first_only: 只返回第一个匹配的章节
+        :return: [(起始位置, 结束位置)]，左闭右开，位置为 body 子元素下标
+        """
+        ranges = []
+        for i, (start, heading_level, heading_title) in enumerate(self.headings):
+            if heading_level != level or heading_title != title:
+                continue
+            end = next((index for index, other_level, _ in self.headings[i + 1:] if other_level <= level),
+                       len(self.elements))
+            # sectPr 是 body 的最后一个子元素，不属于任何章节
+            if end == len(self.elements) and self.elements[-1].tag == qn("w:sectPr"):
+                end -= 1
+            ranges.append((start, end))
+            if first_only:
+                break
+        return ranges
+
+    def section_elements(self, level, title, include_tables=True, first_only=False):
+        """返回章节内的 body 子元素（include_tables=False 时只包含段落）"""
+        elements = []
+        for start, end in self.section_ranges(level, title, first_only):
+            for element in self.elements[start:end]:
+                if element.tag == W_P or (include_tables and element.tag == W_TBL):
+                    elements.append(element)
+        return elements
+
+    def delete_sections(self, sections, include_tables=True, first_only=False):
+        """
+        批量删除章节，所有范围基于同一份索引计算，一次遍历完成删除
+        :param sections: [(级别, 标题)]
+        :param include_tables: 是否一并删除章节内的表格
+        :param first_only: 每个标题只删除第一个匹配的章节
+        :return: 删除的元素个数
+        """
+        doomed = set()
+        for level, title in sections:
+            doomed.update(id(element) for element in
+                          self.section_elements(level, title, include_tables, first_only))
+        if not doomed:
+            return 0
+
+        for element in self.elements:
+            if id(element) in doomed:
+                self.body.remove(element)
+        self._build()
+        return len(doomed)
@@ -1,8 +1,24 @@
 import os
+import re
 import zipfile
 import shutil
+import logging
+from xml.sax.saxutils import escape
 from lxml import etree
 
+from app.utils.template_cache import template_cache
+
+logger = logging.getLogger(__name__)
+
+# XML 标签
+XML_TAG_PATTERN = re.compile(r"<[^>]*>")
+# {{...}} 占位符；Word 可能把一个占位符拆进多个 <w:r>，因此两个花括号之间以及内部允许夹杂标签，
+# 但不允许跨段落（</w:p>、<w:p>）
+_TAG_IN_RUN = r"<(?!/?w:p[ >/])[^>]*>"
+PLACEHOLDER_PATTERN = re.compile(
+    r"\{(?:%s)*\{(?:[^{}<]|%s)*\}(?:%s)*\}" % (_TAG_IN_RUN, _TAG_IN_RUN, _TAG_IN_RUN)
+)
+
 class DocxProcessor:
     @staticmethod
     def unzip_docx(docx_path, extract_to):
@@ -14,7 +30,7 @@ class DocxProcessor:
 
     @staticmethod
     def zip_docx(folder_path, output_path):
-        """重新打包 .docx 文件"""
+        """重新打包 .docx 文件，output_path 可以是路径，也可以是 BytesIO 等可写的文件对象"""
         with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as docx:
             for root, _, files in os.walk(folder_path):
                 for file in files:
@@ -28,13 +44,38 @@ class DocxProcessor:
         with open(xml_path, "r", encoding="utf-8") as f:
             xml_content = f.read()
 
-        # 替换占位符
-        for placeholder, value in replacements.items():
-            xml_content = xml_content.replace(placeholder, value)
+        xml_content = DocxProcessor.replace_text(xml_content, replacements)
 
         with open(xml_path, "w", encoding="utf-8") as f:
             f.write(xml_content)
 
+    @staticmethod
+    def replace_text(xml_content, replacements):
+        """
+        在内存中的 XML 字符串上替换占位符。
+        一次扫描找出所有 {{...}} 占位符，再到 replacements 中查值，耗时只与文档大小有关，
+        与占位符数量无关。被 Word 拆到多个 run 里的占位符也能识别：值写入第一个 run，
+        其余 run 的文本清空，标签结构保持不变。不在 replacements 中的占位符
+        （例如 docxtpl 的 {{ f.label }}）原样保留。
+
+        :param xml_content: XML 字符串
+        :param replacements: dict，键形如 "{{code}}"，值为替换文本（None 视为空字符串）
+        :return: 替换后的 XML 字符串
+        """
+        if not replacements:
+            return xml_content
+
+        def substitute(match):
+            token = match.group(0)
+            tags = XML_TAG_PATTERN.findall(token) if "<" in token else ()
+            key = XML_TAG_PATTERN.sub("", token) if tags else token
+            if key not in replacements:
+                return token
+            value = replacements[key]
+            return escape("" if value is None else str(value)) + "".join(tags)
+
+        return PLACEHOLDER_PATTERN.sub(substitute, xml_content)
+
     @staticmethod
     def replace_images_in_docx(media_folder_path, replacements):
         """
@@ -43,7 +84,7 @@ class DocxProcessor:
         :param replacements: dict，键为需要被替换的图片文件名（例如 'image1.png'），值为新的图片路径
         """
         if not os.path.exists(media_folder_path):
-            print("文档中未找到图片文件夹 word/media")
+            logger.warning("文档中未找到图片文件夹 word/media")
             return
 
         for old_image_name, new_image_path in replacements.items():
@@ -51,6 +92,41 @@ class DocxProcessor:
             if os.path.exists(old_image_full_path):
                 os.remove(old_image_full_path)
                 shutil.copy(new_image_path, old_image_full_path)
-                print(f"已替换: {old_image_name} -> {new_image_path}")
+                logger.debug(f"已替换: {old_image_name} -> {new_image_path}")
             else:
-                print(f"未找到对应图片: {old_image_name}，跳过替换。")
+                logger.warning(f"未找到对应图片: {old_image_name}，跳过替换。")
+
+    @staticmethod
+    def rewrite_docx(template_path, replacements, image_replacements=None, output=None, document_xml=None):
+        """
+        在内存中重写 .docx，不再解压到临时目录。
+        模板从进程级缓存中取出（首次使用或文件变化时才读取磁盘），只有正文/页眉/页脚 XML
+        和被替换的图片会被重新写入，其余条目直接写入缓存的原始压缩数据，不解压也不重新压缩。
+
+        :param template_path: 原始 Word 模板路径
+        :param replacements: dict，占位符 -> 替换值
+        :param image_replacements: dict，键为 word/media 下的图片文件名，值为新的图片路径
+        :param output: 输出路径或可写文件对象；为 None 时返回 BytesIO
+        :param document_xml: 已生成好的正文 XML（例如 CompiledTemplate.render 的结果），给出时正文不再做替换
+        :return: 输出对象（BytesIO 时已 seek 到开头）
+        """
+        image_replacements = image_replacements or {}
+        template = template_cache.get(template_path)
+        docx = template.clone()
+
+        for name in docx.text_part_names():
+            if document_xml is not None and name == "word/document.xml":
+                docx.write_text(name, document_xml)
+                continue
+            docx.write_text(name, DocxProcessor.replace_text(docx.read_text(name), replacements))
+
+        names = set(template.names)
+        for media_name, new_image_path in image_replacements.items():
+            if f"word/media/{media_name}" not in names:
+                logger.warning(f"未找到对应图片: {media_name}，跳过替换。")
+                continue
+            with open(new_image_path, "rb") as f:
+                docx.write_part(f"word/media/{media_name}", f.read())
+            logger.debug(f"已替换: {media_name} -> {new_image_path}")
+
+        return docx.save(output)
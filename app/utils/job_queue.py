@@ -0,0 +1,189 @@
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """排队任务数已达上限"""
+
+
+class Job:
+    """
+    一个后台生成任务。状态：queued -> running -> succeeded / failed
+    进度变化时通知等待者（用于进度流推送）。
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, kind, params, owner=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.owner = owner
+        self.status = Job.QUEUED
+        self.progress = 0
+        self.message = "排队中"
+        self.result_path = None
+        self.result_name = None
+        self.error = None
+        # 任务自定义的进度明细（例如导入任务的已读/已写/出错行数）
+        self.details = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # 每次状态变化自增，进度流据此判断是否有新事件
+        self.version = 0
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in (Job.SUCCEEDED, Job.FAILED)
+
+    def update(self, progress=None, message=None, **fields):
+        with self._changed:
+            if progress is not None:
+                self.progress = progress
+            if message is not None:
+                self.message = message
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout=None):
+        """阻塞直到 version 之后有新的状态变化或任务结束，返回最新 version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self.finished, timeout=timeout)
+            return self.version
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "file_name": self.result_name,
+            "error": self.error,
+            "details": self.details,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobBackend:
+    """
+    任务后端接口。进程内线程池是默认实现；换成进程外 worker（例如 Redis 队列 + 独立进程）时，
+    只需实现同样的 submit / get / stats 方法，接口层不需要改动。
+    """
+
+    def submit(self, kind, params, runner, owner=None):
+        """
+        :param runner: 回调 runner(job)，返回 (结果文件路径, 下载文件名)
+        :return: Job
+        """
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class ThreadPoolJobBackend(JobBackend):
+    """
+    进程内线程池后端：
+    - max_workers 个线程同时执行，其余任务排队；
+    - 排队 + 执行中的任务超过 max_pending 时拒绝提交，避免请求堆积；
+    - 已结束的任务保留 result_ttl 秒供查询和下载。
+    """
+
+    def __init__(self, max_workers=2, max_pending=20, result_ttl=3600, context_factory=None,
+                 thread_name_prefix="job-worker"):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        # 任务执行时需要进入的上下文（例如 Flask app_context）
+        self.context_factory = context_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params, runner, owner=None):
+        with self._lock:
+            self._purge()
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError(f"任务队列已满（{self.max_pending}），请稍后再试")
+            job = Job(kind, params, owner)
+            self._jobs[job.id] = job
+            self._pending += 1
+        self._executor.submit(self._run, job, runner)
+        return job
+
+    def _run(self, job, runner):
+        job.update(progress=0, message="开始执行", status=Job.RUNNING, started_at=time.time())
+        try:
+            if self.context_factory is not None:
+                with self.context_factory():
+                    result_path, result_name = runner(job)
+            else:
+                result_path, result_name = runner(job)
+            job.update(progress=100, message="完成", status=Job.SUCCEEDED,
+                       result_path=result_path, result_name=result_name, finished_at=time.time())
+        except Exception as e:
+            # CustomAPIException 的信息在 message 属性上
+            error = getattr(e, "message", None) or e
+            logger.exception(f"❌ 任务执行失败: {job.kind} {job.id}")
+            job.update(message="失败", status=Job.FAILED, error=str(error), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == Job.RUNNING)
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "running": running,
+                "queued": self._pending - running,
+            }
+
+    def _purge(self):
+        """清理过期的已结束任务（调用方持有锁）"""
+        expire_before = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at and job.finished_at < expire_before]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def create_job_backend(backend, **options):
+    """
+    根据配置创建任务后端
+    :param backend: 后端名称，目前支持 "thread"
+    """
+    if backend == "thread":
+        return ThreadPoolJobBackend(**options)
+    raise ValueError(f"不支持的任务后端: {backend}")
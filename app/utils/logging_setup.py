@@ -0,0 +1,133 @@
+import sys
+import json
+import queue
+import random
+import atexit
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+# **当前请求 ID：before_request 中设置，日志记录自动带上**
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - [%(request_id)s] %(name)s - %(message)s"
+
+
+class RequestContextFilter(logging.Filter):
+    """ 为每条日志补充 request_id（请求之外为 "-"） """
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+def parse_levels(spec):
+    """
+    解析按模块配置的日志级别
+    :param spec: "sqlalchemy.engine=WARNING,waitress=INFO"
+    :return: {"sqlalchemy.engine": "WARNING", "waitress": "INFO"}
+    """
+    levels = {}
+    for item in (spec or "").split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class LogQueue:
+    """
+    异步日志：根记录器只挂一个 QueueHandler，请求线程只把日志记录放入队列；
+    真正的输出（控制台、滚动文件）由 QueueListener 的后台线程完成，不占用请求时间。
+    """
+
+    def __init__(self, handlers):
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = QueueHandler(self.queue)
+        self.queue_handler.addFilter(RequestContextFilter())
+        self._handlers = list(handlers)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        with self._lock:
+            self._listener = QueueListener(self.queue, *self._handlers, respect_handler_level=True)
+            self._listener.start()
+
+    def stop(self):
+        """ 处理完队列中剩余的日志后停止后台线程 """
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+
+    def add_handler(self, handler):
+        """ 增加输出（例如 run.py 中的日志文件），重启后台线程使其生效 """
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.stop()
+        self._handlers.append(handler)
+        self.start()
+
+
+def setup_logging(level="INFO", module_levels=None):
+    """
+    配置日志：根记录器级别、按模块的级别、异步输出到标准输出
+    :param module_levels: {记录器名称: 级别}
+    :return: LogQueue
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = LogQueue([stream_handler])
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(log_queue.queue_handler)
+    root.setLevel(level)
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    log_queue.start()
+    atexit.register(log_queue.stop)
+    return log_queue
+
+
+class PayloadDumper:
+    """
+    大数据量调试输出（占位符字典、字段列表等）：默认关闭；开启后按 sample_rate 抽样，
+    并截断到 max_chars 个字符。关闭或未抽中时不做任何序列化，开销与数据大小无关。
+    """
+
+    def __init__(self, enabled=False, sample_rate=1.0, max_chars=2000):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+
+    def configure(self, enabled=None, sample_rate=None, max_chars=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if max_chars is not None:
+            self.max_chars = max_chars
+
+    def dump(self, logger, label, payload):
+        if not self.enabled or not logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        text = json.dumps(payload, ensure_ascii=False, default=str)
+        if len(text) > self.max_chars:
+            text = f"{text[:self.max_chars]}...（共 {len(text)} 个字符）"
+        logger.debug(f"{label}: {text}")
+
+
+payload_dumper = PayloadDumper()
+
+
+def dump_payload(logger, label, payload):
+    """ 按 payload_dumper 的配置输出调试数据 """
+    payload_dumper.dump(logger, label, payload)
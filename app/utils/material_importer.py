@@ -0,0 +1,268 @@
+import os
+import json
+import codecs
+import logging
+from collections import namedtuple
+
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy import bindparam, select
+
+logger = logging.getLogger(__name__)
+
+# **导入文件的列名 -> 数据库列名**
+MATERIAL_COLUMN_MAPPING = {
+    "物料代码": "material_code",
+    "物料名称": "material_name",
+    "型号规格": "model_specification",
+    "计量单位": "unit",
+}
+REQUIRED_COLUMNS = ["物料代码", "物料名称", "型号规格", "计量单位"]
+VALUE_COLUMNS = ["material_name", "model_specification", "unit"]
+# 与 MaterialInfo 的列长度一致，超长的行拒绝导入
+MAX_LENGTHS = {"material_code": 50, "material_name": 255, "model_specification": 255, "unit": 50}
+
+
+class MaterialImporter:
+    """
+    物料批量导入：
+    1. 用 pandas 向量化地清理列值（去空白、数字代码去掉 .0、空串视为空）并校验，不合格的行计入 rejected；
+    2. 按 material_code 去重（同一代码以最后一行为准）；
+    3. 每 chunk_size 个代码用一条 IN 查询取出已有记录，比较后分成 插入 / 更新 / 未变化；
+    4. 批量 INSERT、批量 UPDATE（executemany），由调用方在同一个事务里提交。
+
+    import_frame 可以多次调用（例如分块读取大文件），计数会累加。
+    """
+
+    def __init__(self, session, table, chunk_size=1000, max_rejected_details=100):
+        """
+        :param session: SQLAlchemy session
+        :param table: MaterialInfo.__table__
+        """
+        self.session = session
+        self.table = table
+        self.chunk_size = chunk_size
+        self.max_rejected_details = max_rejected_details
+        self.counts = {"total": 0, "inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0, "duplicated": 0}
+        self.rejected_rows = []
+
+    @staticmethod
+    def missing_columns(df):
+        """ 缺少的必要列（列名已去掉首尾空格） """
+        columns = set(str(column).strip() for column in df.columns)
+        return [column for column in REQUIRED_COLUMNS if column not in columns]
+
+    @staticmethod
+    def _clean_text(series):
+        """ 转为去掉首尾空白的字符串，空值/空串为 None；整数值的浮点数（Excel 中的数字代码）去掉 .0 """
+        if pd.api.types.is_float_dtype(series):
+            integral = series.notna() & (series % 1 == 0)
+            text = series.astype(object).where(~integral, series[integral].astype("int64").astype(str))
+        else:
+            text = series.astype(object)
+        text = text.where(text.notna(), None)
+        # pandas 3 的 map 会推断为 str 类型，其中的 None 又会变回 NaN，因此再转回 object
+        text = text.map(lambda value: str(value).strip() if value is not None else None).astype(object)
+        return text.where(text.notna() & (text != ""), None)
+
+    def normalize(self, df, row_offset=0):
+        """
+        清理并校验，返回 (合格且去重后的 DataFrame, 被拒绝的行数)
+        :param row_offset: 行号偏移（分块读取时用于报告原文件中的行号）
+        """
+        df = df.rename(columns=lambda column: str(column).strip()).reset_index(drop=True)
+        df = df[REQUIRED_COLUMNS].rename(columns=MATERIAL_COLUMN_MAPPING)
+        df = pd.DataFrame({column: self._clean_text(df[column]) for column in df.columns})
+        df["row_number"] = range(row_offset + 1, row_offset + len(df) + 1)
+
+        reasons = pd.Series(None, index=df.index, dtype=object)
+        reasons[df["material_name"].isna()] = "物料名称为空"
+        reasons[df["material_code"].isna()] = "物料代码为空"
+        for column, max_length in MAX_LENGTHS.items():
+            too_long = df[column].str.len() > max_length
+            reasons[too_long.fillna(False) & reasons.isna()] = f"{column} 超过 {max_length} 个字符"
+
+        rejected = df[reasons.notna()]
+        for row_number, reason in zip(rejected["row_number"], reasons[reasons.notna()]):
+            if len(self.rejected_rows) < self.max_rejected_details:
+                self.rejected_rows.append({"row": int(row_number), "reason": reason})
+
+        valid = df[reasons.isna()]
+        deduped = valid.drop_duplicates(subset="material_code", keep="last")
+        self.counts["duplicated"] += len(valid) - len(deduped)
+        return deduped, len(rejected)
+
+    def _existing(self, codes):
+        """ 已有记录：material_code -> (id, 名称, 规格, 单位)，同一代码有多条时取 id 最小的一条 """
+        table = self.table
+        existing = {}
+        for start in range(0, len(codes), self.chunk_size):
+            chunk = codes[start:start + self.chunk_size]
+            query = (select(table.c.id, table.c.material_code, *[table.c[column] for column in VALUE_COLUMNS])
+                     .where(table.c.material_code.in_(chunk))
+                     .order_by(table.c.id))
+            for row in self.session.execute(query):
+                existing.setdefault(row[1], (row[0],) + tuple(row[2:]))
+        return existing
+
+    def import_frame(self, df, row_offset=0):
+        """
+        导入一个 DataFrame（不提交事务）
+        :return: 本次的计数
+        """
+        counts = {"total": len(df), "inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0}
+        valid, counts["rejected"] = self.normalize(df, row_offset)
+
+        # 逐个把 NaN 换成 None：DataFrame 可能把列重新推断为 str 类型，NaN 既不能绑定到 PyMySQL，也不等于数据库中的 NULL
+        records = [tuple(None if pd.isna(value) else value for value in record)
+                   for record in zip(valid["material_code"], *[valid[column] for column in VALUE_COLUMNS])]
+        existing = self._existing([record[0] for record in records])
+
+        inserts, updates = [], []
+        for code, *values in records:
+            current = existing.get(code)
+            if current is None:
+                inserts.append(dict(zip(["material_code"] + VALUE_COLUMNS, [code] + values)))
+            elif tuple(current[1:]) != tuple(values):
+                updates.append(dict(zip(["b_id"] + VALUE_COLUMNS, [current[0]] + values)))
+            else:
+                counts["unchanged"] += 1
+
+        table = self.table
+        for start in range(0, len(inserts), self.chunk_size):
+            self.session.execute(table.insert(), inserts[start:start + self.chunk_size])
+        if updates:
+            statement = table.update().where(table.c.id == bindparam("b_id"))
+            for start in range(0, len(updates), self.chunk_size):
+                self.session.execute(statement, updates[start:start + self.chunk_size])
+        counts["inserted"], counts["updated"] = len(inserts), len(updates)
+
+        for key, value in counts.items():
+            self.counts[key] += value
+        return counts
+
+    def result(self):
+        """ 累计的导入结果 """
+        return {**self.counts, "rejected_rows": self.rejected_rows}
+
+    def restore(self, counts=None, rejected_rows=None):
+        """ 从检查点恢复累计结果（续传时使用） """
+        if counts:
+            self.counts.update(counts)
+        if rejected_rows:
+            self.rejected_rows = list(rejected_rows)[:self.max_rejected_details]
+
+
+# **流式读取的一块数据：DataFrame + 在原文件数据行中的起止位置（不含表头，左闭右开） + 已读进度（0~1）**
+MaterialChunk = namedtuple("MaterialChunk", ["frame", "start", "end", "fraction"])
+
+
+def detect_csv_encoding(file_path, block_size=1 << 20):
+    """ 逐块按 UTF-8 增量解码整个文件（内存占用固定），失败时按 GBK 读取 """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        with open(file_path, "rb") as handle:
+            for block in iter(lambda: handle.read(block_size), b""):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "gbk"
+
+
+def _iter_csv_chunks(file_path, chunk_size, skip_rows):
+    total_size = os.path.getsize(file_path) or 1
+    with open(file_path, "rb") as handle:
+        reader = pd.read_csv(handle, encoding=detect_csv_encoding(file_path), chunksize=chunk_size,
+                             skiprows=(lambda index: 0 < index <= skip_rows) if skip_rows else None)
+        start = skip_rows
+        for frame in reader:
+            end = start + len(frame)
+            yield MaterialChunk(frame, start, end, min(handle.tell() / total_size, 1.0))
+            start = end
+
+
+def _unique_columns(header):
+    """ 表头去空格、补空列名，重名的列按 pandas 的方式加 .1 .2 后缀 """
+    columns, seen = [], {}
+    for index, value in enumerate(header):
+        name = str(value).strip() if value is not None else f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def _iter_excel_chunks(file_path, chunk_size, skip_rows, header_row):
+    # 只读模式按行解析 XML，不把整个工作表载入内存
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header = next(sheet.iter_rows(min_row=header_row, max_row=header_row, values_only=True), None)
+        if header is None:
+            return
+        columns = _unique_columns(header)
+        total_rows = max((sheet.max_row or 0) - header_row, 1)
+
+        batch, start, position = [], skip_rows, skip_rows
+        for values in sheet.iter_rows(min_row=header_row + 1 + skip_rows, values_only=True):
+            position += 1
+            # 整行为空（例如带格式的空行）不导入，但计入位置，保证续传时行号一致
+            if any(value is not None for value in values):
+                batch.append(values[:len(columns)])
+            if len(batch) >= chunk_size:
+                yield MaterialChunk(pd.DataFrame(batch, columns=columns), start, position,
+                                    min(position / total_rows, 1.0))
+                batch, start = [], position
+        if batch or position > start:
+            yield MaterialChunk(pd.DataFrame(batch, columns=columns), start, position, 1.0)
+    finally:
+        workbook.close()
+
+
+def iter_material_chunks(file_path, chunk_size=1000, skip_rows=0, header_row=2):
+    """
+    流式读取物料文件，每次返回 chunk_size 行（MaterialChunk），内存占用与文件大小无关：
+    - CSV：pandas 分块读取（UTF-8，失败时 GBK）；
+    - xlsx：openpyxl 只读模式逐行读取，表头在第 header_row 行（与 read_excel(header=1) 一致）。
+
+    :param skip_rows: 跳过前面已导入的数据行数（续传）
+    """
+    if file_path.lower().endswith(".csv"):
+        return _iter_csv_chunks(file_path, chunk_size, skip_rows)
+    return _iter_excel_chunks(file_path, chunk_size, skip_rows, header_row)
+
+
+class ImportCheckpoint:
+    """
+    后台导入的检查点（JSON 文件）：记录源文件、已提交的数据行数和累计结果。
+    每批数据提交事务后再写检查点，写入用 临时文件 + os.replace 保证原子性；
+    若提交后、写检查点前进程退出，续传时会重新导入最后一批，导入是幂等的（已有且未变化的行计为 unchanged）。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as handle:
+            self.data = json.load(handle)
+        return self.data
+
+    def save(self, **fields):
+        self.data.update(fields)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.data, handle, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        if self.exists:
+            os.remove(self.path)
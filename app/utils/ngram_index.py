@@ -0,0 +1,90 @@
+import threading
+from array import array
+
+_EMPTY = array("i")
+
+
+class NgramIndex:
+    """
+    进程内 n-gram 子串索引（默认 2-gram，适合 物料名称 这类中文短文本）。
+    - 每个字段保存 小写文本 和 n-gram -> 文档 ID 的倒排列表（array('i')，比 set 省内存）；
+    - 查询时取查询词各 n-gram 中最短的倒排列表作为候选，再用小写文本逐个校验子串，结果与 ILIKE '%词%' 一致
+      （区别：查询词中的 % 和 _ 按普通字符处理）；
+    - 查询词短于 n 个字符时无法使用倒排列表，改为扫描该字段的全部文本；
+    - 修改/删除文档只更新文本，旧的倒排项保留（校验时自然被过滤），重建索引时清理。
+    """
+
+    def __init__(self, fields, n=2):
+        self.fields = tuple(fields)
+        self.n = n
+        self._texts = {field: {} for field in self.fields}
+        self._postings = {field: {} for field in self.fields}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._texts[self.fields[0]]) if self.fields else 0
+
+    def _grams(self, text):
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, doc_id, values):
+        """
+        添加或更新文档
+        :param values: {字段: 值}，值为 None 或空串时该字段不可被搜索到
+        """
+        with self._lock:
+            for field in self.fields:
+                value = values.get(field)
+                text = str(value).lower() if value not in (None, "") else None
+                texts = self._texts[field]
+                if text is None:
+                    texts.pop(doc_id, None)
+                    continue
+                old_text = texts.get(doc_id)
+                texts[doc_id] = text
+                old_grams = self._grams(old_text) if old_text else set()
+                postings = self._postings[field]
+                for gram in self._grams(text) - old_grams:
+                    posting = postings.get(gram)
+                    if posting is None:
+                        postings[gram] = posting = array("i")
+                    posting.append(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            for texts in self._texts.values():
+                texts.pop(doc_id, None)
+
+    def search(self, terms, exact=None):
+        """
+        同时满足所有条件的文档 ID（升序）
+        :param terms: {字段: 子串}，忽略大小写
+        :param exact: {字段: 值}，忽略大小写的完全匹配
+        """
+        terms = {field: str(term).lower() for field, term in terms.items()}
+        exact = {field: str(value).lower() for field, value in (exact or {}).items()}
+        with self._lock:
+            candidates = None
+            for field, term in terms.items():
+                grams = self._grams(term)
+                if not grams:
+                    continue
+                postings = self._postings[field]
+                shortest = min((postings.get(gram, _EMPTY) for gram in grams), key=len)
+                if candidates is None or len(shortest) < len(candidates):
+                    candidates = shortest
+            if candidates is None:
+                # 查询词都短于 n：扫描第一个条件字段的全部文本
+                field = next(iter(terms or exact))
+                candidates = self._texts[field].keys()
+
+            contains = [(self._texts[field], term) for field, term in terms.items()]
+            equals = [(self._texts[field], value) for field, value in exact.items()]
+            if len(contains) == 1 and not equals:
+                texts, term = contains[0]
+                matched = {doc_id for doc_id in candidates if term in texts.get(doc_id, "")}
+            else:
+                matched = {doc_id for doc_id in candidates
+                           if all(term in texts.get(doc_id, "") for texts, term in contains)
+                           and all(texts.get(doc_id) == value for texts, value in equals)}
+            return sorted(matched)
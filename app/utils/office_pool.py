@@ -0,0 +1,408 @@
+import os
+import sys
+import time
+import queue
+import shutil
+import signal
+import socket
+import logging
+import tempfile
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# **导出过滤器：目标格式 -> {源文件扩展名: 过滤器}，"*" 为默认**
+EXPORT_FILTERS = {
+    "pdf": {
+        ".xls": "calc_pdf_Export",
+        ".xlsx": "calc_pdf_Export",
+        ".csv": "calc_pdf_Export",
+        "*": "writer_pdf_Export",
+    },
+    "xlsx": {"*": "Calc MS Excel 2007 XML"},
+    "docx": {"*": "MS Word 2007 XML"},
+}
+
+
+class ConversionError(Exception):
+    """文档转换失败"""
+
+
+class ConversionTimeout(ConversionError):
+    """文档转换超时（工作进程已被结束并重启）"""
+
+
+class PoolBusyError(ConversionError):
+    """等待转换的任务数已达上限"""
+
+
+class ConverterNotConfiguredError(ConversionError):
+    """未配置 LibreOffice，无法转换"""
+
+
+def output_path_for(source_path, target_format, output_dir=None):
+    output_dir = output_dir or os.path.dirname(os.path.abspath(source_path))
+    base = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(output_dir, f"{base}.{target_format}")
+
+
+def _kill_process(process):
+    """结束 soffice 及其子进程"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def _popen(command, **kwargs):
+    """独立进程组启动，超时时可以整体结束"""
+    if os.name == "posix":
+        kwargs["start_new_session"] = True
+    else:
+        kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+    return subprocess.Popen(command, **kwargs)
+
+
+def _profile_url(profile_dir):
+    """-env:UserInstallation 需要 file:// URL"""
+    path = os.path.abspath(profile_dir).replace("\\", "/")
+    return "file:///" + path.lstrip("/")
+
+
+class OfficeWorker:
+    """转换工作者接口：每个工作者同一时间只处理一个文件"""
+
+    name = "worker"
+
+    def start(self):
+        pass
+
+    def convert(self, source_path, target_format, output_dir, timeout):
+        raise NotImplementedError
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def stop(self):
+        pass
+
+
+class StubWorker(OfficeWorker):
+    """
+    测试用转换器：不调用 LibreOffice，直接把源文件复制为目标扩展名。
+    接口与真实转换器一致，便于在没有安装 LibreOffice 的环境中联调；只在显式配置 OFFICE_POOL_MODE=stub 时使用，
+    生成的"PDF"实际是原文件，不能用于生产环境。
+    """
+
+    def __init__(self, index=0):
+        self.name = f"stub-{index}"
+
+    def convert(self, source_path, target_format, output_dir, timeout):
+        target_path = output_path_for(source_path, target_format, output_dir)
+        shutil.copyfile(source_path, target_path)
+        return target_path
+
+
+class SubprocessWorker(OfficeWorker):
+    """
+    每次转换启动一个 soffice --convert-to（没有 UNO 时的后备方案）。
+    每个工作者使用独立的用户配置目录，避免并发启动时争用默认配置；超时时结束整个进程组。
+    """
+
+    def __init__(self, soffice_path, profile_dir, index=0):
+        self.soffice_path = soffice_path
+        self.profile_dir = profile_dir
+        self.name = f"soffice-{index}"
+
+    def convert(self, source_path, target_format, output_dir, timeout):
+        os.makedirs(output_dir, exist_ok=True)
+        command = [
+            self.soffice_path,
+            f"-env:UserInstallation={_profile_url(self.profile_dir)}",
+            "--headless", "--invisible", "--nologo", "--norestore",
+            "--convert-to", target_format,
+            "--outdir", output_dir,
+            os.path.abspath(source_path),
+        ]
+        process = _popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            _, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process(process)
+            raise ConversionTimeout(f"LibreOffice 转换超时（{timeout}s）: {source_path}")
+
+        target_path = output_path_for(source_path, target_format, output_dir)
+        if process.returncode != 0 or not os.path.exists(target_path):
+            raise ConversionError(f"LibreOffice 转换失败: {stderr}")
+        return target_path
+
+
+class UnoWorker(OfficeWorker):
+    """
+    常驻的 soffice 监听进程，通过 UNO 连接转换文件，省去每次 1~3 秒的冷启动。
+    每个工作者独占一个端口和一个用户配置目录。
+    """
+
+    def __init__(self, soffice_path, profile_dir, port, index=0, start_timeout=60):
+        self.soffice_path = soffice_path
+        self.profile_dir = profile_dir
+        self.port = port
+        self.start_timeout = start_timeout
+        self.name = f"uno-{index}:{port}"
+        self.process = None
+        self.desktop = None
+
+    def start(self):
+        import uno
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        command = [
+            self.soffice_path,
+            f"-env:UserInstallation={_profile_url(self.profile_dir)}",
+            "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck",
+            f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+        ]
+        self.process = _popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline = time.time() + self.start_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise ConversionError(f"soffice 启动失败（{self.name}），退出码 {self.process.returncode}")
+            try:
+                context = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext")
+                self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+                logger.info(f"✅ LibreOffice 工作进程已就绪: {self.name}")
+                return
+            except Exception:
+                if time.time() > deadline:
+                    self.stop()
+                    raise ConversionError(f"连接 soffice 超时（{self.name}）")
+                time.sleep(0.5)
+
+    def convert(self, source_path, target_format, output_dir, timeout):
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            self.restart()
+
+        result = {}
+
+        def run():
+            try:
+                result["path"] = self._convert(source_path, target_format, output_dir)
+            except Exception as e:
+                result["error"] = e
+
+        # UNO 调用是阻塞的，放到辅助线程里执行以便超时控制；超时后结束 soffice，阻塞的调用随之返回
+        thread = threading.Thread(target=run, name=f"{self.name}-convert", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error(f"❌ LibreOffice 转换超时，重启工作进程: {self.name}")
+            self.restart()
+            raise ConversionTimeout(f"LibreOffice 转换超时（{timeout}s）: {source_path}")
+        if "error" in result:
+            # 连接断开等错误之后工作进程状态未知，直接重启
+            self.restart()
+            raise ConversionError(f"LibreOffice 转换失败: {result['error']}")
+        return result["path"]
+
+    def _convert(self, source_path, target_format, output_dir):
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def props(**values):
+            items = []
+            for key, value in values.items():
+                prop = PropertyValue()
+                prop.Name = key
+                prop.Value = value
+                items.append(prop)
+            return tuple(items)
+
+        filters = EXPORT_FILTERS.get(target_format)
+        if filters is None:
+            raise ConversionError(f"不支持的目标格式: {target_format}")
+        extension = os.path.splitext(source_path)[1].lower()
+        filter_name = filters.get(extension, filters["*"])
+
+        os.makedirs(output_dir, exist_ok=True)
+        target_path = output_path_for(source_path, target_format, output_dir)
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(source_path)), "_blank", 0, props(Hidden=True))
+        if document is None:
+            raise ConversionError(f"LibreOffice 无法打开文件: {source_path}")
+        try:
+            # **导出前刷新目录等索引，页码与最终排版一致**
+            if hasattr(document, "getDocumentIndexes"):
+                indexes = document.getDocumentIndexes()
+                for i in range(indexes.getCount()):
+                    indexes.getByIndex(i).update()
+            document.storeToURL(uno.systemPathToFileUrl(target_path),
+                                props(FilterName=filter_name, Overwrite=True))
+        finally:
+            document.close(True)
+        return target_path
+
+    def stop(self):
+        _kill_process(self.process)
+        self.process = None
+        self.desktop = None
+
+
+class OfficePool:
+    """
+    LibreOffice 转换池：
+    - size 个工作者，每个使用独立的用户配置目录（UNO 模式下还有独立端口）；
+    - 等待中的任务超过 queue_size 时直接拒绝（PoolBusyError）；
+    - 每个任务有超时，超时的工作者被结束并重启；
+    - warm_up 时在后台预先启动所有工作者；
+    - unavailable 不为空时（auto 模式下未配置 LibreOffice）没有工作者，转换直接报错。
+    """
+
+    def __init__(self, workers, queue_size=10, timeout=120, unavailable=None):
+        self.workers = workers
+        self.unavailable = unavailable
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        self._waiting = 0
+        self._lock = threading.Lock()
+        # 预热期间转换请求先等待，避免与预热同时启动同一个工作者
+        self._warmed = threading.Event()
+        self._warmed.set()
+        for worker in workers:
+            self._idle.put(worker)
+
+    @classmethod
+    def create(cls, mode="auto", soffice_path=None, lib_path=None, size=2, queue_size=10, timeout=120,
+               base_port=2002, profile_folder=None):
+        """
+        :param mode: auto（有 UNO 用常驻进程，否则每次启动 soffice）/ uno / subprocess / stub（仅测试）
+        """
+        if mode == "auto":
+            if not soffice_path:
+                # **不回退到 stub：stub 只是复制文件，会把 .docx 改名当作 .pdf 返回给用户**
+                reason = "未配置 LibreOffice 路径（LIBREOFFICE_PATH），无法转换文档"
+                logger.error(f"❌ {reason}")
+                return cls([], queue_size=queue_size, timeout=timeout, unavailable=reason)
+            else:
+                mode = "uno" if cls._uno_available(lib_path) else "subprocess"
+
+        if mode == "uno" and not cls._uno_available(lib_path):
+            raise ValueError("未找到 UNO 模块，请检查 LIBREOFFICE_LIB_PATH")
+
+        profile_folder = profile_folder or os.path.join(tempfile.gettempdir(), "office_profiles")
+        workers = []
+        for index in range(size):
+            profile_dir = os.path.join(profile_folder, f"worker_{index}")
+            if mode == "uno":
+                workers.append(UnoWorker(soffice_path, profile_dir, cls._free_port(base_port + index), index))
+            elif mode == "subprocess":
+                workers.append(SubprocessWorker(soffice_path, profile_dir, index))
+            elif mode == "stub":
+                workers.append(StubWorker(index))
+            else:
+                raise ValueError(f"不支持的转换模式: {mode}")
+        logger.info(f"LibreOffice 转换池：模式 {mode}，工作者 {size} 个")
+        return cls(workers, queue_size=queue_size, timeout=timeout)
+
+    @staticmethod
+    def _uno_available(lib_path):
+        if lib_path and lib_path not in sys.path:
+            sys.path.append(lib_path)
+        try:
+            import uno  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def _free_port(preferred):
+        """优先使用配置的端口，被占用时由系统分配"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind(("127.0.0.1", preferred))
+                return preferred
+            except OSError:
+                s.bind(("127.0.0.1", 0))
+                return s.getsockname()[1]
+
+    def warm_up(self, background=True):
+        """预先启动所有工作者"""
+        def run():
+            for worker in self.workers:
+                try:
+                    worker.start()
+                except Exception as e:
+                    logger.error(f"❌ LibreOffice 工作进程预热失败: {worker.name}: {e}")
+            self._warmed.set()
+
+        self._warmed.clear()
+        if background:
+            threading.Thread(target=run, name="office-pool-warmup", daemon=True).start()
+        else:
+            run()
+
+    def convert(self, source_path, target_format, output_dir=None, timeout=None):
+        """
+        转换文件，返回生成文件的路径
+        :param target_format: 目标格式扩展名，例如 "pdf"、"xlsx"
+        """
+        if self.unavailable:
+            raise ConverterNotConfiguredError(self.unavailable)
+        if not os.path.exists(source_path):
+            raise ConversionError(f"文件不存在: {source_path}")
+        output_dir = output_dir or os.path.dirname(os.path.abspath(source_path))
+        timeout = timeout or self.timeout
+
+        with self._lock:
+            if self._waiting >= self.queue_size + len(self.workers):
+                raise PoolBusyError(f"文档转换队列已满（{self.queue_size}），请稍后再试")
+            self._waiting += 1
+        try:
+            self._warmed.wait(timeout)
+            try:
+                worker = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise ConversionTimeout(f"等待空闲的 LibreOffice 工作进程超时（{timeout}s）")
+            try:
+                started = time.time()
+                target_path = worker.convert(source_path, target_format, output_dir, timeout)
+                logger.info(f"✅ 转换完成（{worker.name}，{time.time() - started:.2f}s）: {target_path}")
+                return target_path
+            finally:
+                self._idle.put(worker)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self.workers),
+                "idle": self._idle.qsize(),
+                "waiting": self._waiting,
+                "queue_size": self.queue_size,
+                "available": not self.unavailable,
+            }
+
+    def shutdown(self):
+        for worker in self.workers:
+            try:
+                worker.stop()
+            except Exception:
+                pass
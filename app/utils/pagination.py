@@ -0,0 +1,106 @@
+import json
+import time
+import base64
+import logging
+import threading
+from bisect import bisect_right
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(last_id):
+    """ 游标：上一页最后一条记录的 ID（base64 编码，前端原样传回即可） """
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    :return: 上一页最后一条记录的 ID；cursor 为空时返回 None（第一页）
+    :raises ValueError: 游标格式错误
+    """
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(payload)["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"无效的游标: {cursor}")
+    if not isinstance(last_id, int):
+        raise ValueError(f"无效的游标: {cursor}")
+    return last_id
+
+
+def keyset_query(query, id_column, after_id, page_size):
+    """
+    按 ID 升序的游标分页：WHERE id > 上一页最后的 ID ORDER BY id LIMIT page_size + 1，
+    走主键索引，不需要 OFFSET 扫描，翻到多深都一样快。
+    :return: (当前页的记录, 下一页游标或 None)
+    """
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    items = query.order_by(id_column).limit(page_size + 1).all()
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(getattr(items[-1], id_column.key))
+
+
+def keyset_ids(ids, after_id, page_size):
+    """
+    在已排序的 ID 列表（例如搜索索引的结果）上做游标分页
+    :return: (当前页的 ID, 下一页游标或 None)
+    """
+    start = bisect_right(ids, after_id) if after_id is not None else 0
+    page_ids = ids[start:start + page_size]
+    has_more = start + page_size < len(ids)
+    return page_ids, encode_cursor(page_ids[-1]) if has_more and page_ids else None
+
+
+class CountCache:
+    """
+    列表总数的短期缓存：同一查询条件的 COUNT(*) 在 ttl 秒内只执行一次。
+    键的第一项是命名空间（例如表名），写入后按命名空间清除；其他进程的写入最多延迟 ttl 秒反映到总数上。
+    """
+
+    def __init__(self, ttl=30, max_entries=512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, counter):
+        """
+        :param key: (命名空间, 查询条件...)，必须可哈希
+        :param counter: 缓存未命中时调用，返回总数
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+        total = counter()
+        with self._lock:
+            self.misses += 1
+            if len(self._entries) >= self.max_entries:
+                self._purge(now)
+            self._entries[key] = (total, now + self.ttl)
+        return total
+
+    def _purge(self, now):
+        """ 清理过期条目，仍然太多时全部清空（调用方持有锁） """
+        for key in [key for key, entry in self._entries.items() if entry[1] <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+    def invalidate(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == namespace]:
+                    del self._entries[key]
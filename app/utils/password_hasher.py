@@ -0,0 +1,122 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusyError(Exception):
+    """等待密码计算的请求数已达上限，或排队超时"""
+
+
+class PasswordHasher:
+    """
+    bcrypt 计算池：密码加密 / 校验（每次约 250ms CPU）在独立的线程池中执行，不占满 waitress 的请求线程。
+    - workers 个线程同时计算（bcrypt 计算时释放 GIL）；
+    - 排队 + 计算中的请求超过 workers + queue_size 时直接拒绝（HasherBusyError），
+      因此登录高峰最多占用这么多个请求线程，其他接口不受影响；
+    - 排队超过 timeout 秒仍未开始计算时放弃（HasherBusyError）；
+    - stats() 返回排队等待时间和计算时间的统计。
+    """
+
+    def __init__(self, bcrypt, workers=2, queue_size=4, timeout=5, log_rounds=12, window=1000):
+        """
+        :param bcrypt: flask_bcrypt.Bcrypt 实例
+        :param log_rounds: 当前的 cost；校验通过的旧哈希 cost 不同时 needs_rehash() 为 True
+        :param window: 用于计算分位数的最近样本数
+        """
+        self.bcrypt = bcrypt
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.log_rounds = log_rounds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+
+    def _call(self, func, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise HasherBusyError(f"密码校验排队已满（{self.queue_size}），请稍后再试")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+        started = threading.Event()
+
+        def run():
+            started.set()
+            run_started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(run_started - submitted, time.perf_counter() - run_started)
+
+        try:
+            future = self._executor.submit(run)
+            # 只对排队时间设超时：已经开始计算的请求等待其完成
+            if not started.wait(self.timeout) and future.cancel():
+                with self._lock:
+                    self.timeouts += 1
+                raise HasherBusyError(f"等待密码校验超时（{self.timeout}s），请稍后再试")
+            return future.result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record(self, wait, run):
+        with self._lock:
+            self.completed += 1
+            self.max_wait = max(self.max_wait, wait)
+            self._waits.append(wait)
+            self._runs.append(run)
+
+    def hash(self, password):
+        """ 加密密码，返回 utf-8 字符串 """
+        return self._call(self.bcrypt.generate_password_hash, password).decode('utf-8')
+
+    def verify(self, pw_hash, password):
+        return self._call(self.bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """ 哈希的 cost（$2b$<cost>$...）与当前配置不同 """
+        parts = pw_hash.split('$')
+        return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != self.log_rounds
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {"avg_ms": 0, "p50_ms": 0, "p95_ms": 0}
+        ordered = sorted(samples)
+        return {
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        }
+
+    def stats(self):
+        with self._lock:
+            waits, runs = list(self._waits), list(self._runs)
+            data = {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "max_wait_ms": round(self.max_wait * 1000, 1),
+            }
+        data["wait"] = self._summary(waits)
+        data["run"] = self._summary(runs)
+        return data
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -7,12 +7,12 @@ def process_section_by_marker(doc_path, marker_text, delete_section=True):
     如果 delete_section 为 True，则删除该标志段落及其后的所有内容；
     如果 delete_section 为 False，则仅删除该标志段落，保留其后的内容。
 
-    :param doc_path: python‑docx 的 Document 对象
+    :param doc_path: 文档路径，或 python‑docx 的 Document 对象（传入对象时只修改内存，不保存）
     :param marker_text: 标志段落中包含的文本，用于定位该段落
     :param delete_section: 布尔值，如果为 True 删除标志段落及其之后所有内容，
                            如果为 False 仅删除标志段落
     """
-    doc = Document(doc_path)
+    doc = Document(doc_path) if isinstance(doc_path, str) else doc_path
 
     def delete_paragraph(paragraph):
         """
@@ -45,7 +45,8 @@ def process_section_by_marker(doc_path, marker_text, delete_section=True):
         # 仅删除标志段落，保留后续内容
         delete_paragraph(doc.paragraphs[marker_index])
         print("仅删除了标志段落，保留了其后的内容。")
-    doc.save(doc_path)
+    if isinstance(doc_path, str):
+        doc.save(doc_path)
 
 
 # 示例：使用该方法处理 Word 文档
@@ -1,14 +1,19 @@
 from docx import Document
+from docx.table import _Row
+
+from app.utils.document_outline import DocumentOutline
+from app.utils.table_operation import TableRowIndex
 
 
 class SpecWordTableProcessor:
-    def __init__(self, file_path):
+    def __init__(self, file_path=None, doc=None):
         """
         初始化工具类
         :param file_path: str, 输入的 Word 文档路径
+        :param doc: Document, 已加载的文档对象（流水线模式），传入时不再从 file_path 读取
         """
         self.file_path = file_path
-        self.doc = Document(file_path)
+        self.doc = doc if doc is not None else Document(file_path)
 
     def process_table(self, selected_items, target_table_index=None, table_header=None):
         """
@@ -18,8 +23,8 @@ class SpecWordTableProcessor:
         :param table_header: str, 用于识别目标表格的表头文本，如果提供会优先通过表头匹配表格
         :return: None
         """
-        # 提取已选择的项目名称
-        selected_names = [item['name'] for item in selected_items]
+        # 已选择的项目：名称 -> 项目（同名时以最后一个为准）
+        selected_map = {item['name']: item for item in selected_items}
         # Map for replacing True/False to symbols
         boolean_map = {True: '√', False: ''}
         # 定位目标表格
@@ -38,32 +43,34 @@ class SpecWordTableProcessor:
         if not target_table:
             raise ValueError("未找到符合条件的表格，请检查参数 `table_header` 或 `target_table_index` 是否正确。")
 
-        # 遍历目标表格并处理数据
-        rows_to_delete = []  # 保存需要删除的行
-        for row_idx, row in enumerate(target_table.rows[1:], start=1):  # 跳过表头
-            cell_name = row.cells[0].text.strip()
-            if cell_name not in selected_names:
+        # **行索引：一次遍历得到每行首列文字，查找/删除不再逐行创建代理对象**
+        row_index = TableRowIndex(target_table)
+        rows_to_delete = []  # 需要删除的行号
+        delete_titles = []  # 对应需要删除的二级标题
+        for row_idx in range(1, len(row_index.rows)):  # 跳过表头
+            cell_name = row_index.first_cell_texts[row_idx]
+            item = selected_map.get(cell_name)
+            if item is None:
                 # 如果不在已选择项目中，标记为删除
-                rows_to_delete.append(row)
+                rows_to_delete.append(row_idx)
+                delete_title = cell_name
+                if delete_title == "外形尺寸":
+                    delete_title = "外形尺寸（单位：mm）"
+                delete_titles.append(delete_title)
             else:
                 # 如果在已选择项目中，更新内容
-                for item in selected_items:
-                    if item['name'] == cell_name:
-                        row.cells[1].text = boolean_map[item['pcb']]
-                        row.cells[2].text = boolean_map[item['beforeSeal']]
-                        row.cells[3].text = boolean_map[item['afterLabel']]
-                        row.cells[4].text = item['samplePlan']
-
-                        for cell in row.cells:
-                            set_cell_font(cell, font_name="Times New Roman", font_size=12)  # 小四对应 12 磅
-
-        # 删除不需要的行
-        for row in rows_to_delete:
-            delete_title = row.cells[0].text
-            if delete_title == "外形尺寸":
-                delete_title = "外形尺寸（单位：mm）"
-            delete_section_by_title(self.doc,target_title=delete_title,heading_level="Heading 2")
-            target_table._element.remove(row._element)
+                row = _Row(row_index.rows[row_idx], target_table)
+                row.cells[1].text = boolean_map[item['pcb']]
+                row.cells[2].text = boolean_map[item['beforeSeal']]
+                row.cells[3].text = boolean_map[item['afterLabel']]
+                row.cells[4].text = item['samplePlan']
+
+                for cell in row.cells:
+                    set_cell_font(cell, font_name="Times New Roman", font_size=12)  # 小四对应 12 磅
+
+        # 删除不需要的行，对应的二级标题章节（含表格）基于同一份大纲索引一次删除
+        row_index.delete_rows(rows_to_delete)
+        delete_sections_by_title(self.doc, delete_titles, heading_level="Heading 2")
 
     def save(self, output_path):
         """
@@ -75,42 +82,28 @@ class SpecWordTableProcessor:
 
 def delete_section_by_title(doc, target_title, heading_level="Heading 1"):
     """
-    删除 Word 文档中特定标题及其后续内容，直到下一个相同级别的标题。
+    删除 Word 文档中特定标题及其后续内容，直到下一个相同级别（或更高级别）的标题。
     包括删除段落和表格。
 
     :param doc: Word 文档对象
     :param target_title: 要删除的标题文本
     :param heading_level: 要匹配的标题级别（默认 "Heading 1"）
     """
+    delete_sections_by_title(doc, [target_title], heading_level)
 
-    def delete_element(element):
-        """删除指定的元素（段落或表格）"""
-        parent = element.getparent()
-        if parent is not None:
-            parent.remove(element)
-
-    delete_flag = False  # 标志是否处于删除范围
-
-    # 遍历文档的 body 元素（包括段落和表格）
-    for element in list(doc._element.body):
-        if element.tag.endswith("p"):  # 段落
-            # 获取段落对象（从 XML 元素映射回段落）
-            para = next((p for p in doc.paragraphs if p._element == element), None)
-            if para is None:
-                continue
-
-            if para.style.name == heading_level:  # 检查是否是标题
-                if para.text.strip() == target_title:  # 找到目标标题
-                    delete_flag = True
-                else:
-                    delete_flag = False  # 遇到下一个同级标题，停止删除
-
-            if delete_flag:
-                delete_element(element)
-
-        elif element.tag.endswith("tbl"):  # 表格
-            if delete_flag:
-                delete_element(element)
+
+def delete_sections_by_title(doc, target_titles, heading_level="Heading 1"):
+    """
+    批量删除多个同级章节（包括段落和表格），只建立一次大纲索引。
+
+    :param doc: Word 文档对象
+    :param target_titles: 要删除的标题文本列表
+    :param heading_level: 要匹配的标题级别（默认 "Heading 1"）
+    """
+    if not target_titles:
+        return 0
+    level = int(heading_level.rsplit(" ", 1)[-1])
+    return DocumentOutline(doc).delete_sections([(level, title) for title in target_titles])
 
 
 from docx.shared import Pt
@@ -1,3 +1,5 @@
+import copy
+
 from docx import Document
 from docx.shared import Pt
 from docx.oxml.ns import qn
@@ -14,35 +16,56 @@ def add_row_with_auto_serial(doc, table_index, cell_values):
       - 第 1 列采用 Calibri 10pt，其余列用“宋体 小四(12pt)”。
       - 所有单元格文本均水平居中。
     """
+    add_rows_with_auto_serial(doc, table_index, [cell_values])
+
+
+def add_rows_with_auto_serial(doc, table_index, rows):
+    """
+    批量添加多行（格式与 add_row_with_auto_serial 相同）：
+    只构造并设置一次样式的原型行 <w:tr>，每行深拷贝原型后直接写入文字和序号，最后一次性追加到表格，
+    耗时与行数成线性关系，不再为每行创建 python-docx 代理对象。
+
+    :param rows: list[list]，每行的数据（不包含第一列序号）
+    """
     if table_index >= len(doc.tables):
         raise ValueError(f"表格索引 {table_index} 超出范围，当前文档仅有 {len(doc.tables)} 个表格")
+    if not rows:
+        return
 
     table = doc.tables[table_index]
+    tbl = table._tbl
 
-    # 新增一行
-    new_row = table.add_row()
-
-    # 计算序号，假设表第 1 行是表头，则序号 = 当前行数 - 1
-    # 如果表没有表头，想让第一行就是“1.”，可改为 len(table.rows)
-    serial_number = len(table.rows) - 1
-    new_row.cells[0].text = f"{serial_number}."
+    # 序号接着已有的行编号，假设表第 1 行是表头
+    first_serial = len(tbl.tr_lst)
 
-    # 设置第一列(序号)为 Calibri 10pt，并居中
-    for paragraph in new_row.cells[0].paragraphs:
+    # **原型行：通过 python-docx 构造一次并设置好字体、居中，然后从表格中取下**
+    prototype = table.add_row()
+    prototype.cells[0].text = "0."
+    for paragraph in prototype.cells[0].paragraphs:
         paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER  # 水平居中
         for run in paragraph.runs:
             run.font.name = "Calibri"
             run.font.size = Pt(10)
-
-    # 从第二列开始填充数据，并把文本设置为“宋体 小四 + 居中”
-    for col_idx in range(1, len(new_row.cells)):
-        if (col_idx - 1) < len(cell_values):
-            new_row.cells[col_idx].text = str(cell_values[col_idx - 1])
-        else:
-            new_row.cells[col_idx].text = ""
-
-        # 给单元格里的段落和 run 设置居中、字体和大小
-        _apply_font_style(new_row.cells[col_idx], font_name="宋体", font_size_pt=12)
+    for cell in prototype.cells[1:]:
+        cell.text = "0"
+        _apply_font_style(cell, font_name="宋体", font_size_pt=12)
+    prototype_tr = prototype._tr
+    tbl.remove(prototype_tr)
+
+    new_trs = []
+    for offset, cell_values in enumerate(rows):
+        tr = copy.deepcopy(prototype_tr)
+        for col_idx, tc in enumerate(tr.tc_lst):
+            if col_idx == 0:
+                text = f"{first_serial + offset}."
+            elif (col_idx - 1) < len(cell_values):
+                text = str(cell_values[col_idx - 1])
+            else:
+                text = ""
+            # 每个单元格只有一个段落一个 run，run 的 rPr 保留，只替换文字（\t、\n 转为制表符和换行）
+            tc.p_lst[0].r_lst[0].text = text
+        new_trs.append(tr)
+    tbl.extend(new_trs)
 
 
 def _apply_font_style(cell, font_name="宋体", font_size_pt=12):
@@ -63,6 +86,36 @@ def _apply_font_style(cell, font_name="宋体", font_size_pt=12):
     # cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
 
 
+class TableRowIndex:
+    """
+    表格行索引：一次遍历表格 XML，记录每行的元素和首列文字，
+    读取和删除都基于这份索引，不再为每行创建 python-docx 行/单元格代理对象。
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.tbl = table._tbl
+        self.rebuild()
+
+    @staticmethod
+    def _cell_text(tc):
+        # 与 python-docx 的 cell.text 一致：段落之间用换行连接
+        return "\n".join("".join(t.text or "" for t in p.iter(qn("w:t"))) for p in tc.p_lst)
+
+    def rebuild(self):
+        self.rows = list(self.tbl.tr_lst)
+        self.first_cell_texts = [self._cell_text(tr.tc_lst[0]).strip() if tr.tc_lst else "" for tr in self.rows]
+
+    def delete_rows(self, row_indices):
+        """一次删除多行（行号基于当前索引），删除后重建索引"""
+        doomed = set(row_indices)
+        if not doomed:
+            return
+        for row_idx in sorted(doomed, reverse=True):
+            self.tbl.remove(self.rows[row_idx])
+        self.rebuild()
+
+
 def main():
     # 1. 读取 Word 文档
     doc_path = "technical_document_template.docx"
@@ -78,9 +131,8 @@ def main():
         ["纸质合格证", "/"],
     ]
 
-    # 3. 循环添加行
-    for row_data in rows_to_add:
-        add_row_with_auto_serial(doc, table_index=3, cell_values=row_data)
+    # 3. 批量添加行
+    add_rows_with_auto_serial(doc, table_index=3, rows=rows_to_add)
 
     # 4. 保存
     output_path = "auto_serial_result.docx"
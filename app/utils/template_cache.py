@@ -0,0 +1,184 @@
+import os
+import copy
+import struct
+import threading
+import zipfile
+from io import BytesIO
+
+
+def is_text_part(name):
+    """需要做占位符替换的部件：正文、页眉、页脚"""
+    if name == "word/document.xml":
+        return True
+    if not name.startswith("word/") or "/" in name[len("word/"):]:
+        return False
+    base = name[len("word/"):]
+    return base.startswith("header") or base.startswith("footer")
+
+
+def read_raw_entry(src, info):
+    """
+    读取压缩包中某个条目的原始压缩数据（不解压）。
+    注意：依赖 zipfile.ZipFile 的内部属性 fp。
+    """
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    src.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+    return src.fp.read(info.compress_size)
+
+
+def write_raw_entry(dst, info, raw):
+    """
+    把原始压缩数据按原条目信息写入目标压缩包，不重新压缩。
+    注意：依赖 zipfile.ZipFile 的内部属性（fp/filelist/NameToInfo/start_dir）。
+    """
+    new_info = copy.copy(info)
+    # CRC 和大小已知，直接写进本地文件头，不再使用数据描述符
+    new_info.flag_bits &= ~0x08
+    new_info.header_offset = dst.fp.tell()
+    dst.fp.write(new_info.FileHeader())
+    dst.fp.write(raw)
+    dst.start_dir = dst.fp.tell()
+    dst.filelist.append(new_info)
+    dst.NameToInfo[new_info.filename] = new_info
+    dst._didModify = True
+
+
+def write_entry(dst, info, data):
+    """按原条目的名称和时间写入新内容（重新压缩）"""
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new_info.compress_type = zipfile.ZIP_DEFLATED
+    new_info.external_attr = info.external_attr
+    dst.writestr(new_info, data)
+
+
+class CachedTemplate:
+    """
+    解析后的模板，进程内所有请求共享，只读。
+    - entries: [(ZipInfo, 原始压缩数据)]，保持原始顺序
+    - text_parts: {部件名: XML 文本}，正文/页眉/页脚已解压解码
+    """
+
+    def __init__(self, path, key, entries, text_parts):
+        self.path = path
+        self.key = key
+        self.entries = entries
+        self.text_parts = text_parts
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, key):
+        entries = []
+        text_parts = {}
+        with zipfile.ZipFile(path, 'r') as src:
+            for info in src.infolist():
+                entries.append((info, read_raw_entry(src, info)))
+                if is_text_part(info.filename):
+                    text_parts[info.filename] = src.read(info).decode("utf-8")
+        return cls(path, key, entries, text_parts)
+
+    @property
+    def names(self):
+        return [info.filename for info, _ in self.entries]
+
+    def derived(self, name, builder):
+        """
+        缓存基于该模板计算出的派生结果（例如编译后的模板），模板文件变化时随缓存条目一起失效。
+        :param name: 派生结果名称
+        :param builder: 回调，参数为 CachedTemplate，返回派生结果
+        """
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self)
+            return self._derived[name]
+
+    def clone(self):
+        """为单个请求生成一个写时复制的副本，开销只有一个空字典"""
+        return TemplateClone(self)
+
+
+class TemplateClone:
+    """
+    单个请求使用的模板副本：未改动的部件直接引用共享缓存，
+    改动过的部件保存在自己的字典里，保存时只有这些部件会重新压缩。
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self._parts = {}
+
+    def text_part_names(self):
+        return list(self.template.text_parts)
+
+    def read_text(self, name):
+        if name in self._parts:
+            return self._parts[name].decode("utf-8")
+        return self.template.text_parts[name]
+
+    def write_text(self, name, xml_content):
+        self._parts[name] = xml_content.encode("utf-8")
+
+    def write_part(self, name, data):
+        self._parts[name] = data
+
+    def save(self, output=None):
+        """
+        写出 .docx：改动过的部件重新压缩，其余条目直接写入缓存的原始压缩数据。
+        :param output: 输出路径或可写文件对象；为 None 时返回 BytesIO
+        """
+        buffer = output if output is not None else BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for info, raw in self.template.entries:
+                if info.filename in self._parts:
+                    write_entry(dst, info, self._parts[info.filename])
+                else:
+                    write_raw_entry(dst, info, raw)
+        if isinstance(buffer, BytesIO):
+            buffer.seek(0)
+        return buffer
+
+
+class TemplateCache:
+    """
+    进程级模板缓存，按 路径 + 修改时间 + 文件大小 作为键。
+    模板文件被替换或修改后，下一次 get 会发现键变化并重新加载。
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def get(self, path):
+        key = self.make_key(path)
+        cached = self._templates.get(key[0])
+        if cached is not None and cached.key == key:
+            return cached
+
+        with self._lock:
+            cached = self._templates.get(key[0])
+            if cached is None or cached.key != key:
+                cached = CachedTemplate.load(path, key)
+                self._templates[key[0]] = cached
+            return cached
+
+    def version(self, path):
+        """模板版本标识（修改时间 + 大小），用于生成结果的缓存键"""
+        _, mtime_ns, size = self.make_key(path)
+        return f"{mtime_ns}-{size}"
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(os.path.abspath(path), None)
+
+
+template_cache = TemplateCache()
@@ -0,0 +1,279 @@
+import re
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+from app.utils.docx_processor import PLACEHOLDER_PATTERN, XML_TAG_PATTERN
+from app.utils.template_cache import template_cache
+
+DOCUMENT_PART = "word/document.xml"
+
+_TAG = re.compile(r"<[^>]+>")
+
+
+class Slot:
+    """模板中的一个 {{...}} 占位符"""
+    __slots__ = ("token", "key", "tags")
+
+    def __init__(self, token):
+        self.token = token
+        tags = XML_TAG_PATTERN.findall(token) if "<" in token else ()
+        self.key = XML_TAG_PATTERN.sub("", token) if tags else token
+        # 被拆到多个 run 里的占位符：替换后保留中间的标签结构
+        self.tags = "".join(tags)
+
+    def render(self, replacements):
+        if self.key not in replacements:
+            return self.token
+        value = replacements[self.key]
+        return escape("" if value is None else str(value)) + self.tags
+
+
+class CompiledTemplate:
+    """
+    编译后的 document.xml：由一串块组成，每块是 (所属区段键集合, [静态文本 | Slot, ...])。
+    生成文档时只需跳过被删除区段的块、填充占位符，再把文本拼接起来，不需要遍历 XML 树。
+
+    区段键：
+      ("h1", 标题)            一级标题及其后的段落，直到下一个一级标题（不含表格，与 WordTocTool.delete_section_by_title 一致）
+      ("h2", 标题, 序号)       二级标题及其后的段落，直到下一个一级/二级标题（与 delete_section_by_title2_or_higher 一致）
+      ("row", 标题)            目标表格中从该标题行到下一个标题行之前的所有行（与 WordTableProcessor 一致）
+      ("marker", 序号)         第 n 个含标志文本的段落本身
+      ("marker_tail", 序号)    第 n 个标志段落之后的所有段落
+
+    与 process_section_by_marker 一致，只处理删除标题区段后剩下的第一个标志段落：
+    标志段落随所在区段一起被删除时，改为处理下一个标志段落；都被删除时不再删除任何内容。
+    """
+
+    def __init__(self, blocks, h2_occurrences, marker_keys=()):
+        self.blocks = blocks
+        # {二级标题: [(序号, 所在一级区段键)]}，按文档顺序
+        self.h2_occurrences = h2_occurrences
+        # 每个标志段落所属的标题区段键（按文档顺序），用于判断标志段落是否已随区段删除
+        self.marker_keys = marker_keys
+
+    def render(self, replacements, removed_h1=(), removed_h2=(), removed_rows=(), marker_delete_section=None):
+        """
+        生成 document.xml 文本。
+
+        :param replacements: dict，占位符 -> 值
+        :param removed_h1: 需要删除的一级标题列表
+        :param removed_h2: 需要删除的二级标题列表（每个标题只删除第一个未被一级区段删除的匹配项）
+        :param removed_rows: 需要在目标表格中删除的标题列表
+        :param marker_delete_section: None 表示不处理标志段落；False 仅删除标志段落；True 删除标志段落及其后所有段落
+        :return: str
+        """
+        skip = {("h1", title) for title in removed_h1}
+        skip.update(("row", heading) for heading in removed_rows)
+        for title in removed_h2 or ():
+            for index, h1_key in self.h2_occurrences.get(title, ()):
+                if h1_key not in skip:
+                    skip.add(("h2", title, index))
+                    break
+        if marker_delete_section is not None:
+            marker = next((index for index, keys in enumerate(self.marker_keys) if keys.isdisjoint(skip)), None)
+            if marker is not None:
+                skip.add(("marker", marker))
+                if marker_delete_section:
+                    skip.add(("marker_tail", marker))
+
+        out = []
+        append = out.append
+        for keys, parts in self.blocks:
+            if keys and not keys.isdisjoint(skip):
+                continue
+            for part in parts:
+                append(part if part.__class__ is str else part.render(replacements))
+        return "".join(out)
+
+
+class TemplateCompiler:
+    """把 Word 模板的 document.xml 编译为 CompiledTemplate（每个模板版本只编译一次）"""
+
+    @staticmethod
+    def compile(template_path, table_index=None, row_headings=(), marker_text=None):
+        """
+        取得编译后的模板，结果随模板缓存一起缓存，模板文件变化时自动重新编译。
+
+        :param template_path: 模板路径
+        :param table_index: 需要按标题删除行的表格索引（doc.tables 中的序号）
+        :param row_headings: 该表格中的标题（有固定顺序）
+        :param marker_text: 标志段落文本，例如 "### DELETE HERE ###"
+        :return: CompiledTemplate
+        """
+        row_headings = tuple(row_headings)
+        template = template_cache.get(template_path)
+        return template.derived(
+            ("compiled", table_index, row_headings, marker_text),
+            lambda t: TemplateCompiler._compile(t, table_index, row_headings, marker_text),
+        )
+
+    @staticmethod
+    def _compile(template, table_index, row_headings, marker_text):
+        xml_content = template.text_parts[DOCUMENT_PART]
+        # 用 python-docx 解析一次，得到与运行时完全一致的样式名、段落文本和单元格文本
+        doc = Document(template.clone().save())
+        body = doc.element.body
+        children = [child for child in body.iterchildren() if isinstance(child.tag, str)]
+
+        body_start, body_end, spans = TemplateCompiler._scan_children(xml_content)
+        if len(spans) != len(children):
+            raise ValueError("document.xml 结构解析失败：body 子元素数量不一致")
+
+        pieces = [(frozenset(), xml_content[:body_start])]
+        h2_occurrences = {}
+        current_h1 = None
+        current_h2 = None
+        marker_keys = []  # 每个标志段落所属的标题区段键
+        tables_seen = 0
+        last_end = body_start
+
+        for child, (start, end) in zip(children, spans):
+            pieces.append((frozenset(), xml_content[last_end:start]))
+            last_end = end
+            text = xml_content[start:end]
+            tag = child.tag.rsplit("}", 1)[-1]
+
+            if tag == "p":
+                para = Paragraph(child, doc._body)
+                style_name = para.style.name
+                para_text = para.text
+                keys = set()
+
+                if style_name == "Heading 1":
+                    current_h1 = ("h1", para_text.strip())
+                    current_h2 = None
+                elif style_name == "Heading 2":
+                    title = para_text.strip()
+                    occurrences = h2_occurrences.setdefault(title, [])
+                    current_h2 = ("h2", title, len(occurrences))
+                    occurrences.append((len(occurrences), current_h1))
+                if current_h1 is not None:
+                    keys.add(current_h1)
+                if current_h2 is not None:
+                    keys.add(current_h2)
+
+                # 位于之前每个标志段落之后
+                keys.update(("marker_tail", index) for index in range(len(marker_keys)))
+                if marker_text and marker_text in para_text:
+                    marker_keys.append(frozenset(key for key in keys if key[0] in ("h1", "h2")))
+                    keys.add(("marker", len(marker_keys) - 1))
+
+                pieces.append((frozenset(keys), text))
+
+            elif tag == "tbl" and tables_seen == table_index and row_headings:
+                tables_seen += 1
+                pieces.extend(TemplateCompiler._split_table(Table(child, doc._body), text, row_headings))
+            else:
+                if tag == "tbl":
+                    tables_seen += 1
+                pieces.append((frozenset(), text))
+
+        pieces.append((frozenset(), xml_content[last_end:]))
+        return CompiledTemplate(TemplateCompiler._build_blocks(pieces), h2_occurrences, tuple(marker_keys))
+
+    @staticmethod
+    def _split_table(table, xml_text, row_headings):
+        """把目标表格拆成 表头部分 + 每一行 + 结尾部分，并给行打上所属标题区段"""
+        rows = table.rows
+        _, _, row_spans = TemplateCompiler._scan_children(xml_text, container="w:tbl", child="w:tr")
+        if len(row_spans) != len(rows):
+            raise ValueError("表格结构解析失败：行数量不一致")
+
+        row_texts = ["".join(cell.text for cell in row.cells) for row in rows]
+        heading_rows = {}
+        for heading in row_headings:
+            heading_rows[heading] = next((i for i, text in enumerate(row_texts) if heading in text), -1)
+
+        row_keys = [set() for _ in rows]
+        for index, heading in enumerate(row_headings):
+            start_row = heading_rows[heading]
+            if start_row == -1:
+                continue
+            end_row = len(rows) - 1
+            if index + 1 < len(row_headings) and heading_rows[row_headings[index + 1]] != -1:
+                end_row = heading_rows[row_headings[index + 1]] - 1
+            for row_idx in range(start_row, end_row + 1):
+                row_keys[row_idx].add(("row", heading))
+
+        pieces = []
+        last_end = 0
+        for keys, (start, end) in zip(row_keys, row_spans):
+            pieces.append((frozenset(), xml_text[last_end:start]))
+            pieces.append((frozenset(keys), xml_text[start:end]))
+            last_end = end
+        pieces.append((frozenset(), xml_text[last_end:]))
+        return pieces
+
+    @staticmethod
+    def _scan_children(xml_text, container="w:body", child=None):
+        """
+        扫描 XML 文本，找到 container 元素的直接子元素在文本中的起止位置。
+        :return: (container 内容起点, container 内容终点, [(子元素起点, 子元素终点), ...])
+        """
+        depth = 0
+        container_depth = None
+        content_start = content_end = None
+        spans = []
+        child_start = None
+
+        for match in _TAG.finditer(xml_text):
+            tag = match.group(0)
+            if tag.startswith("<?") or tag.startswith("<!"):
+                continue
+            closing = tag.startswith("</")
+            self_closing = tag.endswith("/>")
+            name = tag[2:-1].split()[0] if closing else tag[1:-1].rstrip("/").split()[0]
+
+            if closing:
+                depth -= 1
+                if container_depth is not None and depth == container_depth + 1 and child_start is not None:
+                    spans.append((child_start, match.end()))
+                    child_start = None
+                elif container_depth is not None and depth == container_depth and name == container:
+                    content_end = match.start()
+                    break
+                continue
+
+            if container_depth is None:
+                if name == container:
+                    container_depth = depth
+                    content_start = match.end()
+            elif depth == container_depth + 1 and (child is None or name == child):
+                if self_closing:
+                    spans.append((match.start(), match.end()))
+                else:
+                    child_start = match.start()
+            if not self_closing:
+                depth += 1
+
+        return content_start, content_end, spans
+
+    @staticmethod
+    def _build_blocks(pieces):
+        """合并相邻且区段键相同的片段，并把占位符拆成 Slot"""
+        merged = []
+        for keys, text in pieces:
+            if not text:
+                continue
+            if merged and merged[-1][0] == keys:
+                merged[-1][1].append(text)
+            else:
+                merged.append((keys, [text]))
+
+        blocks = []
+        for keys, texts in merged:
+            text = "".join(texts)
+            parts = []
+            last_end = 0
+            for match in PLACEHOLDER_PATTERN.finditer(text):
+                if match.start() > last_end:
+                    parts.append(text[last_end:match.start()])
+                parts.append(Slot(match.group(0)))
+                last_end = match.end()
+            if last_end < len(text):
+                parts.append(text[last_end:])
+            blocks.append((keys, parts))
+        return blocks
@@ -0,0 +1,431 @@
+import re
+import copy
+import random
+
+from docx.oxml.ns import qn
+
+W_P = qn("w:p")
+W_R = qn("w:r")
+W_T = qn("w:t")
+W_TAB = qn("w:tab")
+W_PPR = qn("w:pPr")
+W_PSTYLE = qn("w:pStyle")
+W_NUMPR = qn("w:numPr")
+W_ILVL = qn("w:ilvl")
+W_NUMID = qn("w:numId")
+W_VAL = qn("w:val")
+W_NAME = qn("w:name")
+W_ID = qn("w:id")
+W_SDT = qn("w:sdt")
+W_SDTPR = qn("w:sdtPr")
+W_SDTCONTENT = qn("w:sdtContent")
+W_DOCPARTGALLERY = qn("w:docPartGallery")
+W_FLDCHAR = qn("w:fldChar")
+W_FLDCHARTYPE = qn("w:fldCharType")
+W_INSTRTEXT = qn("w:instrText")
+W_BOOKMARKSTART = qn("w:bookmarkStart")
+W_BOOKMARKEND = qn("w:bookmarkEnd")
+W_UPDATEFIELDS = qn("w:updateFields")
+
+HYPERLINK_PATTERN = re.compile(r"HYPERLINK\s+\\l\s+\"?([^\s\"]+)\"?")
+TOC_LEVELS_PATTERN = re.compile(r"\\o\s+\"(\d+)-(\d+)\"")
+NUMBER_PREFIX_PATTERN = re.compile(r"^(\d+(?:\.\d+)*\.?)(\s*)$")
+
+# settings.xml 中排在 updateFields 之后的元素，新节点需要插在它们前面（保持 schema 顺序）
+SETTINGS_AFTER_UPDATE_FIELDS = [
+    "w:hdrShapeDefaults", "w:footnotePr", "w:endnotePr", "w:compat", "w:docVars", "w:rsids",
+    "m:mathPr", "w:attachedSchema", "w:themeFontLang", "w:clrSchemeMapping",
+    "w:doNotIncludeSubdocsInStats", "w:doNotAutoCompressPictures", "w:forceUpgrade", "w:captions",
+    "w:readModeInkLockDown", "w:smartTagType", "sl:schemaLibrary", "w:shapeDefaults",
+    "w:doNotEmbedSmartTags", "w:decimalSymbol", "w:listSeparator",
+]
+
+
+class TocBuilder:
+    """
+    纯 Python 重建目录（不依赖 Word / COM，可在 Linux 上运行）：
+    根据最终文档中的标题结构重新生成 TOC 条目（编号、标题文字、跳转书签），
+    并在 settings.xml 中设置 w:updateFields，页码由阅读器或 PDF 转换时刷新。
+    """
+
+    @staticmethod
+    def rebuild(doc):
+        """
+        重建文档中第一个目录。
+        :param doc: python-docx Document（内存中，调用方负责保存）
+        :return: 生成的目录条目数；文档中没有目录时返回 0
+        """
+        body = doc.element.body
+        toc_sdt = TocBuilder._find_toc_sdt(body)
+        if toc_sdt is None:
+            TocBuilder.mark_fields_dirty(doc)
+            return 0
+
+        content = toc_sdt.find(W_SDTCONTENT)
+        entries = [p for p in content.iter(W_P) if TocBuilder._entry_anchor(p)]
+        if not entries:
+            TocBuilder.mark_fields_dirty(doc)
+            return 0
+
+        min_level, max_level = TocBuilder._toc_levels(content)
+        styles = TocBuilder._style_map(doc)
+        toc_styles = {level: style_id for style_id, (name, _) in styles.items()
+                      for level in range(1, 10) if name == f"toc {level}"}
+        headings = TocBuilder._collect_headings(doc, body, toc_sdt, styles, min_level, max_level)
+
+        # **旧条目：按书签索引，标题仍在时复用（保留页码），并找出 TOC 域本身的起止 run**
+        old_by_anchor = {TocBuilder._entry_anchor(p): p for p in entries}
+        old_by_title = {}
+        for p in entries:
+            old_by_title.setdefault(TocBuilder._entry_title(p), p)
+        prototypes = {}
+        for p in entries:
+            level = TocBuilder._entry_level(p, toc_styles)
+            prototypes.setdefault(level, p)
+        field_prefix, field_suffix = TocBuilder._toc_field_runs(entries)
+
+        new_entries = []
+        for heading in headings:
+            anchor = next((name for name in heading["anchors"] if name in old_by_anchor), None)
+            if anchor is None:
+                anchor = TocBuilder._ensure_bookmark(body, heading)
+            # 优先复用同一书签或同名标题的旧条目（保留原页码），否则按同级条目的格式新建
+            source = old_by_anchor.get(anchor)
+            if source is None:
+                source = old_by_title.get(heading["title"])
+            if source is None:
+                source = prototypes.get(heading["level"], prototypes[min(prototypes)])
+            entry = TocBuilder._clean_entry(copy.deepcopy(source))
+            TocBuilder._fill_entry(entry, heading, anchor, toc_styles.get(heading["level"]))
+            new_entries.append(entry)
+
+        # **目录为空时保留一个空段落承载 TOC 域**
+        if not new_entries:
+            placeholder = copy.deepcopy(entries[0])
+            for child in list(placeholder):
+                if child.tag != W_PPR:
+                    placeholder.remove(child)
+            new_entries.append(placeholder)
+
+        first = new_entries[0]
+        insert_at = TocBuilder._child_index(first, W_PPR)
+        for offset, run in enumerate(field_prefix):
+            first.insert(insert_at + offset, copy.deepcopy(run))
+        for run in field_suffix:
+            new_entries[-1].append(copy.deepcopy(run))
+
+        parent = entries[0].getparent()
+        position = parent.index(entries[0])
+        for p in entries:
+            p.getparent().remove(p)
+        for offset, entry in enumerate(new_entries):
+            parent.insert(position + offset, entry)
+
+        TocBuilder.mark_fields_dirty(doc)
+        return len(headings)
+
+    @staticmethod
+    def mark_fields_dirty(doc):
+        """设置 w:updateFields，打开或转换文档时刷新目录页码等域"""
+        settings = doc.settings.element
+        update_fields = settings.find(W_UPDATEFIELDS)
+        if update_fields is None:
+            update_fields = settings.makeelement(W_UPDATEFIELDS, {})
+            after = {qn(tag) for tag in SETTINGS_AFTER_UPDATE_FIELDS if not tag.startswith("sl:")}
+            successor = next((child for child in settings if child.tag in after), None)
+            if successor is not None:
+                successor.addprevious(update_fields)
+            else:
+                settings.append(update_fields)
+        update_fields.set(W_VAL, "true")
+
+    # ------------------------------------------------------------------ #
+    # 标题
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _style_map(doc):
+        """{styleId: (小写样式名, 样式 numPr 元素)}"""
+        result = {}
+        for style in doc.styles.element.iter(qn("w:style")):
+            name = style.find(W_NAME)
+            ppr = style.find(W_PPR)
+            result[style.get(qn("w:styleId"))] = (
+                name.get(W_VAL).lower() if name is not None else "",
+                ppr.find(W_NUMPR) if ppr is not None else None,
+            )
+        return result
+
+    @staticmethod
+    def _collect_headings(doc, body, toc_sdt, styles, min_level, max_level):
+        numbering = TocBuilder._Numbering(doc)
+        headings = []
+        for p in body.iter(W_P):
+            if TocBuilder._is_inside(p, toc_sdt):
+                continue
+            ppr = p.find(W_PPR)
+            pstyle = ppr.find(W_PSTYLE) if ppr is not None else None
+            if pstyle is None:
+                continue
+            name, style_numpr = styles.get(pstyle.get(W_VAL), ("", None))
+            match = re.match(r"heading (\d)$", name)
+            if not match:
+                continue
+            level = int(match.group(1))
+
+            # 没有文字的标题段落（例如只承载分节符）不显示编号，也不计数
+            title = "".join(t.text or "" for t in p.iter(W_T)).strip()
+            if not title:
+                continue
+            numpr = ppr.find(W_NUMPR)
+            number = numbering.next(numpr if numpr is not None else style_numpr)
+            if level < min_level or level > max_level:
+                continue
+            anchors = [b.get(W_NAME) for b in p.iter(W_BOOKMARKSTART) if (b.get(W_NAME) or "").startswith("_Toc")]
+            headings.append({"p": p, "level": level, "title": title, "number": number, "anchors": anchors})
+        return headings
+
+    class _Numbering:
+        """按 numbering.xml 计算标题的自动编号（只支持十进制格式，其余格式也按数字输出）"""
+
+        def __init__(self, doc):
+            self.levels = {}
+            self.counters = {}
+            try:
+                numbering = doc.part.numbering_part.element
+            except (KeyError, NotImplementedError):
+                return
+            abstract = {a.get(qn("w:abstractNumId")): a for a in numbering.iter(qn("w:abstractNum"))}
+            for num in numbering.iter(qn("w:num")):
+                ref = num.find(qn("w:abstractNumId"))
+                definition = abstract.get(ref.get(W_VAL)) if ref is not None else None
+                if definition is None:
+                    continue
+                levels = {}
+                for lvl in definition.iter(qn("w:lvl")):
+                    start = lvl.find(qn("w:start"))
+                    text = lvl.find(qn("w:lvlText"))
+                    levels[int(lvl.get(W_ILVL))] = (
+                        int(start.get(W_VAL)) if start is not None else 1,
+                        text.get(W_VAL) if text is not None else "",
+                    )
+                self.levels[num.get(qn("w:numId"))] = levels
+
+        def next(self, numpr):
+            if numpr is None:
+                return None
+            num_id_el, ilvl_el = numpr.find(W_NUMID), numpr.find(W_ILVL)
+            num_id = num_id_el.get(W_VAL) if num_id_el is not None else None
+            ilvl = int(ilvl_el.get(W_VAL)) if ilvl_el is not None else 0
+            levels = self.levels.get(num_id)
+            if not levels or ilvl not in levels:
+                return None
+
+            counters = self.counters.setdefault(num_id, {})
+            counters[ilvl] = counters.get(ilvl, levels[ilvl][0] - 1) + 1
+            for deeper in [lvl for lvl in counters if lvl > ilvl]:
+                del counters[deeper]
+
+            def value(match):
+                lvl = int(match.group(1)) - 1
+                return str(counters.get(lvl, levels.get(lvl, (1, ""))[0]))
+            return re.sub(r"%(\d)", value, levels[ilvl][1])
+
+    @staticmethod
+    def _ensure_bookmark(body, heading):
+        """标题没有 _Toc 书签时补一个"""
+        existing_ids = [int(b.get(W_ID)) for b in body.iter(W_BOOKMARKSTART) if (b.get(W_ID) or "").isdigit()]
+        existing_names = {b.get(W_NAME) for b in body.iter(W_BOOKMARKSTART)}
+        bookmark_id = str(max(existing_ids, default=0) + 1)
+        name = f"_Toc{random.randint(100000000, 999999999)}"
+        while name in existing_names:
+            name = f"_Toc{random.randint(100000000, 999999999)}"
+
+        p = heading["p"]
+        start = p.makeelement(W_BOOKMARKSTART, {W_ID: bookmark_id, W_NAME: name})
+        end = p.makeelement(W_BOOKMARKEND, {W_ID: bookmark_id})
+        p.insert(TocBuilder._child_index(p, W_PPR), start)
+        p.append(end)
+        heading["anchors"].append(name)
+        return name
+
+    # ------------------------------------------------------------------ #
+    # 目录条目
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _find_toc_sdt(body):
+        for sdt in body.iter(W_SDT):
+            sdt_pr = sdt.find(W_SDTPR)
+            gallery = sdt_pr.find(".//" + W_DOCPARTGALLERY) if sdt_pr is not None else None
+            if gallery is not None and gallery.get(W_VAL) == "Table of Contents":
+                return sdt
+        # 没有目录部件标记时，查找含 TOC 域的 sdt
+        for sdt in body.iter(W_SDT):
+            if any((i.text or "").strip().startswith("TOC") for i in sdt.iter(W_INSTRTEXT)):
+                return sdt
+        return None
+
+    @staticmethod
+    def _toc_levels(content):
+        for instr in content.iter(W_INSTRTEXT):
+            text = instr.text or ""
+            if text.strip().startswith("TOC"):
+                match = TOC_LEVELS_PATTERN.search(text)
+                if match:
+                    return int(match.group(1)), int(match.group(2))
+        return 1, 3
+
+    @staticmethod
+    def _entry_anchor(p):
+        for instr in p.iter(W_INSTRTEXT):
+            match = HYPERLINK_PATTERN.search(instr.text or "")
+            if match:
+                return match.group(1)
+        return None
+
+    @staticmethod
+    def _entry_level(p, toc_styles):
+        ppr = p.find(W_PPR)
+        pstyle = ppr.find(W_PSTYLE) if ppr is not None else None
+        style_id = pstyle.get(W_VAL) if pstyle is not None else None
+        for level, toc_style_id in toc_styles.items():
+            if toc_style_id == style_id:
+                return level
+        return 1
+
+    @staticmethod
+    def _field_events(p):
+        """[(run, 事件类型, 指令文本)]，事件类型为 begin/separate/end/instr/None"""
+        events = []
+        for run in p.iter(W_R):
+            fld_char = run.find(W_FLDCHAR)
+            instr = run.find(W_INSTRTEXT)
+            if fld_char is not None:
+                events.append((run, fld_char.get(W_FLDCHARTYPE), None))
+            elif instr is not None:
+                events.append((run, "instr", instr.text or ""))
+            else:
+                events.append((run, None, None))
+        return events
+
+    @staticmethod
+    def _toc_field_run_set(p):
+        """找出段落中属于 TOC 域本身（而非条目内 HYPERLINK/PAGEREF 域）的 run"""
+        stack = []
+        toc_runs = []
+        for run, kind, text in TocBuilder._field_events(p):
+            if kind == "begin":
+                stack.append({"runs": [run], "instr": ""})
+            elif kind == "instr" and stack:
+                stack[-1]["runs"].append(run)
+                stack[-1]["instr"] += text
+            elif kind == "separate" and stack:
+                stack[-1]["runs"].append(run)
+                if stack[-1]["instr"].strip().startswith("TOC"):
+                    toc_runs.extend(stack.pop()["runs"])
+            elif kind == "end":
+                if stack:
+                    stack.pop()
+                else:
+                    # 与本段 begin 不配对的 end：TOC 域在本段结束
+                    toc_runs.append(run)
+        return toc_runs
+
+    @staticmethod
+    def _toc_field_runs(entries):
+        prefix = TocBuilder._toc_field_run_set(entries[0])
+        prefix = [run for run in prefix if run.find(W_FLDCHAR) is None
+                  or run.find(W_FLDCHAR).get(W_FLDCHARTYPE) != "end"]
+        suffix = [run for run in TocBuilder._toc_field_run_set(entries[-1])
+                  if run.find(W_FLDCHAR) is not None and run.find(W_FLDCHAR).get(W_FLDCHARTYPE) == "end"]
+        return [copy.deepcopy(run) for run in prefix], [copy.deepcopy(run) for run in suffix]
+
+    @staticmethod
+    def _clean_entry(p):
+        """去掉条目副本中 TOC 域自身的 run，只保留条目内容"""
+        for run in TocBuilder._toc_field_run_set(p):
+            run.getparent().remove(run)
+        return p
+
+    @staticmethod
+    def _fill_entry(p, heading, anchor, toc_style_id):
+        # **样式**
+        if toc_style_id is not None:
+            ppr = p.find(W_PPR)
+            if ppr is None:
+                ppr = p.makeelement(W_PPR, {})
+                p.insert(0, ppr)
+            pstyle = ppr.find(W_PSTYLE)
+            if pstyle is None:
+                pstyle = ppr.makeelement(W_PSTYLE, {})
+                ppr.insert(0, pstyle)
+            pstyle.set(W_VAL, toc_style_id)
+
+        # **跳转书签**
+        for instr in p.iter(W_INSTRTEXT):
+            text = instr.text or ""
+            if "HYPERLINK" in text:
+                instr.text = f" HYPERLINK \\l {anchor} "
+            elif "PAGEREF" in text:
+                instr.text = f" PAGEREF {anchor} \\h "
+
+        # **显示文字：制表符之前为 编号+标题，页码（PAGEREF 域结果）保持不变，等待域刷新**
+        title_texts = TocBuilder._title_texts(p)
+        number = heading["number"]
+        if len(title_texts) >= 2 and NUMBER_PREFIX_PATTERN.match(title_texts[0].text or ""):
+            separator = NUMBER_PREFIX_PATTERN.match(title_texts[0].text).group(2) or " "
+            TocBuilder._set_text(title_texts[0], f"{number}{separator}" if number else "")
+            TocBuilder._set_text(title_texts[1], heading["title"])
+            rest = title_texts[2:]
+        elif title_texts:
+            TocBuilder._set_text(title_texts[0], f"{number} {heading['title']}" if number else heading["title"])
+            rest = title_texts[1:]
+        else:
+            rest = []
+        for t in rest:
+            TocBuilder._set_text(t, "")
+
+    @staticmethod
+    def _title_texts(p):
+        """条目中制表符之前（编号+标题）的 w:t 元素"""
+        texts = []
+        for run, kind, _ in TocBuilder._field_events(p):
+            if kind is not None:
+                continue
+            if run.find(W_TAB) is not None:
+                break
+            texts.extend(run.iter(W_T))
+        return texts
+
+    @staticmethod
+    def _entry_title(p):
+        """条目显示的标题（去掉编号）"""
+        texts = [t.text or "" for t in TocBuilder._title_texts(p)]
+        if len(texts) >= 2 and NUMBER_PREFIX_PATTERN.match(texts[0]):
+            texts = texts[1:]
+        return "".join(texts).strip()
+
+    @staticmethod
+    def _set_text(t, text):
+        t.text = text
+        if text != text.strip():
+            t.set(qn("xml:space"), "preserve")
+
+    # ------------------------------------------------------------------ #
+    # 工具
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _is_inside(element, ancestor):
+        parent = element.getparent()
+        while parent is not None:
+            if parent is ancestor:
+                return True
+            parent = parent.getparent()
+        return False
+
+    @staticmethod
+    def _child_index(p, after_tag):
+        """插入位置：紧跟在 after_tag 子元素之后，没有时为 0"""
+        for index, child in enumerate(p):
+            if child.tag == after_tag:
+                return index + 1
+        return 0
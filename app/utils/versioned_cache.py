@@ -0,0 +1,72 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedCache:
+    """
+    进程内只读数据缓存（例如字段定义这类很少修改的字典数据）：
+    - 首次使用时通过 loader() 整体加载，之后直接返回内存中的数据；
+    - 本进程写入后调用 invalidate()，下次读取时重新加载；
+    - 多进程部署时，写入方同时递增共享的版本号（例如数据库中的版本表），
+      其他进程每隔 check_interval 秒通过 version_getter() 比较一次版本，不一致时重新加载。
+    """
+
+    def __init__(self, name, loader, version_getter=None, check_interval=5):
+        """
+        :param name: 缓存名称（日志用）
+        :param loader: 加载函数，返回缓存的数据
+        :param version_getter: 读取共享版本号的函数；为 None 时只依赖 invalidate()
+        :param check_interval: 两次版本检查之间的最小间隔（秒），0 表示每次读取都检查
+        """
+        self.name = name
+        self.loader = loader
+        self.version_getter = version_getter
+        self.check_interval = check_interval
+        self._data = None
+        self._version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self):
+        with self._lock:
+            if self._data is not None and self._is_stale():
+                logger.info(f"缓存版本已变化，重新加载: {self.name}")
+                self._data = None
+            if self._data is None:
+                # 先读版本再加载：加载期间有新的写入时，下次检查会发现版本变化
+                self._version = self.version_getter() if self.version_getter else None
+                self._data = self.loader()
+                self._checked_at = time.time()
+                self.loads += 1
+            return self._data
+
+    def _is_stale(self):
+        if self.version_getter is None or time.time() - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = time.time()
+        return self.version_getter() != self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+    def apply(self, mutator, version=None):
+        """
+        本进程写入并提交后，就地更新已加载的数据（例如索引中增删一条记录），避免整体重新加载。
+        :param mutator: mutator(data)
+        :param version: 写入后读取到的共享版本号；只有它恰好是已加载版本 + 1（期间没有其他进程写入）时才就地更新，
+                        否则丢弃数据，下次读取时重新加载
+        """
+        with self._lock:
+            if self._data is None:
+                return
+            if self.version_getter is not None and (version is None or self._version is None
+                                                    or version != self._version + 1):
+                self._data = None
+                return
+            mutator(self._data)
+            self._version = version
@@ -2,14 +2,15 @@ from docx import Document
 
 
 class WordTableProcessor:
-    def __init__(self, doc_path, table_index=0):
+    def __init__(self, doc_path=None, table_index=0, doc=None):
         """
         初始化处理器，加载Word文档并锁定目标表格。
 
         :param doc_path:    Word文档路径
         :param table_index: 要操作的表格索引（从0开始）
+        :param doc:         已加载的 Document 对象（流水线模式），传入时不再从 doc_path 读取
         """
-        self.doc = Document(doc_path)
+        self.doc = doc if doc is not None else Document(doc_path)
         self.table = self.doc.tables[table_index]
         self.doc_path = doc_path
         self.table_index = table_index
@@ -34,14 +35,14 @@ class WordTableProcessor:
         for row_idx in range(end_row, start_row - 1, -1):
             self.table._tbl.remove(self.table.rows[row_idx]._tr)
 
-    def process_missing_sections(self, headings, missing_headings, output_path):
+    def process_missing_sections(self, headings, missing_headings, output_path=None):
         """
         若某标题在 missing_headings 中，则删除从“该标题”到“下一个标题”之前所有行。
         如果是最后一个标题，则一直删到表格末尾。
 
         :param headings:         所有标题的顺序列表
         :param missing_headings: 未填写的标题列表
-        :param output_path:      处理完成后存储的新文档路径
+        :param output_path:      处理完成后存储的新文档路径；为 None 时只修改内存中的文档，不保存
         """
         # 1) 找到每个标题在表格中的行索引
         heading_row_map = {}
@@ -85,6 +86,7 @@ class WordTableProcessor:
                 self._delete_rows_in_range(start_row, end_row)
 
         # 4) 保存结果
-        self.doc.save(output_path)
-        print(f"处理完成，已保存到 {output_path}")
+        if output_path:
+            self.doc.save(output_path)
+            print(f"处理完成，已保存到 {output_path}")
 
@@ -1,38 +1,49 @@
 import os
-import pythoncom
-import win32com.client as win32
 from docx import Document
 from docxtpl import DocxTemplate
 
 from app import logger
+from app.utils.document_outline import DocumentOutline
+
+# **Word COM 只在 Windows 上可用，其他平台使用 TocBuilder 重建目录**
+try:
+    import pythoncom
+    import win32com.client as win32
+except ImportError:
+    pythoncom = None
+    win32 = None
 
 
 class WordTocTool:
     @staticmethod
     def delete_section_by_title(doc, target_title, heading_level="Heading 1"):
         """
-        删除 Word 文档中，从指定标题开始直到下一个同级标题出现之前的所有段落。
-        注意：此方法依赖 python‑docx 内部对象，未来版本可能需要调整。
+        删除 Word 文档中，从指定标题开始直到下一个同级（或更高级）标题出现之前的所有段落。
         """
+        WordTocTool.delete_sections(doc, [target_title], heading_level)
 
-        def delete_paragraph(paragraph):
-            element = paragraph._element
-            element.getparent().remove(element)
-            # 清空内部对象，确保段落被删除
-            paragraph._p = paragraph._element = None
-
-        delete_flag = False
-        for para in doc.paragraphs[:]:
-            if para.style.name == heading_level:
-                if para.text.strip() == target_title:
-                    delete_flag = True
-                else:
-                    delete_flag = False
-            if delete_flag:
-                delete_paragraph(para)
+    @staticmethod
+    def delete_sections(doc, target_titles, heading_level="Heading 1", first_only=False):
+        """
+        批量删除多个同级章节的段落（表格保留）：只建立一次大纲索引，一次遍历完成删除。
+        :param target_titles: 标题文字列表
+        :param heading_level: 标题样式名，例如 "Heading 1"
+        :param first_only: 每个标题只删除第一个匹配的章节
+        """
+        level = int(heading_level.rsplit(" ", 1)[-1])
+        outline = DocumentOutline(doc)
+        return outline.delete_sections([(level, title) for title in target_titles],
+                                       include_tables=False, first_only=first_only)
 
     @staticmethod
     def update_toc_via_word(doc_path):
+        """
+        通过 Word COM 更新目录（仅 Windows，且需要安装 Word）。
+        生成流程默认改用 TocBuilder.rebuild，只有配置 TOC_UPDATE_VIA_WORD 时才调用本方法。
+        """
+        if pythoncom is None:
+            logger.warning("当前环境不支持 Word COM，跳过目录更新")
+            return False
         pythoncom.CoInitialize()
         word = None
         doc = None
@@ -113,35 +124,7 @@ class WordTocTool:
         :param doc: Word 文档对象 (Document)
         :param target_title: 需要删除的标题2（Heading 2）的文本
         """
-
-        def delete_paragraph(paragraph):
-            """
-            删除段落的底层 XML 结构
-            """
-            element = paragraph._element
-            element.getparent().remove(element)
-            paragraph._p = paragraph._element = None
-
-        delete_flag = False  # 是否进入删除模式
-
-        for para in doc.paragraphs[:]:  # 遍历所有段落
-            para_text = para.text.strip()  # 获取文本内容
-            para_style = para.style.name  # 获取样式名称
-
-            # 遇到 `Heading 1` 或 `Heading 2`，可能要停止删除
-            if para_style in ["Heading 1", "Heading 2"]:
-                if delete_flag:
-                    # 如果已经进入删除模式，遇到 Heading 1 或 Heading 2 就终止删除
-                    break
-
-                # 如果当前段落是目标标题 (Heading 2)，则开始删除模式
-                if para_text == target_title and para_style == "Heading 2":
-                    delete_flag = True  # 开启删除模式
-                    delete_paragraph(para)  # 删除目标标题本身
-
-            elif delete_flag:
-                # 处于删除模式，则删除该段落
-                delete_paragraph(para)
+        WordTocTool.delete_sections(doc, [target_title], "Heading 2", first_only=True)
 
     @staticmethod
     def process_document(template_path, new_doc_suffix="_modified", delete_titles=None):
@@ -167,9 +150,8 @@ class WordTocTool:
             return None
 
         if delete_titles:
-            for title in delete_titles:
-                print(f"删除标题 '{title}' 及其后续内容...")
-                WordTocTool.delete_section_by_title(doc, title)
+            print(f"删除标题 {delete_titles} 及其后续内容...")
+            WordTocTool.delete_sections(doc, delete_titles)
 
         try:
             doc.save(new_doc_path)
@@ -189,6 +171,18 @@ class WordTocTool:
         doc.render(context)
         doc.save(template_path)
 
+    @staticmethod
+    def render_doc_with_features(doc, context):
+        """
+        在内存中的 Document 上直接执行 docxtpl 渲染，不读写磁盘。
+        docxtpl 会整体替换 body 节点，旧的 Document 代理对象会缓存旧 body，
+        因此返回一个新的 Document 对象，调用方应使用返回值继续处理。
+        """
+        tpl = DocxTemplate(None)
+        tpl.docx = doc
+        tpl.render(context)
+        return tpl.docx.part.document
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+from flask import Blueprint
+from app.controllers import job_controller
+
+job_bp = Blueprint('job', __name__, url_prefix='/api/jobs')
+
+
+@job_bp.route('/<string:kind>/<int:project_id>', methods=['POST'])
+def submit_job(kind, project_id):
+    return job_controller.submit_job(kind, project_id)  # 提交生成任务
+
+
+@job_bp.route('/stats', methods=['GET'])
+def get_job_stats():
+    return job_controller.get_job_stats()  # 任务队列状态
+
+
+@job_bp.route('/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    return job_controller.get_job(job_id)  # 查询任务状态
+
+
+@job_bp.route('/<string:job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    return job_controller.stream_job_events(job_id)  # 任务进度推送（SSE）
+
+
+@job_bp.route('/<string:job_id>/download', methods=['GET'])
+def download_job_result(job_id):
+    return job_controller.download_job_result(job_id)  # 下载生成结果
@@ -32,4 +32,20 @@ def delete_material_info(material_info_id):
 # **✅ 添加批量导入 API**
 @material_info_bp.route('/material_info/import', methods=['POST'])
 def import_material_info():
-    return material_info_controller.import_materials()
\ No newline at end of file
+    return material_info_controller.import_materials()
+
+
+# **后台导入任务：进度也可通过 /api/jobs/<job_id> 查询**
+@material_info_bp.route('/material_info/import/jobs', methods=['POST'])
+def submit_material_import_job():
+    return material_info_controller.submit_material_import_job()
+
+
+@material_info_bp.route('/material_info/import/jobs/<string:import_id>', methods=['GET'])
+def get_material_import(import_id):
+    return material_info_controller.get_material_import(import_id)
+
+
+@material_info_bp.route('/material_info/import/jobs/<string:import_id>/resume', methods=['POST'])
+def resume_material_import(import_id):
+    return material_info_controller.resume_material_import(import_id)
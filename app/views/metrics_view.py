@@ -0,0 +1,9 @@
+from flask import Blueprint
+from app.controllers import metrics_controller
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    return metrics_controller.get_metrics()  # Prometheus 文本格式指标
@@ -13,6 +13,11 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     BCRYPT_LOG_ROUNDS = 12
+    # 密码加密 / 校验的独立线程池：计算线程数、排队上限、排队超时（秒）
+    # 计算线程数 + 排队上限应小于 waitress 的线程数（run.py 中为 8），登录高峰时其他接口仍有空闲线程
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 4))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your_jwt_secret_key_here'
     JWT_ALGORITHM = 'HS256'
     CORS_HEADERS = 'Content-Type'
@@ -33,5 +38,49 @@ class Config:
     IMAGES_FOLDER = os.path.join(UPLOAD_FOLDER, 'images')  # 存放外形结构尺寸
     EMF_FOLDER = os.path.join(UPLOAD_FOLDER, 'emf')  # 存放电路图
     CUSTOM_EMF_FOLDER = os.path.join(UPLOAD_FOLDER, 'custom_emf')  # 存放用户上传电路图
-
-
+    DOCUMENT_CACHE_FOLDER = os.path.join(OUTPUT_FOLDER, 'cache')  # 生成结果缓存（按数据快照摘要寻址）
+    DOCUMENT_CACHE_MAX_ENTRIES = int(os.environ.get('DOCUMENT_CACHE_MAX_ENTRIES', 200))  # 每类文档最多缓存的文件数
+    # 后台生成任务
+    JOB_BACKEND = os.environ.get('JOB_BACKEND', 'thread')  # 任务后端，thread 为进程内线程池
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # 同时执行的生成任务数
+    JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 20))  # 排队 + 执行中的任务上限，超出时拒绝提交
+    JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', 3600))  # 已结束任务的保留时间（秒）
+    JOB_EVENTS_TIMEOUT = int(os.environ.get('JOB_EVENTS_TIMEOUT', 30))  # 单次进度推送连接的最长时间（秒），到期后客户端自动重连
+    JOB_EVENTS_MAX_STREAMS = int(os.environ.get('JOB_EVENTS_MAX_STREAMS', 3))  # 同时保持的推送连接上限（每个占用一个 waitress 线程），超出时返回 429，客户端改为轮询
+    JOB_EVENTS_RETRY_MS = int(os.environ.get('JOB_EVENTS_RETRY_MS', 3000))  # 推送连接断开后客户端的重连间隔（毫秒）
+    # 目录：默认在进程内重建（跨平台），设为 true 时额外调用 Word COM 刷新页码（仅 Windows）
+    TOC_UPDATE_VIA_WORD = os.environ.get('TOC_UPDATE_VIA_WORD', 'false').lower() == 'true'
+    # LibreOffice 转换池：auto 优先使用 UNO 常驻进程，其次每次启动 soffice，未配置 LibreOffice 时转换直接报错；
+    # stub 只复制文件（测试用），必须显式配置
+    OFFICE_POOL_MODE = os.environ.get('OFFICE_POOL_MODE', 'auto')
+    OFFICE_POOL_SIZE = int(os.environ.get('OFFICE_POOL_SIZE', 2))  # 工作进程数
+    OFFICE_POOL_QUEUE_SIZE = int(os.environ.get('OFFICE_POOL_QUEUE_SIZE', 10))  # 等待转换的任务上限
+    OFFICE_CONVERT_TIMEOUT = int(os.environ.get('OFFICE_CONVERT_TIMEOUT', 120))  # 单个文件转换超时（秒）
+    OFFICE_POOL_BASE_PORT = int(os.environ.get('OFFICE_POOL_BASE_PORT', 2002))  # UNO 监听起始端口
+    OFFICE_PROFILE_FOLDER = os.path.join(UPLOAD_FOLDER, 'office_profiles')  # 每个工作进程独立的用户配置目录
+    OFFICE_POOL_WARMUP = os.environ.get('OFFICE_POOL_WARMUP', 'true').lower() == 'true'  # 启动时预热工作进程
+    # 字段定义缓存：每隔多少秒检查一次共享版本号（多进程部署时其他进程的修改最多延迟这么久生效）
+    FIELD_DEFINITION_CACHE_CHECK_INTERVAL = int(os.environ.get('FIELD_DEFINITION_CACHE_CHECK_INTERVAL', 5))
+    MATERIAL_IMPORT_CHUNK_SIZE = int(os.environ.get('MATERIAL_IMPORT_CHUNK_SIZE', 1000))  # 物料导入每批查询/写入的行数
+    # 项目/物料列表的 n-gram 搜索索引：每隔多少秒检查一次共享版本号
+    SEARCH_INDEX_CHECK_INTERVAL = int(os.environ.get('SEARCH_INDEX_CHECK_INTERVAL', 5))
+    LIST_COUNT_CACHE_TTL = int(os.environ.get('LIST_COUNT_CACHE_TTL', 30))  # 列表总数缓存时间（秒）
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))  # 游标分页每页条数上限，pageSize 超出 [1, MAX_PAGE_SIZE] 时取边界值（页码模式不限制）
+    # 权限版本号 / 菜单缓存：每隔多少秒检查一次共享版本号（其他进程修改角色后，旧令牌最多这么久后回退到数据库校验）
+    PERMISSION_CACHE_CHECK_INTERVAL = int(os.environ.get('PERMISSION_CACHE_CHECK_INTERVAL', 5))
+    MATERIAL_IMPORT_FOLDER = os.path.join(UPLOAD_FOLDER, 'imports')  # 后台导入任务的上传文件与检查点
+    # 后台物料导入使用独立的任务后端，不占用文档生成的工作线程
+    MATERIAL_IMPORT_WORKERS = int(os.environ.get('MATERIAL_IMPORT_WORKERS', 1))  # 同时执行的导入任务数
+    MATERIAL_IMPORT_MAX_PENDING = int(os.environ.get('MATERIAL_IMPORT_MAX_PENDING', 5))  # 排队 + 执行中的导入任务上限
+    # 日志：根级别、按模块的级别（模块=级别，逗号分隔），SQL 语句日志默认关闭
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', 'sqlalchemy.engine=WARNING,waitress=INFO')
+    # 大数据量调试输出（占位符字典、字段列表）：默认关闭，开启后按比例抽样并截断（需要 DEBUG 级别）
+    LOG_PAYLOAD_DUMPS = os.environ.get('LOG_PAYLOAD_DUMPS', 'false').lower() == 'true'
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get('LOG_PAYLOAD_SAMPLE_RATE', 0.1))
+    LOG_PAYLOAD_MAX_CHARS = int(os.environ.get('LOG_PAYLOAD_MAX_CHARS', 2000))
+    # /metrics：默认只允许本机访问；其他地址需在 METRICS_ALLOWED_NETWORKS（逗号分隔的地址或网段）中，
+    # 或携带 Authorization: Bearer <METRICS_TOKEN>；METRICS_ENABLED=false 时关闭该接口
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_ALLOWED_NETWORKS = os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1,::1')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
@@ -0,0 +1,60 @@
+"""
+物料导入的幂等检查：含空单元格的表格导入两次，第二次每一行都应为 unchanged（空值按 NULL 比较和写入，
+不会因为 NaN 被当成已修改）。
+
+使用 app 配置的数据库，运行前后会删除测试物料。
+运行：python -m test.check_material_reimport
+"""
+
+import pandas as pd
+
+from app import app, db
+from app.models.models import MaterialInfo
+from app.utils.material_importer import MaterialImporter
+
+CODE_PREFIX = "IMPORT-CHECK-"
+
+
+def sample_frame():
+    rows = [
+        [f"{CODE_PREFIX}1", "电阻", None, "个"],
+        [f"{CODE_PREFIX}2", "电容", "", None],
+        [f"{CODE_PREFIX}3", "电感", "  ", "  只 "],
+        [f"{CODE_PREFIX}4", "磁珠", "BLM18", "个"],
+    ]
+    return pd.DataFrame(rows, columns=["物料代码", "物料名称", "型号规格", "计量单位"])
+
+
+def remove_sample_materials():
+    MaterialInfo.query.filter(MaterialInfo.material_code.like(f"{CODE_PREFIX}%")).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def import_sample():
+    importer = MaterialImporter(db.session, MaterialInfo.__table__)
+    counts = importer.import_frame(sample_frame())
+    db.session.commit()
+    return counts
+
+
+def main():
+    with app.app_context():
+        remove_sample_materials()
+        try:
+            rows = len(sample_frame())
+            first = import_sample()
+            assert first["inserted"] == rows, first
+            print(f"✅ 首次导入: {first}")
+
+            stored = MaterialInfo.query.filter_by(material_code=f"{CODE_PREFIX}2").one()
+            assert stored.model_specification is None and stored.unit is None, stored.to_dict()
+
+            second = import_sample()
+            assert second["unchanged"] == rows and second["inserted"] == 0 and second["updated"] == 0, second
+            print(f"✅ 重复导入: {second}")
+        finally:
+            remove_sample_materials()
+
+
+if __name__ == "__main__":
+    main()
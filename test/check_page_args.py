@@ -0,0 +1,69 @@
+"""
+分页参数检查：游标模式下 pageSize 为 0、负数或超过 MAX_PAGE_SIZE 时应返回 200，pageSize 取 [1, MAX_PAGE_SIZE] 的边界值；
+页码模式保持原有约定，pageSize 超过 MAX_PAGE_SIZE 时原样使用；page 小于 1 时按第 1 页处理；无效的游标返回 400。
+
+使用 app 配置的数据库，运行前后会创建并删除测试项目。
+运行：python -m test.check_page_args
+"""
+
+from flask_jwt_extended import create_access_token
+
+from app import routes  # noqa: F401  注册蓝图
+from app import app, db
+from app.models.models import Project
+
+PROJECT_COUNT = 3
+URL = "/api/project/project"
+
+
+def create_sample_projects():
+    projects = [Project(project_model=f"PAGE-CHECK-{idx}", project_name=f"分页检查项目{idx}", project_level="J",
+                        file_number=f"PAGE-CHECK-{idx}", product_number=f"PAGE-CHECK-{idx}")
+                for idx in range(PROJECT_COUNT)]
+    db.session.add_all(projects)
+    db.session.commit()
+    return [project.id for project in projects]
+
+
+def remove_sample_projects(project_ids):
+    Project.query.filter(Project.id.in_(project_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def get_page(client, headers, **params):
+    response = client.get(URL, query_string=params, headers=headers)
+    assert response.status_code == 200, (params, response.status_code, response.get_data(as_text=True))
+    return response.get_json()["data"]
+
+
+def main():
+    client = app.test_client()
+    max_page_size = app.config['MAX_PAGE_SIZE']
+    with app.app_context():
+        project_ids = create_sample_projects()
+        headers = {"Authorization": f"Bearer {create_access_token(identity='0')}"}
+        try:
+            for page_size, expected in ((0, 1), (-5, 1), (max_page_size + 1, max_page_size)):
+                data = get_page(client, headers, cursor="", pageSize=page_size)
+                assert data["pageSize"] == expected and len(data["projects"]) <= expected, data
+                print(f"✅ 游标模式 pageSize={page_size} -> {data['pageSize']}")
+
+            large_page_size = max_page_size * 2
+            data = get_page(client, headers, page=1, pageSize=large_page_size)
+            assert data["pageSize"] == large_page_size, data
+            assert len(data["projects"]) == min(data["totalElements"], large_page_size), data
+            print(f"✅ 页码模式 pageSize={large_page_size} 不受限制")
+
+            data = get_page(client, headers, page=0, pageSize=10)
+            assert data["page"] == 1, data
+            print("✅ page=0 -> 1")
+
+            response = client.get(URL, query_string={"cursor": "not-a-cursor"}, headers=headers)
+            assert response.status_code == 400, response.get_data(as_text=True)
+            print(f"✅ 无效游标: {response.status_code} {response.get_json()['message']}")
+        finally:
+            remove_sample_projects(project_ids)
+
+
+if __name__ == "__main__":
+    main()
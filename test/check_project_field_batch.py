@@ -0,0 +1,71 @@
+"""
+项目字段批量保存检查：同一 (project_id, field_id) 出现多次时只写入一行，
+第一次出现的行为 created / updated，重复的行为 merged（merged_into 指向第一次出现的 index），
+created / updated 只统计实际写入的行。
+
+使用 app 配置的数据库，运行前后会创建并删除测试项目和字段定义。
+运行：python -m test.check_project_field_batch
+"""
+
+from flask_jwt_extended import create_access_token
+
+from app import routes  # noqa: F401  注册蓝图
+from app import app, db
+from app.models.models import Project, FieldDefinition, ProjectFieldValue
+
+URL = "/api/project_field/batch"
+
+
+def create_sample_data():
+    project = Project(project_model="BATCH-CHECK", project_name="批量保存检查项目", project_level="J",
+                      file_number="BATCH-CHECK", product_number="BATCH-CHECK")
+    fields = [FieldDefinition(field_name=f"批量检查字段{idx}", field_type="input") for idx in range(2)]
+    db.session.add_all([project, *fields])
+    db.session.flush()
+    # 第一个字段已有记录（updated），第二个字段没有（created）
+    db.session.add(ProjectFieldValue(project_id=project.id, field_id=fields[0].id, custom_value="原值"))
+    db.session.commit()
+    return project.id, [field.id for field in fields]
+
+
+def remove_sample_data(project_id, field_ids):
+    ProjectFieldValue.query.filter_by(project_id=project_id).delete()
+    FieldDefinition.query.filter(FieldDefinition.id.in_(field_ids)).delete(synchronize_session=False)
+    Project.query.filter_by(id=project_id).delete()
+    db.session.commit()
+
+
+def main():
+    client = app.test_client()
+    with app.app_context():
+        project_id, (existing_field, new_field) = create_sample_data()
+        headers = {"Authorization": f"Bearer {create_access_token(identity='0')}"}
+        try:
+            fields = [
+                {"project_id": project_id, "field_id": existing_field, "custom_value": "新值", "unit": "V"},
+                {"project_id": project_id, "field_id": new_field, "custom_value": "第一次"},
+                {"project_id": project_id, "field_id": existing_field, "unit": "mV"},
+                {"project_id": project_id, "field_id": new_field, "custom_value": "第二次"},
+                {"project_id": project_id},
+            ]
+            response = client.post(URL, json={"fields": fields}, headers=headers)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            data = response.get_json()["data"]
+
+            statuses = [(result["status"], result.get("merged_into")) for result in data["results"]]
+            assert statuses == [("updated", None), ("created", None), ("merged", 0), ("merged", 1),
+                                ("error", None)], statuses
+            summary = {key: data[key] for key in ("created", "updated", "merged", "error")}
+            assert summary == {"created": 1, "updated": 1, "merged": 2, "error": 1}, summary
+            print(f"✅ 结果: {statuses} {summary}")
+
+            values = {value.field_id: (value.custom_value, value.unit)
+                      for value in ProjectFieldValue.query.filter_by(project_id=project_id)}
+            assert values == {existing_field: ("新值", "mV"), new_field: ("第二次", None)}, values
+            print(f"✅ 写入: {len(values)} 行")
+        finally:
+            remove_sample_data(project_id, [existing_field, new_field])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+项目相关接口发出的 SQL 检查：项目列表 / 详情不应 JOIN 技术特点、注意事项、物料（分页只取一页项目行），
+技术特点 / 注意事项接口用 selectin 加载关联数据（两条查询，不随条数增长）。
+
+使用 app 配置的数据库，运行前后会创建并删除一个测试项目。
+运行：python -m test.check_project_queries
+"""
+
+from contextlib import contextmanager
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import routes  # noqa: F401  注册蓝图
+from app import app, db
+from app.models.models import (Project, MaterialInfo, ProjectMaterial, TechnicalFeature, ProjectFeature,
+                               ImportantNote, ProjectImportantNote)
+
+ROW_COUNT = 3
+
+
+@contextmanager
+def capture_sql():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_sample_project():
+    project = Project(project_model="SQL-CHECK", project_name="SQL 检查项目", project_level="J",
+                      file_number="SQL-CHECK", product_number="SQL-CHECK")
+    db.session.add(project)
+    db.session.flush()
+    for idx in range(ROW_COUNT):
+        feature = TechnicalFeature(label=f"技术特点{idx}")
+        note = ImportantNote(label=f"注意事项{idx}")
+        material = MaterialInfo(material_code=f"SQL-CHECK-{idx}", material_name=f"物料{idx}")
+        db.session.add_all([feature, note, material])
+        db.session.flush()
+        db.session.add_all([
+            ProjectFeature(project_id=project.id, feature_id=feature.id, sort_order=idx),
+            ProjectImportantNote(project_id=project.id, note_id=note.id, sort_order=idx),
+            ProjectMaterial(project_id=project.id, material_id=material.id),
+        ])
+    db.session.commit()
+    return project.id
+
+
+def remove_sample_project(project_id):
+    project = Project.query.get(project_id)
+    features = [item.feature for item in project.project_features]
+    notes = [item.note for item in project.project_important_notes]
+    materials = [item.material for item in project.project_materials]
+    ProjectMaterial.query.filter_by(project_id=project_id).delete()
+    db.session.delete(project)
+    for obj in features + notes + materials:
+        db.session.delete(obj)
+    db.session.commit()
+
+
+def select_statements(client, headers, url, **params):
+    with capture_sql() as statements:
+        response = client.get(url, query_string=params, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [statement for statement in statements if statement.upper().startswith("SELECT")]
+
+
+def main():
+    client = app.test_client()
+    with app.app_context():
+        project_id = create_sample_project()
+        headers = {"Authorization": f"Bearer {create_access_token(identity='0')}"}
+        try:
+            for label, params in (("列表（页码）", {"page": 1, "pageSize": 10}),
+                                  ("列表（游标）", {"cursor": "", "pageSize": 10})):
+                statements = select_statements(client, headers, "/api/project/project", **params)
+                rows = [s for s in statements if "FROM t_projects" in s and "count(" not in s.lower()]
+                assert len(rows) == 1 and "LIMIT" in rows[0], statements
+                assert not any("JOIN" in s for s in statements), statements
+                print(f"✅ {label}: {rows[0]}")
+
+            statements = select_statements(client, headers, f"/api/project/project/{project_id}")
+            assert len(statements) == 1 and "JOIN" not in statements[0], statements
+            print(f"✅ 详情: {statements[0]}")
+
+            for label, url, table in (
+                    ("技术特点", f"/api/project_feature/{project_id}/features", "t_technical_features"),
+                    ("注意事项", f"/api/project_important_notes/{project_id}/notes", "t_important_notes")):
+                statements = select_statements(client, headers, url)
+                assert len(statements) == 2 and table in statements[1] and " IN " in statements[1], statements
+                print(f"✅ {label}: {len(statements)} 条查询")
+        finally:
+            remove_sample_project(project_id)
+
+
+if __name__ == "__main__":
+    main()
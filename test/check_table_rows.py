@@ -0,0 +1,71 @@
+"""
+批量添加表格行的检查：add_rows_with_auto_serial 生成的每一行 <w:tr> 应与逐行添加
+（table.add_row + cell.text + 设置字体，即改为批量之前的写法）完全相同，
+包括空单元格、数据少于列数、含换行 / 制表符的单元格。
+
+检查本身不读写数据库，但导入 app 包时会初始化 SQLAlchemy 并建表，因此仍需配置 DATABASE_URL。
+运行：python -m test.check_table_rows
+"""
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt
+from lxml import etree
+
+from app.utils.table_operation import add_rows_with_auto_serial, _apply_font_style
+
+ROWS = [
+    ["电源滤波器", "MTL-1", "1套", "粘贴标签"],
+    ["", "", "", ""],
+    ["说明书", None, "", "/"],
+    ["第一行\n第二行", "A\tB"],
+    [],
+]
+
+
+def new_document(columns=5):
+    doc = Document()
+    table = doc.add_table(rows=1, cols=columns)
+    table.rows[0].cells[0].text = "序号"
+    return doc
+
+
+def add_row_reference(doc, table_index, cell_values):
+    """ 逐行添加（批量之前的实现） """
+    table = doc.tables[table_index]
+    new_row = table.add_row()
+    new_row.cells[0].text = f"{len(table.rows) - 1}."
+    for paragraph in new_row.cells[0].paragraphs:
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for run in paragraph.runs:
+            run.font.name = "Calibri"
+            run.font.size = Pt(10)
+    for col_idx in range(1, len(new_row.cells)):
+        if (col_idx - 1) < len(cell_values):
+            new_row.cells[col_idx].text = str(cell_values[col_idx - 1])
+        else:
+            new_row.cells[col_idx].text = ""
+        _apply_font_style(new_row.cells[col_idx], font_name="宋体", font_size_pt=12)
+
+
+def row_xml(doc):
+    return [etree.tostring(tr, encoding="unicode") for tr in doc.tables[0]._tbl.tr_lst]
+
+
+def main():
+    expected = new_document()
+    for cell_values in ROWS:
+        add_row_reference(expected, 0, cell_values)
+
+    actual = new_document()
+    add_rows_with_auto_serial(actual, 0, ROWS)
+
+    expected_rows, actual_rows = row_xml(expected), row_xml(actual)
+    assert len(expected_rows) == len(actual_rows), (len(expected_rows), len(actual_rows))
+    for index, (expected_tr, actual_tr) in enumerate(zip(expected_rows, actual_rows)):
+        assert expected_tr == actual_tr, f"第 {index} 行不同：\n{expected_tr}\n{actual_tr}"
+    print(f"✅ {len(ROWS)} 行与逐行添加的 XML 相同（含空单元格）")
+
+
+if __name__ == "__main__":
+    main()
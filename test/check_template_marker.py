@@ -0,0 +1,55 @@
+"""
+编译模板的标志段落检查：对产品规范模板，按 删除一级标题区段 + 处理标志段落（### DELETE HERE ###）
+分别用原来的流水线（WordTocTool.delete_section_by_title + process_section_by_marker）
+和 CompiledTemplate.render 生成正文，两者的段落文字应完全相同。
+重点是标志段落已随所在一级区段删除的情况：此时不应再删除后面的内容。
+
+检查本身不读写数据库，但导入 app 包时会初始化 SQLAlchemy 并建表，因此仍需配置 DATABASE_URL。
+
+运行：python -m test.check_template_marker
+"""
+
+from docx import Document
+
+from app.controllers.word_product_spec_controller import PRODUCT_SPECIFICATION_TEMPLATE_PATH, DELETE_MARKER_TEXT
+from app.utils.docx_processor import DocxProcessor
+from app.utils.remove_image import process_section_by_marker
+from app.utils.template_compiler import TemplateCompiler
+from app.utils.word_toc_tool import WordTocTool
+
+MARKER_SECTION = "使用注意事项"
+CASES = [
+    ([MARKER_SECTION], True),
+    ([MARKER_SECTION], False),
+    ([], True),
+    ([], False),
+]
+
+
+def old_pipeline(removed_h1, delete_section):
+    doc = Document(PRODUCT_SPECIFICATION_TEMPLATE_PATH)
+    for title in removed_h1:
+        WordTocTool.delete_section_by_title(doc, title)
+    process_section_by_marker(doc, DELETE_MARKER_TEXT, delete_section)
+    return [paragraph.text for paragraph in doc.paragraphs]
+
+
+def compiled_pipeline(removed_h1, delete_section):
+    compiled = TemplateCompiler.compile(PRODUCT_SPECIFICATION_TEMPLATE_PATH, marker_text=DELETE_MARKER_TEXT)
+    document_xml = compiled.render({}, removed_h1=removed_h1, marker_delete_section=delete_section)
+    buffer = DocxProcessor.rewrite_docx(PRODUCT_SPECIFICATION_TEMPLATE_PATH, {}, document_xml=document_xml)
+    return [paragraph.text for paragraph in Document(buffer).paragraphs]
+
+
+def main():
+    for removed_h1, delete_section in CASES:
+        expected = old_pipeline(removed_h1, delete_section)
+        actual = compiled_pipeline(removed_h1, delete_section)
+        assert expected == actual, (removed_h1, delete_section,
+                                    [text for text in expected if text not in actual],
+                                    [text for text in actual if text not in expected])
+        print(f"✅ 删除 {removed_h1 or '无'}，delete_section={delete_section}: {len(actual)} 个段落一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+BOM 明细表写入基准：物料行数从几百到一万，比较原有写法（加载模板后逐行插入、合并、加边框）
+与缓存模板 + 只写模式流式写出（write_bom）的每行耗时和内存峰值。新写法的每行耗时应基本不随行数增长。
+
+运行：python -m test.table_operate.benchmark_bom_writer
+"""
+
+import os
+import time
+import tempfile
+import tracemalloc
+
+import openpyxl
+
+from app.utils.bom_writer import layout_rows, write_bom, bom_template_cache
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "uploads", "template",
+                             "materialtabletemplate.xlsx")
+ROW_COUNTS = [100, 1000, 5000, 10000]
+
+
+def build_rows(row_count):
+    return [(f"JS{idx:06d}", f"物料{idx}", f"M{idx % 10}*{idx % 7}", "个") for idx in range(row_count)]
+
+
+def old_write(output_path, rows):
+    """原有写法"""
+    workbook = openpyxl.load_workbook(TEMPLATE_PATH)
+    layout_rows(workbook.active, rows)
+    workbook.save(output_path)
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    cost = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return cost, peak / 1024 / 1024
+
+
+def main():
+    bom_template_cache.get(TEMPLATE_PATH)  # 模板只解析一次，不计入
+    output_path = os.path.join(tempfile.gettempdir(), "benchmark_bom.xlsx")
+    print(f"{'行数':>6} | {'原写法(us/行)':>14} | {'原写法峰值(MB)':>14} | {'流式(us/行)':>12} | {'流式峰值(MB)':>12}")
+    for row_count in ROW_COUNTS:
+        rows = build_rows(row_count)
+        old_cost, old_peak = measure(lambda: old_write(output_path, rows))
+        new_cost, new_peak = measure(lambda: write_bom(TEMPLATE_PATH, output_path, {"C2": "产品"}, rows))
+        print(f"{row_count:>6} | {old_cost / row_count * 1e6:>14.1f} | {old_peak:>14.1f} | "
+              f"{new_cost / row_count * 1e6:>12.1f} | {new_peak:>12.1f}")
+    os.remove(output_path)
+
+
+if __name__ == "__main__":
+    main()
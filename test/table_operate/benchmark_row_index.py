@@ -0,0 +1,86 @@
+"""
+行索引基准：检验项目表的行数从几十到上千，比较逐行创建代理对象、逐项扫描已选项目（旧实现）
+与行索引（SpecWordTableProcessor）的每行耗时。行索引的每行耗时应基本不随行数增长。
+
+运行：python -m test.table_operate.benchmark_row_index
+"""
+
+import time
+
+from docx import Document
+
+from app.utils.spec_word_table_processor import SpecWordTableProcessor, set_cell_font, delete_sections_by_title
+
+
+ROW_COUNTS = [50, 100, 200, 400, 800, 1600]
+
+
+def build_inspection_doc(row_count):
+    """检验项目表：表头 + row_count 个检验项目，每个项目有一个同名的二级标题章节"""
+    doc = Document()
+    table = doc.add_table(rows=1, cols=5)
+    table.rows[0].cells[0].text = "检验项目"
+    names = []
+    for row_idx in range(row_count):
+        name = f"检验项目{row_idx}"
+        names.append(name)
+        table.add_row().cells[0].text = name
+    for name in names:
+        doc.add_heading(name, level=2)
+        doc.add_paragraph(f"{name} 的试验方法")
+    return doc, names
+
+
+def old_process_table(doc, selected_items, target_table_index):
+    """旧实现：逐行创建代理对象，每行扫描一遍已选项目"""
+    selected_names = [item['name'] for item in selected_items]
+    boolean_map = {True: '√', False: ''}
+    target_table = doc.tables[target_table_index]
+    rows_to_delete = []
+    for row in target_table.rows[1:]:
+        cell_name = row.cells[0].text.strip()
+        if cell_name not in selected_names:
+            rows_to_delete.append(row)
+            continue
+        for item in selected_items:
+            if item['name'] == cell_name:
+                row.cells[1].text = boolean_map[item['pcb']]
+                row.cells[2].text = boolean_map[item['beforeSeal']]
+                row.cells[3].text = boolean_map[item['afterLabel']]
+                row.cells[4].text = item['samplePlan']
+                for cell in row.cells:
+                    set_cell_font(cell, font_name="Times New Roman", font_size=12)
+    delete_titles = []
+    for row in rows_to_delete:
+        delete_titles.append(row.cells[0].text)
+        target_table._element.remove(row._element)
+    delete_sections_by_title(doc, delete_titles, heading_level="Heading 2")
+
+
+def selected(names):
+    return [{"name": name, "pcb": True, "beforeSeal": False, "afterLabel": True, "samplePlan": "100%"}
+            for name in names[::2]]
+
+
+def measure(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    print(f"{'行数':>6} | {'检验表-旧(us/行)':>16} | {'检验表-索引(us/行)':>18}")
+    for row_count in ROW_COUNTS:
+        doc, names = build_inspection_doc(row_count)
+        items = selected(names)
+        old_cost = measure(lambda: old_process_table(doc, items, target_table_index=0))
+
+        doc, names = build_inspection_doc(row_count)
+        items = selected(names)
+        spec_processor = SpecWordTableProcessor(doc=doc)
+        spec_cost = measure(lambda: spec_processor.process_table(items, target_table_index=0))
+
+        print(f"{row_count:>6} | {old_cost / row_count * 1e6:>16.1f} | {spec_cost / row_count * 1e6:>18.1f}")
+
+if __name__ == "__main__":
+    main()